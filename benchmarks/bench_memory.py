@@ -0,0 +1,134 @@
+"""
+Memory of the multi-worker API layouts.
+
+Starts the API in each layout, waits until every worker answers /ready (so
+each one has loaded the model, encoded the categories and run its first
+forward pass) and reads /proc/<pid>/smaps_rollup of the master and all its
+descendants:
+
+- uvicorn: `uvicorn --workers N`, where every worker loads its own model
+- gunicorn: `gunicorn -c python:twitter_interest.gunicorn_conf`, where the
+  master loads the model once and forks the workers, which share it
+  copy-on-write
+
+RSS counts shared pages in full in every process. PSS splits each shared page
+between the processes mapping it, so the PSS total is what the layout
+actually costs. Linux only; Neo4j is not contacted.
+
+    python benchmarks/bench_memory.py --workers 4
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import typer
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def smaps_rollup(pid: int) -> dict[str, int]:
+    """Memory counters of `pid` in kB."""
+    counters = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        if name in FIELDS:
+            counters[name] = int(value.split()[0])
+    return counters
+
+
+def descendants(pid: int) -> list[int]:
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children += [int(child) for child in (task / "children").read_text().split()]
+    return [descendant for child in children for descendant in [child, *descendants(child)]]
+
+
+def wait_until_ready(url: str, workers: int, timeout: float) -> float:
+    """Waits until /ready answers 200 on enough consecutive requests to have reached every worker."""
+    start = time.perf_counter()
+    consecutive = 0
+    while consecutive < 8 * workers:
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"{url} not ready after {timeout}s")
+        try:
+            ok = httpx.get(url, timeout=5).status_code == 200
+        except httpx.TransportError:
+            ok = False
+        consecutive = consecutive + 1 if ok else 0
+        if not ok:
+            time.sleep(0.2)
+    return time.perf_counter() - start
+
+
+def measure(name: str, command: list[str], env: dict, port: int, workers: int, timeout: float) -> dict[str, int]:
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        seconds = wait_until_ready(f"http://127.0.0.1:{port}/ready", workers, timeout)
+        pids = [process.pid, *descendants(process.pid)]
+        typer.echo(f"\n{name}: ready in {seconds:.1f}s, {len(pids)} processes")
+        typer.echo(f"  {'pid':>8} {'role':<8}" + "".join(f"{field:>15}" for field in FIELDS))
+        totals = dict.fromkeys(FIELDS, 0)
+        for pid in pids:
+            counters = smaps_rollup(pid)
+            for field in FIELDS:
+                totals[field] += counters.get(field, 0)
+            role = "master" if pid == process.pid else "child"
+            typer.echo(f"  {pid:>8} {role:<8}" + "".join(f"{counters.get(field, 0) / 1024:>12.1f} MB" for field in FIELDS))
+        typer.echo(f"  {'total':>17}" + "".join(f"{totals[field] / 1024:>12.1f} MB" for field in FIELDS))
+        return totals
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main(
+    model_name: str = typer.Option("paraphrase-mpnet-base-v2", "--model", "-m"),
+    workers: int = typer.Option(2, "--workers", "-w"),
+    timeout: float = typer.Option(300, help="Seconds to wait for each layout to become ready"),
+):
+    env = {
+        **os.environ,
+        "INTEREST_MODEL_NAME": model_name,
+        "SERVE_WORKERS": str(workers),
+        "ENABLE_FILE_LOGGING": "false",
+        "LOG_LEVEL": "WARNING",
+        # Settings insists on Neo4j credentials; nothing here connects to Neo4j
+        "NEO4J_URI": os.environ.get("NEO4J_URI", "bolt://localhost:7687"),
+        "NEO4J_USERNAME": os.environ.get("NEO4J_USERNAME", "neo4j"),
+        "NEO4J_PASSWORD": os.environ.get("NEO4J_PASSWORD", "unused"),
+    }
+
+    port = free_port()
+    uvicorn = measure(
+        "uvicorn --workers",
+        [sys.executable, "-m", "uvicorn", "twitter_interest.api:app", "--port", str(port), "--workers", str(workers)],
+        env, port, workers, timeout,
+    )
+    port = free_port()
+    gunicorn = measure(
+        "gunicorn preload",
+        [sys.executable, "-m", "gunicorn", "-c", "python:twitter_interest.gunicorn_conf", "twitter_interest.api:app"],
+        {**env, "SERVE_BIND": f"127.0.0.1:{port}"}, port, workers, timeout,
+    )
+
+    typer.echo(f"\n{workers} workers of {model_name}:")
+    for field in ("Rss", "Pss"):
+        saved = uvicorn[field] - gunicorn[field]
+        typer.echo(
+            f"  {field} total: uvicorn {uvicorn[field] / 1024:.1f} MB, gunicorn {gunicorn[field] / 1024:.1f} MB "
+            f"({saved / 1024:+.1f} MB saved)"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
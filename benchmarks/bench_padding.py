@@ -0,0 +1,123 @@
+"""
+Padding cost of bio batching strategies.
+
+Counts the pad tokens a transformer processes when bios are batched
+(a) in arrival order, (b) sorted by character length, which is what
+SentenceTransformer.encode does within a single call, and (c) bucketed by
+token length as `twitter_interest.encoding` does. With --encode, both the
+plain and the bucketed encoding paths are also timed.
+
+    python benchmarks/bench_padding.py --count 5000 --batch-size 64
+    python benchmarks/bench_padding.py --bios-file bios.txt --encode
+"""
+import random
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import typer
+
+from twitter_interest.encoding import encode_length_bucketed, length_sorted_batches, token_lengths
+
+WORDS = (
+    "founder building web3 defi crypto investor engineer developer python rust ml ai researcher "
+    "product designer writer dad mom runner coffee music gamer nft dao layer2 ethereum bitcoin "
+    "solana open source tech startups marketing growth views are my own former at ceo cto"
+).split()
+EMOJI = ["🚀", "🔥", "💎", "🌍", "⚡", "🧠", "📈", "🎮", "☕", "🇺🇸", "🏳️‍🌈", "👨‍💻"]
+
+
+def synthetic_bios(count: int, seed: int = 0) -> list[str]:
+    """
+    Bios shaped like a Twitter sample: a share of empty ones, many short ones
+    and a long tail up to 160 characters mixing emoji, handles, hashtags and
+    t.co links.
+    """
+    rng = random.Random(seed)
+    bios = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15:
+            bios.append("")
+            continue
+        target = rng.randint(5, 40) if roll < 0.55 else rng.randint(40, 160)
+        parts: list[str] = []
+        while len(" ".join(parts)) < target:
+            kind = rng.random()
+            if kind < 0.65:
+                parts.append(rng.choice(WORDS))
+            elif kind < 0.78:
+                parts.append(rng.choice(EMOJI))
+            elif kind < 0.86:
+                parts.append("@" + rng.choice(WORDS) + str(rng.randint(1, 99)))
+            elif kind < 0.94:
+                parts.append("#" + rng.choice(WORDS))
+            else:
+                parts.append("https://t.co/" + "".join(rng.choices("abcdefghijkLMNOPQ0123456789", k=10)))
+        bios.append(" ".join(parts)[:160])
+    return bios
+
+
+def padding(lengths: np.ndarray, batches: list[np.ndarray]) -> tuple[int, int]:
+    """(pad tokens, total tokens processed) when every batch is padded to its longest member."""
+    pad = total = 0
+    for batch in batches:
+        batch_lengths = lengths[batch]
+        total += int(batch_lengths.max()) * len(batch)
+        pad += int(batch_lengths.max()) * len(batch) - int(batch_lengths.sum())
+    return pad, total
+
+
+def main(
+    model_name: str = typer.Option("paraphrase-mpnet-base-v2", "--model", "-m"),
+    count: int = typer.Option(5000, help="Number of synthetic bios"),
+    bios_file: Optional[Path] = typer.Option(None, help="Use real bios, one per line, instead"),
+    batch_size: int = typer.Option(64, help="Encode batch size"),
+    max_seq_length: int = typer.Option(128, help="Token limit bios are truncated to"),
+    encode: bool = typer.Option(False, help="Also time plain vs bucketed encoding"),
+):
+    from sentence_transformers import SentenceTransformer
+
+    if bios_file is not None:
+        bios = [line.rstrip("\n") for line in bios_file.open(encoding="utf-8")]
+    else:
+        bios = synthetic_bios(count)
+    # Empty bios never reach the model
+    bios = [bio for bio in bios if bio.strip()]
+
+    model = SentenceTransformer(model_name)
+    model.max_seq_length = min(model.max_seq_length or max_seq_length, max_seq_length)
+    lengths = token_lengths(model, bios)
+    typer.echo(
+        f"{len(bios)} bios, tokens per bio: mean {lengths.mean():.1f}, p50 {np.percentile(lengths, 50):.0f}, "
+        f"p95 {np.percentile(lengths, 95):.0f}, max {lengths.max()} (limit {model.max_seq_length})"
+    )
+
+    positions = np.arange(len(bios))
+    char_lengths = np.array([len(bio) for bio in bios])
+    strategies = {
+        "arrival order": [positions[i:i + batch_size] for i in range(0, len(bios), batch_size)],
+        "char-length sort": length_sorted_batches(char_lengths, batch_size),
+        "token-length buckets": length_sorted_batches(lengths, batch_size),
+    }
+    real = int(lengths.sum())
+    for name, batches in strategies.items():
+        pad, total = padding(lengths, batches)
+        typer.echo(f"{name:>22}: {total:>9} tokens processed, {pad:>9} padding ({pad / total:6.1%}), {total / real:.2f}x real")
+
+    if encode:
+        model.encode(bios[:batch_size], batch_size=batch_size)  # warm-up
+        start = time.perf_counter()
+        for i in range(0, len(bios), batch_size):
+            # One call per arrival-order batch, so nothing is re-sorted behind our back
+            model.encode(bios[i:i + batch_size], batch_size=batch_size, normalize_embeddings=True)
+        plain = time.perf_counter() - start
+        start = time.perf_counter()
+        encode_length_bucketed(model, bios, batch_size)
+        bucketed = time.perf_counter() - start
+        typer.echo(f"encode: arrival order {plain:.2f}s, token-length buckets {bucketed:.2f}s ({plain / bucketed:.2f}x)")
+
+
+if __name__ == "__main__":
+    typer.run(main)
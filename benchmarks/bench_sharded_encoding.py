@@ -0,0 +1,81 @@
+"""
+Crossover between in-process and sharded multi-process encoding.
+
+Times `encode_length_bucketed` in this process (using every core through
+torch's intra-op threads) against `EncoderPool` with --processes workers, over
+growing numbers of bios, and reports the smallest size at which the pool wins.
+That size is a good value for ENCODE_PROCESSES_MIN_BIOS on the machine it ran on.
+
+    python benchmarks/bench_sharded_encoding.py --processes 4
+    python benchmarks/bench_sharded_encoding.py --sizes 500,1000,2000,5000 --repeat 3
+"""
+import os
+import time
+
+# Settings insists on Neo4j credentials; nothing here connects to Neo4j
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_USERNAME", "neo4j")
+os.environ.setdefault("NEO4J_PASSWORD", "unused")
+
+import typer
+
+from bench_padding import synthetic_bios
+from twitter_interest.encoder_pool import EncoderPool
+from twitter_interest.encoding import encode_length_bucketed
+from twitter_interest.model_registry import get_model_registry
+from twitter_interest.settings import Settings
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(
+    model_name: str = typer.Option("paraphrase-mpnet-base-v2", "--model", "-m"),
+    processes: int = typer.Option(os.cpu_count() or 1, help="Encoder worker processes"),
+    sizes: str = typer.Option("250,500,1000,2000,4000,8000,16000", help="Comma-separated bio counts"),
+    batch_size: int = typer.Option(64, help="Encode batch size"),
+    repeat: int = typer.Option(2, help="Runs per size; the fastest is reported"),
+):
+    import torch
+
+    settings = Settings(INTEREST_MODEL_NAME=model_name, ENCODE_PROCESSES=processes)
+    counts = [int(size) for size in sizes.split(",")]
+    bios = [bio for bio in synthetic_bios(max(counts) * 2) if bio.strip()]
+
+    model = get_model_registry(settings).get_model(model_name)
+    pool = EncoderPool(settings)
+    # Load the model in every worker before timing anything
+    pool.encode(bios[:processes * batch_size], batch_size)
+    encode_length_bucketed(model, bios[:batch_size], batch_size)
+
+    typer.echo(
+        f"{model_name}: in-process on {torch.get_num_threads()} threads vs "
+        f"{processes} processes x {pool.threads_per_process} threads"
+    )
+    typer.echo(f"{'bios':>8} {'in-process':>12} {'pool':>12} {'speedup':>8}")
+    crossover = None
+    try:
+        for count in counts:
+            sample = bios[:count]
+            local = best_of(repeat, lambda: encode_length_bucketed(model, sample, batch_size))
+            sharded = best_of(repeat, lambda: pool.encode(sample, batch_size))
+            if crossover is None and sharded < local:
+                crossover = count
+            typer.echo(f"{count:>8} {local:>11.3f}s {sharded:>11.3f}s {local / sharded:>7.2f}x")
+    finally:
+        pool.shutdown()
+
+    if crossover is None:
+        typer.echo("The pool never beat in-process encoding at these sizes")
+    else:
+        typer.echo(f"Crossover: the pool is faster from about {crossover} bios (ENCODE_PROCESSES_MIN_BIOS={crossover})")
+
+
+if __name__ == "__main__":
+    typer.run(main)
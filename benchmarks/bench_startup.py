@@ -0,0 +1,88 @@
+"""
+API cold-start cost.
+
+Each measurement runs in a fresh interpreter, so nothing is already imported
+or loaded:
+
+- import: time to `import twitter_interest.api`, and whether that pulled in torch
+- warm-up: seconds per `warmup.warm_up` stage (ML imports, model load, category
+  embeddings, first forward pass)
+- ready: time from interpreter start until GET /ready answers 200 (Neo4j is
+  not contacted; the driver is created lazily)
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import typer
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import twitter_interest.api
+print(json.dumps({"seconds": time.perf_counter() - start, "torch": "torch" in sys.modules}))
+"""
+
+WARMUP_PROBE = """
+import json
+from twitter_interest.settings import Settings
+from twitter_interest.warmup import warm_up
+print(json.dumps(warm_up(Settings())))
+"""
+
+READY_PROBE = """
+import json, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+import twitter_interest.api as api
+with TestClient(api.app) as client:
+    while client.get("/ready").status_code != 200:
+        time.sleep(0.01)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def probe(code: str, env: dict) -> dict:
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(values: list[float]) -> str:
+    return f"median {statistics.median(values):.3f}s, min {min(values):.3f}s, max {max(values):.3f}s"
+
+
+def main(
+    model_name: str = typer.Option("paraphrase-mpnet-base-v2", "--model", "-m"),
+    repeat: int = typer.Option(3, help="Fresh interpreters per measurement"),
+):
+    env = {
+        **os.environ,
+        "INTEREST_MODEL_NAME": model_name,
+        "ENABLE_FILE_LOGGING": "false",
+        "LOG_LEVEL": "WARNING",
+        # Settings insists on Neo4j credentials; nothing here connects to Neo4j
+        "NEO4J_URI": os.environ.get("NEO4J_URI", "bolt://localhost:7687"),
+        "NEO4J_USERNAME": os.environ.get("NEO4J_USERNAME", "neo4j"),
+        "NEO4J_PASSWORD": os.environ.get("NEO4J_PASSWORD", "unused"),
+    }
+
+    imports = [probe(IMPORT_PROBE, env) for _ in range(repeat)]
+    typer.echo(f"import twitter_interest.api: {summarize([run['seconds'] for run in imports])}")
+    typer.echo(f"  torch imported by the API module: {any(run['torch'] for run in imports)}")
+
+    warmups = [probe(WARMUP_PROBE, env) for _ in range(repeat)]
+    typer.echo(f"warm-up of {model_name}:")
+    for stage in warmups[0]:
+        typer.echo(f"  {stage:<13} {summarize([run[stage] for run in warmups])}")
+    typer.echo(f"  {'total':<13} {summarize([sum(run.values()) for run in warmups])}")
+
+    readies = [probe(READY_PROBE, env) for _ in range(repeat)]
+    typer.echo(f"interpreter start to /ready: {summarize([run['seconds'] for run in readies])}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,268 @@
+"""
+Reproducible performance suite for the interest pipeline.
+
+Every scenario runs against a seeded synthetic follow graph (see `stand_ins`)
+at each scale, from 100 to 50k followings per user:
+
+- extractor: `InterestExtractor.extract_category_indices` over a user's bios
+- aggregator: `InterestAggregator.aggregate_indices` over a user's index matrix
+- infer_interests: the synchronous pipeline, with an in-memory Neo4j and a
+  local Network Sync server
+- api: GET /interests/{user} through the FastAPI app, with the same stand-ins
+
+Each scenario records p50/p99 latency, throughput in followings per second
+and the peak RSS of this process while it ran. Every request re-syncs and the
+embedding cache is off, so each iteration encodes every bio. `run` writes the
+results to a JSON baseline; `compare` (or `run --compare`) flags metrics that
+got worse by more than --threshold and exits non-zero if any did.
+
+    python benchmarks/bench_suite.py run -o baseline.json
+    python benchmarks/bench_suite.py run -o current.json --compare baseline.json
+    python benchmarks/bench_suite.py compare baseline.json current.json --threshold 0.2
+"""
+import functools
+import json
+import os
+import platform
+import random
+import resource
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from unittest import mock
+
+import numpy as np
+import typer
+
+from stand_ins import AsyncInMemoryNeo4jClient, InMemoryNeo4jClient, LocalSyncServer, SyntheticGraph
+
+SCENARIOS = ("extractor", "aggregator", "infer_interests", "api")
+# Higher is worse for every metric but throughput
+COMPARED_METRICS = {"p50_seconds": 1, "p99_seconds": 1, "throughput": -1, "peak_rss_mb": 1}
+
+app = typer.Typer(help=__doc__.split("\n\n")[0])
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, in kB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSS:
+    """Samples this process's RSS on a background thread while the block runs."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self) -> "PeakRSS":
+        self.peak = rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def measure(run_once: Callable[[], None], followings: int, repeat: int) -> dict:
+    """Runs `run_once` once to warm up, then `repeat` timed times."""
+    run_once()
+    latencies = []
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run_once()
+            latencies.append(time.perf_counter() - start)
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        "followings": followings,
+        "iterations": repeat,
+        "p50_seconds": p50,
+        "p99_seconds": float(np.percentile(latencies, 99)),
+        "mean_seconds": float(np.mean(latencies)),
+        "throughput": followings / p50 if p50 else 0.0,
+        "peak_rss_mb": rss.peak / 2**20,
+    }
+
+
+def scenario_runner(name: str, graph: SyntheticGraph, scale: int, settings, client) -> Callable[[], None]:
+    """One iteration of scenario `name` for the user following `scale` accounts."""
+    from twitter_interest.aggregation import InterestAggregator
+    from twitter_interest.interest_extractor import InterestExtractor
+    from twitter_interest.service import infer_interests
+
+    user = graph.user(scale)
+    if name == "extractor":
+        extractor = InterestExtractor(settings)
+        bios = [graph.user_bios[user], *graph.following_bios(user)]
+        return lambda: extractor.extract_category_indices(bios)
+    if name == "aggregator":
+        rng = np.random.default_rng(scale)
+        categories = settings.categories
+        indices = rng.integers(-1, len(categories), size=(scale + 1, settings.top_n_extractor))
+        aggregator = InterestAggregator(settings)
+        return lambda: aggregator.aggregate_indices(indices[0], indices[1:], categories)
+    if name == "infer_interests":
+        return lambda: infer_interests(user, settings, force_sync=True)
+    if name == "api":
+        def request() -> None:
+            response = client.get(f"/interests/{user}", params={"force_sync": "true"})
+            response.raise_for_status()
+        return request
+    raise typer.BadParameter(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+
+
+def environment(model_name: str) -> dict:
+    import torch
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "model": model_name,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Prints a side-by-side comparison; returns the regressed `scenario/scale metric`s."""
+    for key in ("model", "cpus", "torch_threads"):
+        if baseline["environment"].get(key) != current["environment"].get(key):
+            typer.secho(
+                f"warning: {key} differs ({baseline['environment'].get(key)} -> {current['environment'].get(key)})",
+                fg=typer.colors.YELLOW,
+            )
+    regressions = []
+    typer.echo(f"{'benchmark':<24} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            old, new = before[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = change * direction > threshold
+            if regressed:
+                regressions.append(f"{key} {metric}")
+            typer.secho(
+                f"{key:<24} {metric:<12} {old:>12.4f} {new:>12.4f} {change:>+8.1%}" + ("  REGRESSION" if regressed else ""),
+                fg=typer.colors.RED if regressed else None,
+            )
+    return regressions
+
+
+def report_regressions(regressions: list[str], threshold: float) -> None:
+    if regressions:
+        typer.secho(f"{len(regressions)} regressions beyond {threshold:.0%}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    typer.secho(f"No regressions beyond {threshold:.0%}", fg=typer.colors.GREEN)
+
+
+@app.command()
+def run(
+    output: Path = typer.Option(Path("benchmark.json"), "--output", "-o", help="Where to write the results"),
+    model_name: str = typer.Option("paraphrase-mpnet-base-v2", "--model", "-m"),
+    scales: str = typer.Option("100,1000,10000,50000", help="Followings per user, comma-separated"),
+    scenarios: list[str] = typer.Option(list(SCENARIOS), "--scenario", "-s"),
+    repeat: int = typer.Option(5, help="Timed iterations per scenario and scale, after one warm-up"),
+    seed: int = typer.Option(0),
+    neo4j_latency_ms: float = typer.Option(0.0, help="Latency added to every stand-in Neo4j query"),
+    sync_latency_ms: float = typer.Option(0.0, help="Latency of the stand-in Network Sync API"),
+    compare: Optional[Path] = typer.Option(None, help="Baseline to compare the results with"),
+    threshold: float = typer.Option(0.15, help="Relative change counted as a regression"),
+):
+    """Runs the scenarios and writes a JSON baseline."""
+    scale_list = [int(scale) for scale in scales.split(",")]
+    random.seed(seed)
+    np.random.seed(seed)
+    typer.echo(f"Generating a synthetic graph for {scale_list} followings")
+    graph = SyntheticGraph(scale_list, seed)
+
+    with LocalSyncServer(latency=sync_latency_ms / 1000) as sync_server:
+        os.environ.update({
+            "INTEREST_MODEL_NAME": model_name,
+            "NETWORK_SYNC_URL": sync_server.url,
+            # Every iteration encodes every bio
+            "EMBEDDING_CACHE_ENABLED": "false",
+            "WARMUP_ON_STARTUP": "false",
+            "ENABLE_FILE_LOGGING": "false",
+            "LOG_LEVEL": "WARNING",
+            # Settings insists on Neo4j credentials; the stand-in replaces the client
+            "NEO4J_URI": os.environ.get("NEO4J_URI", "bolt://localhost:7687"),
+            "NEO4J_USERNAME": os.environ.get("NEO4J_USERNAME", "neo4j"),
+            "NEO4J_PASSWORD": os.environ.get("NEO4J_PASSWORD", "unused"),
+        })
+        from fastapi.testclient import TestClient
+        import twitter_interest.api as api
+        from twitter_interest import service
+        from twitter_interest.logging_config import setup_logging
+        from twitter_interest.settings import Settings
+
+        setup_logging(level="WARNING", enable_file_logging=False)
+        settings = Settings()
+        latency = neo4j_latency_ms / 1000
+        results = {}
+        with (
+            mock.patch.object(service, "Neo4jClient", functools.partial(InMemoryNeo4jClient, graph=graph, latency=latency)),
+            mock.patch.object(service, "AsyncNeo4jClient", functools.partial(AsyncInMemoryNeo4jClient, graph=graph, latency=latency)),
+            TestClient(api.app) as client,
+        ):
+            for name in scenarios:
+                for scale in scale_list:
+                    runner = scenario_runner(name, graph, scale, settings, client)
+                    result = measure(runner, scale, repeat)
+                    results[f"{name}/{scale}"] = result
+                    typer.echo(
+                        f"{name + '/' + str(scale):<24} p50 {result['p50_seconds']:8.4f}s  p99 {result['p99_seconds']:8.4f}s  "
+                        f"{result['throughput']:10.0f} followings/s  peak RSS {result['peak_rss_mb']:7.1f} MB"
+                    )
+
+    report = {
+        "created_at": time.time(),
+        "environment": environment(model_name),
+        "config": {
+            "scales": scale_list,
+            "scenarios": scenarios,
+            "repeat": repeat,
+            "seed": seed,
+            "neo4j_latency_ms": neo4j_latency_ms,
+            "sync_latency_ms": sync_latency_ms,
+            "followings_page_size": settings.followings_page_size,
+            "encode_batch_size": settings.encode_batch_size,
+        },
+        "results": results,
+    }
+    output.write_text(json.dumps(report, indent=2))
+    typer.echo(f"Wrote {output}")
+
+    if compare is not None:
+        report_regressions(compare_results(json.loads(compare.read_text()), report, threshold), threshold)
+
+
+@app.command("compare")
+def compare_command(
+    baseline: Path = typer.Argument(..., exists=True),
+    current: Path = typer.Argument(..., exists=True),
+    threshold: float = typer.Option(0.15, help="Relative change counted as a regression"),
+):
+    """Compares two result files and exits non-zero on regressions."""
+    regressions = compare_results(json.loads(baseline.read_text()), json.loads(current.read_text()), threshold)
+    report_regressions(regressions, threshold)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,182 @@
+"""
+Local stand-ins for the services inference depends on, used by the benchmark
+suite:
+
+- `SyntheticGraph`: users following from 100 to 50k accounts drawn from one
+  shared pool, with bios from `bench_padding.synthetic_bios`
+- `InMemoryNeo4jClient` / `AsyncInMemoryNeo4jClient`: the part of the Neo4j
+  client interface inference uses, answered from a `SyntheticGraph` with the
+  same page shapes and keyset pagination as the real queries
+- `LocalSyncServer`: an HTTP server that accepts Network Sync API sync calls
+
+Everything is seeded, so two runs with the same arguments see the same graph.
+"""
+import asyncio
+import bisect
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_padding import synthetic_bios
+
+
+class SyntheticGraph:
+    """
+    Users named `user_<n>` following `n` accounts each, for every `n` in
+    `scales`. The accounts come from one pool, so larger users share
+    followings with smaller ones the way real networks do.
+    """
+
+    def __init__(self, scales: list[int], seed: int = 0):
+        rng = random.Random(seed)
+        pool_size = max(scales) * 2
+        self.bios = dict(zip((f"acct{i:07d}" for i in range(pool_size)), synthetic_bios(pool_size, seed)))
+        accounts = list(self.bios)
+        self.followings: dict[str, list[str]] = {}
+        self.user_bios: dict[str, str] = {}
+        for scale in scales:
+            user = f"user_{scale}"
+            # Sorted, like the real queries' ORDER BY f.id
+            self.followings[user] = sorted(rng.sample(accounts, scale))
+            self.user_bios[user] = synthetic_bios(1, seed + scale)[0] or "python developer"
+        self.synced_at: dict[str, float] = {}
+
+    @staticmethod
+    def user(scale: int) -> str:
+        return f"user_{scale}"
+
+    def following_bios(self, user: str) -> list[str]:
+        return [self.bios[username] for username in self.followings[user]]
+
+    def page(self, user: str, after: str | None, limit: int | None) -> list[dict]:
+        followings = self.followings[user]
+        start = bisect.bisect_right(followings, after) if after is not None else 0
+        end = len(followings) if limit is None else start + limit
+        return [{"username": username, "bio": self.bios[username]} for username in followings[start:end]]
+
+
+class InMemoryNeo4jClient:
+    """Synchronous `Neo4jClient` stand-in; `latency` seconds are added to every query."""
+
+    def __init__(self, settings=None, driver=None, *, graph: SyntheticGraph, latency: float = 0.0):
+        self.graph = graph
+        self.latency = latency
+
+    def _query(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_last_synced_at(self, user_id) -> float | None:
+        self._query()
+        return self.graph.synced_at.get(user_id)
+
+    def mark_synced(self, user_id, synced_at: float) -> None:
+        self._query()
+        self.graph.synced_at[user_id] = synced_at
+
+    def get_user_with_followings(self, user_id, limit: int | None = None) -> dict | None:
+        self._query()
+        if user_id not in self.graph.followings:
+            return None
+        return {"bio": self.graph.user_bios[user_id], "followings": self.graph.page(user_id, None, limit)}
+
+    def iter_followings_with_bios(self, user_id, page_size: int, after: str | None = None):
+        while True:
+            self._query()
+            page = self.graph.page(user_id, after, page_size)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    def close(self):
+        pass
+
+
+class AsyncInMemoryNeo4jClient:
+    """Async counterpart of `InMemoryNeo4jClient`, standing in for `AsyncNeo4jClient`."""
+
+    def __init__(self, settings=None, driver=None, *, graph: SyntheticGraph, latency: float = 0.0):
+        self.graph = graph
+        self.latency = latency
+
+    async def _query(self) -> None:
+        await asyncio.sleep(self.latency)
+
+    async def get_last_synced_at(self, user_id) -> float | None:
+        await self._query()
+        return self.graph.synced_at.get(user_id)
+
+    async def mark_synced(self, user_id, synced_at: float) -> None:
+        await self._query()
+        self.graph.synced_at[user_id] = synced_at
+
+    async def get_user_with_followings(self, user_id, limit: int | None = None) -> dict | None:
+        await self._query()
+        if user_id not in self.graph.followings:
+            return None
+        return {"bio": self.graph.user_bios[user_id], "followings": self.graph.page(user_id, None, limit)}
+
+    async def iter_followings_with_bios(self, user_id, page_size: int, after: str | None = None):
+        while True:
+            await self._query()
+            page = self.graph.page(user_id, after, page_size)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    async def close(self):
+        pass
+
+
+class LocalSyncServer:
+    """
+    Stand-in for the Network Sync API: every request waits `latency` seconds
+    and answers 200 with {"status": "success"}. Use as a context manager.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per call
+            disable_nagle_algorithm = True
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                server.requests += 1
+                if latency:
+                    time.sleep(latency)
+                payload = json.dumps({"status": "success"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="local-sync-server", daemon=True)
+
+    def __enter__(self) -> "LocalSyncServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,5 +1,7 @@
-from collections import Counter, defaultdict
-from typing import List, Tuple, Union
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
 from .settings import Settings
 from .logging_config import get_logger
 
@@ -11,7 +13,7 @@ class InterestAggregator:
         total = settings.self_weight + settings.followings_weight
         self.self_weight = settings.self_weight / total
         self.followings_weight = settings.followings_weight / total
-        
+
         logger.debug(f"Initialized InterestAggregator with weights - self: {self.self_weight:.3f}, followings: {self.followings_weight:.3f}")
 
     def aggregate(
@@ -21,55 +23,131 @@ class InterestAggregator:
             top_n: int | None = None,
             return_scores: bool = False
     ) -> Union[List[str], List[Tuple[str, float]]]:
-        top_n = top_n or self.settings.top_n_aggregator
-        return_scores = return_scores or self.settings.return_scores
-        
+        """
+        Combines the user's interests and their followings' interests into the
+        top_n interests by weighted share. Ties keep first-seen order (user
+        interests first, then followings in order).
+        """
         logger.info(f"Aggregating interests - user: {len(user_interests)} interests, followings: {len(followings_interests_list)} users")
         logger.debug(f"User interests: {user_interests}")
+
+        # Map interest strings to indices in first-seen order, then use the fused path
+        labels: dict[str, int] = {}
+        user_indices = np.fromiter(
+            (labels.setdefault(interest, len(labels)) for interest in user_interests),
+            dtype=np.int64,
+            count=len(user_interests),
+        )
+        followings_indices = np.fromiter(
+            (labels.setdefault(interest, len(labels)) for interests in followings_interests_list for interest in interests),
+            dtype=np.int64,
+        )
+        return self._rank(user_indices, followings_indices, list(labels), top_n, return_scores)
+
+    def aggregate_indices(
+            self,
+            user_indices: np.ndarray,
+            followings_indices: np.ndarray,
+            categories: Sequence[str],
+            top_n: int | None = None,
+            return_scores: bool = False
+    ) -> Union[List[str], List[Tuple[str, float]]]:
+        """
+        Fused equivalent of `aggregate` working directly on the category index
+        arrays from `InterestExtractor.extract_category_indices`: a 1-D row for
+        the user and an (n_followings, k) matrix for the followings, with -1 for
+        empty slots. Gives exactly the same ranking as `aggregate` on the
+        corresponding category strings.
+        """
+        user_indices = np.asarray(user_indices).ravel()
+        followings_indices = np.asarray(followings_indices)
+        logger.info(f"Aggregating interests - user: {user_indices.size} slots, followings: {len(followings_indices)} users")
+
+        # Boolean masking flattens row by row, i.e. in the same order as the string lists
+        return self._rank(
+            user_indices[user_indices >= 0],
+            followings_indices[followings_indices >= 0],
+            categories,
+            top_n,
+            return_scores,
+        )
+
+    def aggregate_counts(
+            self,
+            user_interests: list[str],
+            followings_counts: Sequence[Tuple[str, int]],
+            top_n: int | None = None,
+            return_scores: bool = False
+    ) -> Union[List[str], List[Tuple[str, float]]]:
+        """
+        Equivalent of `aggregate` for followings whose interests were already
+        counted elsewhere (e.g. in Cypher): `followings_counts` holds
+        (interest, count) pairs in the order each interest was first seen.
+        """
+        logger.info(f"Aggregating interests - user: {len(user_interests)} interests, followings: {len(followings_counts)} counted interests")
+
+        labels: dict[str, int] = {}
+        user_indices = np.fromiter(
+            (labels.setdefault(interest, len(labels)) for interest in user_interests),
+            dtype=np.int64,
+            count=len(user_interests),
+        )
+        label_ids = np.fromiter(
+            (labels.setdefault(interest, len(labels)) for interest, _ in followings_counts),
+            dtype=np.int64,
+            count=len(followings_counts),
+        )
+        counts = np.fromiter((count for _, count in followings_counts), dtype=np.int64, count=len(followings_counts))
+        # Expanding the counts keeps both the totals and the first-seen order of each interest
+        followings_indices = np.repeat(label_ids, counts)
+        return self._rank(user_indices, followings_indices, list(labels), top_n, return_scores)
+
+    def _rank(
+            self,
+            user_indices: np.ndarray,
+            followings_indices: np.ndarray,
+            labels: Sequence[str],
+            top_n: int | None,
+            return_scores: bool
+    ) -> Union[List[str], List[Tuple[str, float]]]:
+        top_n = top_n or self.settings.top_n_aggregator
+        return_scores = return_scores or self.settings.return_scores
         logger.debug(f"Aggregation parameters - top_n: {top_n}, return_scores: {return_scores}")
-        
-        all_interests = []
-
-        # Flatten all followings' interests into one list
-        for interests in followings_interests_list:
-            all_interests.extend(interests)
-
-        # Count followings interests
-        followings_counter = Counter(all_interests)
-        total_followings = sum(followings_counter.values())
-        logger.debug(f"Followings interests counter: {dict(followings_counter)}, total: {total_followings}")
-
-        # Count self interests
-        self_counter = Counter(user_interests)
-        total_self = sum(self_counter.values())
-        logger.debug(f"User interests counter: {dict(self_counter)}, total: {total_self}")
-
-        # Combine with weights
-        combined: dict[str, float] = defaultdict(float)
-
-        # Scale based on weightage
-        for interest, count in self_counter.items():
-            if total_self > 0:
-                weighted_score = (count / total_self) * self.self_weight
-                combined[interest] += weighted_score
-                logger.debug(f"User interest '{interest}': count={count}, weighted_score={weighted_score:.4f}")
-
-        for interest, count in followings_counter.items():
-            if total_followings > 0:
-                weighted_score = (count / total_followings) * self.followings_weight
-                combined[interest] += weighted_score
-                logger.debug(f"Followings interest '{interest}': count={count}, weighted_score={weighted_score:.4f}")
-
-        # Return top_n sorted interests (by weighted score)
-        top = sorted(
-            combined.items(),
-            key=lambda pair: pair[1],
-            reverse=True
-        )[:top_n]
 
+        n_labels = len(labels)
+        self_counts = np.bincount(user_indices, minlength=n_labels)
+        followings_counts = np.bincount(followings_indices, minlength=n_labels)
+        total_self = user_indices.size
+        total_followings = followings_indices.size
+        logger.debug(f"Interest counts - user total: {total_self}, followings total: {total_followings}")
+
+        # Same operation order as summing weighted shares into a dict, so scores are bit-identical
+        scores = np.zeros(n_labels, dtype=np.float64)
+        if total_self > 0:
+            scores += (self_counts / total_self) * self.self_weight
+        if total_followings > 0:
+            scores += (followings_counts / total_followings) * self.followings_weight
+
+        # Ties are broken by first occurrence: user interests first, then followings
+        first_seen = np.full(n_labels, np.iinfo(np.int64).max, dtype=np.int64)
+        uniques, positions = np.unique(followings_indices, return_index=True)
+        first_seen[uniques] = total_self + positions
+        uniques, positions = np.unique(user_indices, return_index=True)
+        first_seen[uniques] = positions
+
+        candidates = np.flatnonzero((self_counts > 0) | (followings_counts > 0))
+        if candidates.size > top_n:
+            # Keep everything scoring at least the top_n-th best score, so ties at the cutoff are ordered exactly
+            candidate_scores = scores[candidates]
+            kth = candidate_scores[np.argpartition(-candidate_scores, top_n - 1)[top_n - 1]]
+            candidates = candidates[candidate_scores >= kth]
+        order = np.lexsort((first_seen[candidates], -scores[candidates]))
+        top_indices = candidates[order][:top_n]
+
+        top = [(labels[i], float(scores[i])) for i in top_indices]
         logger.info(f"Final aggregated interests (top {len(top)}): {[f'{interest}:{score:.3f}' for interest, score in top]}")
 
         if return_scores:
             return top
-        else: 
-            return [interest for interest, _ in top]
\ No newline at end of file
+        else:
+            return [interest for interest, _ in top]
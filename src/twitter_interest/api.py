@@ -1,34 +1,95 @@
+import secrets
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from typing import List, Optional, Tuple, cast
 
-from fastapi import FastAPI, Depends, HTTPException, Query
-from pydantic import BaseModel
-import requests
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+import httpx
 
 from .settings import Settings, get_settings
-from .service import infer_interests, UserNotFoundError
+from .service import (
+    infer_interests_async, infer_interests_batch_async, ensure_synced_async, run_inference, StageTimings, UserNotFoundError
+)
 from .logging_config import setup_logging, get_logger
 
-from .api_client import APIClient
-from .neo4j_client import Neo4jClient
-
-# Setup logging for API
-settings_for_logging = Settings()
-setup_logging(
-    level=settings_for_logging.log_level,
-    log_file=settings_for_logging.log_file,
-    enable_file_logging=settings_for_logging.enable_file_logging,
-    enable_rotation=settings_for_logging.enable_log_rotation,
-    max_file_size=settings_for_logging.max_log_file_size,
-    retention=settings_for_logging.log_retention
-)
+from .api_client import AsyncAPIClient, CircuitOpenError, close_async_http_client
+from .neo4j_client import AsyncNeo4jClient, get_async_driver, close_async_driver, pool_stats
+from .model_registry import get_model_registry
+from .embedding_cache import get_embedding_cache
+from .result_cache import get_result_cache, invalidate_user_results
+from .scheduler import scheduler_stats
+from .metrics import PROMETHEUS_CONTENT_TYPE, inference_metrics, render_prometheus
+from .preprocessing import preprocessing_stats
+from .encoder_pool import encoder_pool_stats, shutdown_encoder_pools
+from .taxonomy import CategoriesFileWatcher, get_taxonomy, update_taxonomy, with_current_taxonomy
+from .warmup import is_ready, start_warmup, warmup_state
+from .profiling import ProfilerBusyError, load_profile, profiled, save_profile
 
 logger = get_logger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Settings and logging are set up here rather than at import, so importing the app stays cheap
+    settings = get_settings()
+    setup_logging(
+        level=settings.log_level,
+        log_file=settings.log_file,
+        enable_file_logging=settings.enable_file_logging,
+        enable_rotation=settings.enable_log_rotation,
+        max_file_size=settings.max_log_file_size,
+        retention=settings.log_retention
+    )
+    # One pooled Neo4j driver serves every request for the app's lifetime
+    get_async_driver(settings)
+    # The model loads in the background; /ready turns green when it's done
+    if settings.warmup_on_startup:
+        start_warmup(with_current_taxonomy(settings))
+    watcher = CategoriesFileWatcher(settings) if settings.categories_file else None
+    if watcher is not None:
+        watcher.start()
+    yield
+    if watcher is not None:
+        watcher.stop()
+    await close_async_driver()
+    await close_async_http_client()
+    shutdown_encoder_pools()
+
 app = FastAPI(
     title="Twitter Interest Inference API",
-    description= "Given a Twitter username, returns the top interests."
+    description= "Given a Twitter username, returns the top interests.",
+    lifespan=lifespan,
 )
 
+def get_request_settings(settings: Settings = Depends(get_settings)) -> Settings:
+    """
+    Per-request copy of the shared settings, carrying the category taxonomy
+    in effect when the request started even if it is swapped mid-request.
+    """
+    return with_current_taxonomy(settings)
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+) -> None:
+    if settings.admin_token is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token.get_secret_value()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
+def profiling_requested(
+    profile: bool = Query(False, description="Profile this request (requires X-Admin-Token)"),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+) -> bool:
+    """True if the request asks to be profiled, through ?profile=true or an `X-Profile: 1` header; admin only."""
+    requested = profile or (x_profile or "").strip().lower() in ("1", "true", "yes")
+    if requested:
+        require_admin(x_admin_token, settings)
+    return requested
+
 def normalize_username(username: str) -> str:
     # Remove whitespace, leading '@', and lowercase
     normalized = username.strip().lstrip("@").lower()
@@ -43,90 +104,241 @@ class InterestResponse(BaseModel):
     username: str
     model: str
     interests: List[InterestItem]
+    data_source: str
+    last_synced_at: Optional[datetime] = None
+
+def _synced_at_datetime(synced_at: float | None) -> datetime | None:
+    return datetime.fromtimestamp(synced_at, tz=timezone.utc) if synced_at is not None else None
+
+def _interest_items(raw, return_scores: bool) -> List[InterestItem]:
+    # raw can be either Union[List[str] or List[Tuple[str, float]]]
+    if return_scores:
+        scored: List[Tuple[str, float]] = cast(List[Tuple[str, float]], raw)
+        return [InterestItem(interest=interest, score=score) for interest, score in scored]
+    unscored: List[str] = cast(List[str], raw)
+    return [InterestItem(interest=interest) for interest in unscored]
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as required for If-None-Match
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """Evaluates If-None-Match, or failing that If-Modified-Since, against the result."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return int(last_modified) <= since.timestamp()
+    return False
 
 @app.get("/interests/{username}", response_model=InterestResponse)
-def get_interests(
+async def get_interests(
     username: str,
+    request: Request,
+    response: Response,
     model: Optional[str] = Query(
         None, 
         title="Model override",
         description="Sentence transformer model, e.g., all-MiniLM-L6-v2, paraphrase-mpnet-base-v2"
     ),
     return_scores: bool = Query(False),
-    settings: Settings = Depends(get_settings),
+    force_sync: bool = Query(False, description="Re-sync followings even if they were synced recently"),
+    settings: Settings = Depends(get_request_settings),
+    profile: bool = Depends(profiling_requested),
 ):
     username = normalize_username(username)
-    logger.info(f"GET /interests/{username} - model: {model}, return_scores: {return_scores}")
-    
-    settings.return_scores = return_scores
+    logger.info(
+        f"GET /interests/{username} - model: {model}, return_scores: {return_scores}, "
+        f"force_sync: {force_sync}, profile: {profile}"
+    )
     
+    # Copy the shared settings so per-request overrides don't leak into other requests
+    settings = settings.model_copy(update={"return_scores": return_scores})
+
     if model:
         logger.info(f"Using model override: {model}")
         settings.model_name = model
 
+    timings = StageTimings()
     try:
-        raw = infer_interests(username, settings)
-        # raw can be either Union[List[str] or List[Tuple[str, float]]]
-        items: List[InterestItem] = []
-
-        if return_scores:
-            scored: List[Tuple[str, float]] = cast(List[Tuple[str, float]], raw)
-            items = [
-                InterestItem(interest=interest, score=score)
-                for interest, score in scored 
-            ]
+        if profile:
+            with profiled(f"GET /interests/{username}", settings.profile_sample_interval_ms / 1000) as session:
+                inference = await infer_interests_async(username, settings, force_sync=force_sync, timings=timings)
+            session.report["stage_seconds"] = timings.seconds
+            save_profile(session, settings.profile_dir)
         else:
-            unscored: List[str] = cast(List[str], raw)
-            items = [InterestItem(interest=interest) for interest in unscored]  
+            inference = await infer_interests_async(username, settings, force_sync=force_sync, timings=timings)
+        headers = {
+            "ETag": inference.etag,
+            "Last-Modified": formatdate(inference.computed_at, usegmt=True),
+            "Server-Timing": timings.server_timing(),
+        }
+        if profile:
+            headers["X-Profile-Id"] = session.id
+        if _not_modified(request, inference.etag, inference.computed_at):
+            logger.info(f"Interests for user {username} not modified")
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
 
+        items = _interest_items(inference.interests, return_scores)
         response = InterestResponse(
             username=username.lower(),
             model=settings.model_name,
             interests=items,
+            data_source=inference.data_source,
+            last_synced_at=_synced_at_datetime(inference.synced_at),
         )
         logger.info(f"Successfully retrieved {len(items)} interests for user {username}")
         return response
         
+    except CircuitOpenError as e:
+        logger.warning(f"Network Sync API unavailable for {username}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except UserNotFoundError:
         logger.warning(f"User '{username}' not found")
         raise HTTPException(status_code=404, detail=f"User '{username}' not found")
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving interests for user {username}: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+class BatchInterestsRequest(BaseModel):
+    usernames: List[str] = Field(..., min_length=1)
+    model: Optional[str] = None
+    return_scores: bool = False
+    force_sync: bool = False
+
+class BatchUserError(BaseModel):
+    status_code: int
+    detail: str
+
+class BatchUserResult(BaseModel):
+    username: str
+    interests: Optional[List[InterestItem]] = None
+    data_source: Optional[str] = None
+    last_synced_at: Optional[datetime] = None
+    error: Optional[BatchUserError] = None
+
+class BatchInterestsResponse(BaseModel):
+    model: str
+    results: List[BatchUserResult]
+    followings_total: int
+    unique_followings: int
+    unique_bios: int
+
+def _batch_error(e: Exception) -> BatchUserError:
+    """Maps a per-user failure to the status code the single-user endpoint would return."""
+    if isinstance(e, UserNotFoundError):
+        return BatchUserError(status_code=404, detail="User not found")
+    if isinstance(e, CircuitOpenError):
+        return BatchUserError(status_code=503, detail=str(e))
+    if isinstance(e, httpx.HTTPStatusError):
+        return BatchUserError(status_code=e.response.status_code, detail=f"Sync failed: {e}")
+    return BatchUserError(status_code=500, detail=f"Internal server error: {e}")
+
+@app.post("/interests/batch", response_model=BatchInterestsResponse)
+async def get_interests_batch(
+    payload: BatchInterestsRequest,
+    settings: Settings = Depends(get_request_settings),
+):
+    """
+    Infers interests for several users in one call. Followings shared between
+    the users are fetched and encoded once; failures are reported per user.
+    """
+    if len(payload.usernames) > settings.batch_max_usernames:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.batch_max_usernames} usernames per batch, got {len(payload.usernames)}",
+        )
+    usernames = [normalize_username(username) for username in payload.usernames]
+    logger.info(f"POST /interests/batch - {len(usernames)} users, model: {payload.model}, force_sync: {payload.force_sync}")
+
+    # Copy the shared settings so per-request overrides don't leak into other requests
+    update = {"return_scores": payload.return_scores}
+    if payload.model:
+        update["model_name"] = payload.model
+    settings = settings.model_copy(update=update)
+
+    try:
+        batch = await infer_interests_batch_async(usernames, settings, force_sync=payload.force_sync)
+    except Exception as e:
+        logger.error(f"Batch interest inference failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    results = []
+    for username, outcome in batch.results.items():
+        if isinstance(outcome, Exception):
+            results.append(BatchUserResult(username=username, error=_batch_error(outcome)))
+        else:
+            results.append(BatchUserResult(
+                username=username,
+                interests=_interest_items(outcome.interests, payload.return_scores),
+                data_source=outcome.data_source,
+                last_synced_at=_synced_at_datetime(outcome.synced_at),
+            ))
+    failed = sum(1 for result in results if result.error is not None)
+    logger.info(f"Batch completed: {len(results) - failed} succeeded, {failed} failed")
+    return BatchInterestsResponse(
+        model=settings.model_name,
+        results=results,
+        followings_total=batch.followings_total,
+        unique_followings=batch.unique_followings,
+        unique_bios=batch.unique_bios,
+    )
+
+
 class FollowingUser(BaseModel):
     username: str
     bio: str
 
 @app.get("/followings/{username}", response_model=List[FollowingUser])
-def get_followings_with_bios(
+async def get_followings_with_bios(
     username: str,
+    response: Response,
     max_records: int = Query(10, ge=1, le=100, description="Maximum number of followings to return"),
-    settings: Settings = Depends(get_settings),
+    force_sync: bool = Query(False, description="Re-sync followings even if they were synced recently"),
+    settings: Settings = Depends(get_request_settings),
 ):
     username = normalize_username(username)
     logger.info(f"GET /followings/{username} - max_records: {max_records}")
     
-    neo4j_client = Neo4jClient(settings)
-    client = APIClient(settings)
+    neo4j_client = AsyncNeo4jClient(settings)
+    client = AsyncAPIClient(settings)
     
-    # Try syncing user followings
+    # Try syncing user followings, unless they were synced recently
     try:
         logger.debug(f"Syncing followings for user: {username}")
-        result = client.sync_user_followings(username)
+        sync_status = await ensure_synced_async(client, neo4j_client, username, settings, force_sync=force_sync)
+        result = sync_status.result
         # If your sync returns a dict with error, handle it here:
-        if result.get("status") != "success":
+        if result is not None and result.get("status") != "success":
             detail = result.get("error", "Unknown error syncing user followings")
             logger.error(f"Sync failed for user {username}: {detail}")
             raise HTTPException(status_code=400, detail=detail)
+        response.headers["X-Data-Source"] = sync_status.data_source
+    except CircuitOpenError as e:
+        logger.warning(f"Network Sync API unavailable for {username}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # Catch network errors or other unexpected exceptions
         logger.error(f"Sync failed for user {username}: {e}")
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
 
     try:
-        followings = neo4j_client.get_followings_usernames_with_bios_limit(username, max_records)
+        followings = await neo4j_client.get_followings_usernames_with_bios_limit(username, max_records)
         logger.info(f"Retrieved {len(followings)} followings for user {username}")
         return [FollowingUser(username=f["username"], bio=f["bio"]) for f in followings]
     except UserNotFoundError:
@@ -136,7 +348,7 @@ def get_followings_with_bios(
         logger.error(f"Error retrieving followings for user {username}: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     finally:
-        neo4j_client.close()
+        await neo4j_client.close()
 
 
 class MutualUser(BaseModel):
@@ -149,7 +361,7 @@ class MutualsResponse(BaseModel):
     mutuals: List[MutualUser] = []
 
 @app.get("/mutual", response_model=MutualsResponse)
-def get_mutual_followings(
+async def get_mutual_followings(
     user1: str = Query(..., description="First username"),
     user2: str = Query(..., description="Second username"),
     settings: Settings = Depends(get_settings),
@@ -158,9 +370,9 @@ def get_mutual_followings(
     user2 = normalize_username(user2)
     logger.info(f"GET /mutual - user1: {user1}, user2: {user2}")
     
-    client = APIClient(settings)
+    client = AsyncAPIClient(settings)
     try:
-        result = client.get_mutual_followings(user1, user2)
+        result = await client.get_mutual_followings(user1, user2)
         if result.get("status") != "success":
             detail = result.get("error") or result.get("msg") or "Unknown error fetching mutuals"
             logger.error(f"Mutual followings fetch failed for {user1} and {user2}: {detail}")
@@ -169,10 +381,13 @@ def get_mutual_followings(
         mutuals_count = len(result["data"].get("mutuals", []))
         logger.info(f"Successfully retrieved {mutuals_count} mutual followings for {user1} and {user2}")
         return MutualsResponse(status="success", mutuals=[MutualUser(**item) for item in result["data"].get("mutuals", [])])
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         error_detail = e.response.json().get("error", str(e))
         logger.error(f"HTTP error fetching mutuals for {user1} and {user2}: {error_detail}")
         raise HTTPException(status_code=e.response.status_code, detail=f"Mutuals fetch failed: {error_detail}")
+    except CircuitOpenError as e:
+        logger.warning(f"Network Sync API unavailable for {user1} and {user2}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error fetching mutuals for {user1} and {user2}: {e}")
         raise HTTPException(status_code=500, detail=f"Mutuals fetch failed: {str(e)}")
@@ -185,32 +400,131 @@ class SyncResponse(BaseModel):
     status: str
 
 @app.post("/sync", response_model=SyncResponse)
-def sync_user_followings(
+async def sync_user_followings(
     payload: SyncRequest,
     settings: Settings = Depends(get_settings),
 ):
-    client = APIClient(settings)
+    client = AsyncAPIClient(settings)
     username = normalize_username(payload.userName)
     logger.info(f"POST /sync - username: {username}")
     
     try:
-        result = client.sync_user_followings(username)
+        result = await client.sync_user_followings(username)
         status = result.get("status", "unknown")
         logger.info(f"Sync completed for user {username} with status: {status}")
+        if status == "success":
+            invalidate_user_results(username)
         return SyncResponse(status=status)
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         error_detail = e.response.json().get("error", str(e))
         logger.error(f"HTTP error during sync for user {username}: {error_detail}")
         raise HTTPException(status_code=e.response.status_code, detail=f"Sync failed: {error_detail}")
+    except CircuitOpenError as e:
+        logger.warning(f"Network Sync API unavailable for {username}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error during sync for user {username}: {e}")
         raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
     
 
 @app.get("/health")
-def health():
+async def health():
     """
     Simple health check endpoint for Docker and monitoring.
     Returns 200 if the service is up.
     """
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready(response: Response, settings: Settings = Depends(get_request_settings)):
+    """
+    Readiness probe: 200 once the default model and the embeddings of the
+    current categories are loaded, 503 until then. Unlike /health, route
+    traffic on this one.
+    """
+    warmup = warmup_state()
+    ready = is_ready(settings)
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else ("failed" if warmup.status == "failed" else "starting"),
+        "model": settings.model_name,
+        "warmup": warmup.as_dict(),
+    }
+
+
+class CategoriesRequest(BaseModel):
+    categories: List[str] = Field(..., min_length=1)
+
+class CategoriesResponse(BaseModel):
+    version: str
+    categories: List[str]
+    loaded_at: float
+    source: str
+    added: List[str] = []
+    removed: List[str] = []
+
+@app.get("/admin/categories", response_model=CategoriesResponse, dependencies=[Depends(require_admin)])
+def get_categories(settings: Settings = Depends(get_settings)):
+    """The category taxonomy new requests are served with."""
+    return CategoriesResponse(**get_taxonomy(settings).as_dict())
+
+@app.put("/admin/categories", response_model=CategoriesResponse, dependencies=[Depends(require_admin)])
+async def put_categories(payload: CategoriesRequest, settings: Settings = Depends(get_settings)):
+    """
+    Replaces the category taxonomy. Only added categories are encoded, and the
+    new list is swapped in once they are; requests already in flight finish
+    with the previous list.
+    """
+    logger.info(f"PUT /admin/categories - {len(payload.categories)} categories")
+    try:
+        taxonomy, added, removed = await run_inference(
+            settings, update_taxonomy, settings, payload.categories, source="admin"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return CategoriesResponse(**taxonomy.as_dict(), added=added, removed=removed)
+
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str, settings: Settings = Depends(get_settings)):
+    """A profile report saved by a request made with ?profile=true (its id is in the X-Profile-Id header)."""
+    report = load_profile(profile_id, settings.profile_dir)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return report
+
+
+@app.get("/stats")
+def stats(settings: Settings = Depends(get_settings)):
+    """
+    Runtime statistics for sizing shared resources: Neo4j pool usage,
+    resident models, the category taxonomy version, bio deduplication, the bio embedding cache, the result
+    cache, the micro-batch schedulers (queue depth, batch sizes, queueing
+    delay), the sharded encoder processes and per-stage inference latencies.
+    """
+    embedding_cache = get_embedding_cache(settings)
+    result_cache = get_result_cache(settings)
+    taxonomy = get_taxonomy(settings)
+    return {
+        "neo4j_pool": pool_stats(),
+        "models": get_model_registry(settings).stats(),
+        "categories": {"version": taxonomy.version, "count": len(taxonomy.categories), "source": taxonomy.source},
+        "bio_preprocessing": preprocessing_stats(),
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "inference_scheduler": scheduler_stats(),
+        "encoder_pool": encoder_pool_stats(),
+        "inference": inference_metrics(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics of this worker process: per-stage latency histograms of
+    interest inference, followings and bios encoded per inference, and the
+    micro-batch sizes and queueing delays.
+    """
+    return Response(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,23 +1,197 @@
+import asyncio
+import random
+import threading
+import time
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from .settings import Settings
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without calling the Network Sync API while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    A successful trial closes the circuit again; a failed one re-opens it.
+    Callers record one outcome per logical call, after its retries.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError if the call may not go through; returns whether it is the half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("Network Sync API circuit breaker is open")
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Ends a trial call that was abandoned (cancelled) without counting it either way."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Opening Network Sync API circuit breaker after {self._failures} failures")
+                self._opened_at = time.monotonic()
+
+
+_session: requests.Session | None = None
+_async_client: httpx.AsyncClient | None = None
+_breakers: dict[str, CircuitBreaker] = {}
+_http_lock = threading.Lock()
+
+
+def get_session(settings: Settings) -> requests.Session:
+    """
+    Returns the process-wide requests Session, whose connection pool keeps
+    connections to the Network Sync API alive between calls.
+    """
+    global _session
+    with _http_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.api_pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            logger.debug(f"Created shared HTTP session with pool size {settings.api_pool_size}")
+        return _session
+
+
+def get_async_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Returns the process-wide httpx AsyncClient used by the API. It must be
+    closed from the event loop with `close_async_http_client()`.
+    """
+    global _async_client
+    with _http_lock:
+        if _async_client is None:
+            _async_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.api_pool_size,
+                    max_keepalive_connections=settings.api_pool_size,
+                ),
+            )
+            logger.debug(f"Created shared async HTTP client with pool size {settings.api_pool_size}")
+        return _async_client
+
+
+async def close_async_http_client() -> None:
+    global _async_client
+    with _http_lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
+
+
+def get_circuit_breaker(settings: Settings) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker for the configured Network Sync API."""
+    with _http_lock:
+        breaker = _breakers.get(settings.network_sync_url)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                reset_timeout=settings.circuit_breaker_reset_timeout,
+            )
+            _breakers[settings.network_sync_url] = breaker
+        return breaker
+
+
 class APIClient:
     def __init__(self, settings: Settings):
         self.base_url = settings.network_sync_url
         self.timeout = settings.api_timeout
+        self.store_timeout = settings.api_store_timeout
+        self.mutual_timeout = settings.api_mutual_timeout
+        self.connect_timeout = settings.api_connect_timeout
+        self.max_retries = settings.api_max_retries
+        self.backoff_base = settings.api_backoff_base
+        self.backoff_max = settings.api_backoff_max
+        self.session = get_session(settings)
+        self.breaker = get_circuit_breaker(settings)
         logger.debug(f"Initialized APIClient with base_url: {self.base_url}, timeout: {self.timeout}")
 
+    def _request(self, method: str, url: str, timeout: float, idempotent: bool = False, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session and circuit breaker.
+        Idempotent calls are retried on connection errors, timeouts and 5xx
+        responses with jittered exponential backoff. The breaker counts the
+        call, retries included, as one success or failure.
+        """
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        attempt = 0
+        trial = self.breaker.before_call()
+        recorded = False
+        try:
+            while True:
+                try:
+                    res = self.session.request(method, url, timeout=(self.connect_timeout, timeout), **kwargs)
+                    if res.status_code >= 500:
+                        res.raise_for_status()
+                except Exception as e:
+                    attempt += 1
+                    retryable = isinstance(
+                        e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError)
+                    )
+                    if not retryable or attempt >= attempts:
+                        self.breaker.record_failure()
+                        recorded = True
+                        raise
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+                    logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.2f}s (attempt {attempt}/{attempts})")
+                    time.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                recorded = True
+                return res
+        finally:
+            if trial and not recorded:
+                self.breaker.release_trial()
+
     def sync_user_followings(self, userName):
         url = f"{self.base_url}/api/sync"
         payload = {"userName": userName}
         logger.info(f"Syncing followings for user: {userName}")
         logger.debug(f"Making POST request to {url} with payload: {payload}")
-        
+
         try:
-            res = requests.post(url, json=payload, timeout=self.timeout)
+            res = self._request("POST", url, timeout=self.timeout, json=payload)
             res.raise_for_status()
             result = res.json()
             logger.info(f"Successfully synced followings for user: {userName}")
@@ -32,15 +206,15 @@ class APIClient:
         except Exception as e:
             logger.error(f"Unexpected error while syncing followings for user {userName}: {e}")
             raise
-    
+
     def store_user_in_Neo4j(self, userName):
         url = f"{self.base_url}/api/user/store"
         payload = {"userName": userName}
         logger.info(f"Storing user in Neo4j: {userName}")
         logger.debug(f"Making POST request to {url} with payload: {payload}")
-        
+
         try:
-            res = requests.post(url, json=payload)
+            res = self._request("POST", url, timeout=self.store_timeout, json=payload)
             res.raise_for_status()
             result = res.json()
             logger.info(f"Successfully stored user in Neo4j: {userName}")
@@ -61,9 +235,9 @@ class APIClient:
         params = {"user1": user1, "user2": user2}
         logger.info(f"Getting mutual followings between {user1} and {user2}")
         logger.debug(f"Making GET request to {url} with params: {params}")
-        
+
         try:
-            res = requests.get(url, params=params, timeout=self.timeout)
+            res = self._request("GET", url, timeout=self.mutual_timeout, idempotent=True, params=params)
             res.raise_for_status()
             result = res.json()
             logger.info(f"Successfully retrieved mutual followings between {user1} and {user2}")
@@ -77,4 +251,102 @@ class APIClient:
             raise
         except Exception as e:
             logger.error(f"Unexpected error while getting mutual followings between {user1} and {user2}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+class AsyncAPIClient:
+    """
+    Async counterpart of APIClient, backed by the process-wide httpx client.
+    Shares the circuit breaker, timeouts and retry policy with APIClient and
+    raises httpx exceptions instead of requests ones.
+    """
+
+    def __init__(self, settings: Settings):
+        self.base_url = settings.network_sync_url
+        self.timeout = settings.api_timeout
+        self.store_timeout = settings.api_store_timeout
+        self.mutual_timeout = settings.api_mutual_timeout
+        self.connect_timeout = settings.api_connect_timeout
+        self.max_retries = settings.api_max_retries
+        self.backoff_base = settings.api_backoff_base
+        self.backoff_max = settings.api_backoff_max
+        self.client = get_async_http_client(settings)
+        self.breaker = get_circuit_breaker(settings)
+        logger.debug(f"Initialized AsyncAPIClient with base_url: {self.base_url}, timeout: {self.timeout}")
+
+    async def _request(self, method: str, url: str, timeout: float, idempotent: bool = False, **kwargs) -> httpx.Response:
+        """See `APIClient._request`."""
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        attempt = 0
+        trial = self.breaker.before_call()
+        recorded = False
+        try:
+            while True:
+                try:
+                    res = await self.client.request(
+                        method, url, timeout=httpx.Timeout(timeout, connect=self.connect_timeout), **kwargs
+                    )
+                    if res.status_code >= 500:
+                        res.raise_for_status()
+                except Exception as e:
+                    attempt += 1
+                    retryable = isinstance(e, (httpx.TransportError, httpx.HTTPStatusError))
+                    if not retryable or attempt >= attempts:
+                        self.breaker.record_failure()
+                        recorded = True
+                        raise
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+                    logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.2f}s (attempt {attempt}/{attempts})")
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                recorded = True
+                return res
+        finally:
+            # A cancelled call (client disconnect, wait_for timeout) must not keep the half-open trial slot
+            if trial and not recorded:
+                self.breaker.release_trial()
+
+    async def sync_user_followings(self, userName):
+        url = f"{self.base_url}/api/sync"
+        payload = {"userName": userName}
+        logger.info(f"Syncing followings for user: {userName}")
+
+        try:
+            res = await self._request("POST", url, timeout=self.timeout, json=payload)
+            res.raise_for_status()
+            result = res.json()
+            logger.info(f"Successfully synced followings for user: {userName}")
+            logger.debug(f"Sync response: {result}")
+            return result
+        except httpx.TimeoutException:
+            logger.error(f"Timeout while syncing followings for user: {userName}")
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error while syncing followings for user {userName}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error while syncing followings for user {userName}: {e}")
+            raise
+
+    async def get_mutual_followings(self, user1, user2):
+        url = f"{self.base_url}/api/mutual"
+        params = {"user1": user1, "user2": user2}
+        logger.info(f"Getting mutual followings between {user1} and {user2}")
+
+        try:
+            res = await self._request("GET", url, timeout=self.mutual_timeout, idempotent=True, params=params)
+            res.raise_for_status()
+            result = res.json()
+            logger.info(f"Successfully retrieved mutual followings between {user1} and {user2}")
+            logger.debug(f"Mutual followings response: {result}")
+            return result
+        except httpx.TimeoutException:
+            logger.error(f"Timeout while getting mutual followings between {user1} and {user2}")
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error while getting mutual followings between {user1} and {user2}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error while getting mutual followings between {user1} and {user2}: {e}")
+            raise
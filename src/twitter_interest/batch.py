@@ -0,0 +1,171 @@
+"""
+Bulk interest inference for the `analyze-batch` CLI command.
+
+Usernames are farmed out to worker processes, each of which loads the model
+once and keeps it for every user it handles. Results are streamed as JSON
+lines in completion order, and every finished username is appended to an
+optional checkpoint file so an interrupted run can be resumed.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from .settings import Settings
+from .logging_config import setup_logging, get_logger
+
+logger = get_logger(__name__)
+
+# Per-process state of a batch worker, set up by _init_worker
+_worker_settings: Settings | None = None
+_worker_force_sync = False
+
+
+def read_usernames(lines: Iterable[str]) -> Iterator[str]:
+    """Normalized, de-duplicated usernames; blank lines and '#' comments are skipped."""
+    seen: set[str] = set()
+    for line in lines:
+        username = line.strip().lstrip("@").lower()
+        if not username or username.startswith("#") or username in seen:
+            continue
+        seen.add(username)
+        yield username
+
+
+def load_checkpoint(path: Path | None) -> set[str]:
+    if path is None or not path.exists():
+        return set()
+    with path.open(encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _init_worker(model: str | None, force_sync: bool, log_level: str, workers: int) -> None:
+    global _worker_settings, _worker_force_sync
+    settings = Settings()
+    if model:
+        settings.model_name = model
+    setup_logging(
+        level=log_level,
+        log_file=settings.log_file,
+        enable_file_logging=settings.enable_file_logging,
+        enable_rotation=settings.enable_log_rotation,
+        max_file_size=settings.max_log_file_size,
+        retention=settings.log_retention,
+        console=sys.stderr,
+    )
+    # Each worker gets its share of the cores; torch would otherwise use all of them in every worker
+    from .serving import configure_worker
+    configure_worker(workers)
+    # Load the model up front; the model registry keeps it for the life of the process
+    from .interest_extractor import InterestExtractor
+    InterestExtractor(settings)
+    _worker_settings = settings
+    _worker_force_sync = force_sync
+    logger.info(f"Batch worker {os.getpid()} ready with model {settings.model_name}")
+
+
+def _analyze_user(username: str) -> dict:
+    """Runs in a worker process; never raises, so one bad user can't stop the batch."""
+    from .service import infer_interests
+
+    settings = _worker_settings
+    start = time.perf_counter()
+    record: dict = {"username": username, "model": settings.model_name}
+    try:
+        interests = infer_interests(username, settings, force_sync=_worker_force_sync)
+        if settings.return_scores:
+            record["interests"] = [{"interest": interest, "score": score} for interest, score in interests]
+        else:
+            record["interests"] = interests
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+@dataclass
+class BatchSummary:
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def users_per_second(self) -> float:
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def run_batch(
+    usernames: Iterable[str],
+    out: IO[str],
+    workers: int,
+    checkpoint: Path | None = None,
+    model: str | None = None,
+    force_sync: bool = False,
+    log_level: str = "INFO",
+) -> BatchSummary:
+    """
+    Analyzes `usernames` on `workers` processes, writing one JSON line per user
+    to `out` as soon as it finishes. Users listed in `checkpoint` are skipped,
+    and each finished user is appended to it after its line has been written.
+    """
+    summary = BatchSummary()
+    done = load_checkpoint(checkpoint)
+    start = time.perf_counter()
+
+    def todo() -> Iterator[str]:
+        for username in usernames:
+            if username in done:
+                summary.skipped += 1
+            else:
+                yield username
+
+    checkpoint_file = checkpoint.open("a", encoding="utf-8") if checkpoint is not None else None
+    # Spawned workers don't inherit torch/driver state from the parent, and the
+    # bound on in-flight users keeps memory flat however long the input is
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model, force_sync, log_level, workers),
+        ) as pool:
+            pending: set[Future] = set()
+            queue = todo()
+            while True:
+                for username in queue:
+                    pending.add(pool.submit(_analyze_user, username))
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    if checkpoint_file is not None:
+                        checkpoint_file.write(record["username"] + "\n")
+                        checkpoint_file.flush()
+                    summary.processed += 1
+                    if record["status"] != "ok":
+                        summary.failed += 1
+                        logger.warning(f"Failed to analyze @{record['username']}: {record['error']}")
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+        summary.elapsed_seconds = time.perf_counter() - start
+
+    logger.info(
+        f"Batch finished: {summary.processed} users ({summary.failed} failed, {summary.skipped} skipped) "
+        f"in {summary.elapsed_seconds:.1f}s, {summary.users_per_second:.2f} users/sec"
+    )
+    return summary
@@ -1,5 +1,9 @@
 from .settings import Settings
 from .logging_config import setup_logging, get_logger
+from pathlib import Path
+from typing import Optional
+import os
+import sys
 import time
 import typer
 
@@ -9,75 +13,98 @@ app = typer.Typer(
     help="Twitter Interest Inference - Analyze a Twitter user's interests."
 )
 
-def _run(userName: str, settings: Settings):
+def _run(userName: str, settings: Settings, force_sync: bool = False):
     from .api_client import APIClient
     from .neo4j_client import Neo4jClient
     from .interest_extractor import InterestExtractor
     from .aggregation import InterestAggregator
+    from .service import (
+        prefetch, iter_following_pages, extract_interests_paged, ensure_synced, infer_stored_interests,
+        StageTimings, DATA_SOURCE_FRESH,
+    )
+    from .preprocessing import preprocessing_stats
 
     user = userName.lower()
     logger.info(f"Starting analysis for user: @{user}")
 
+    timings = StageTimings()
     start_total = time.perf_counter()
 
-    # 1) Sync
-    sync_start = time.perf_counter()
+    # 1) Sync, unless the user was synced within SYNC_TTL_SECONDS
     logger.info("Starting user followings sync...")
     api = APIClient(settings)
+    neo4j = Neo4jClient(settings)
     try:
-        api.sync_user_followings(user)
-        sync_end = time.perf_counter()
-        logger.info(f"Sync completed in {sync_end - sync_start:.2f} seconds")
-        typer.echo(f"Sync completed in {sync_end - sync_start:.2f} seconds")
+        with timings.stage("sync"):
+            sync_status = ensure_synced(api, neo4j, user, settings, force_sync=force_sync)
+        if sync_status.data_source == DATA_SOURCE_FRESH:
+            logger.info(f"Sync completed in {timings.seconds['sync']:.2f} seconds")
+            typer.echo(f"Sync completed in {timings.seconds['sync']:.2f} seconds")
+        elif sync_status.result is not None:
+            # The sync service answered but didn't update the graph
+            typer.secho(
+                f"Sync failed ({sync_status.result}); using graph data from the previous sync",
+                fg=typer.colors.YELLOW,
+            )
+        else:
+            age = time.time() - sync_status.synced_at
+            logger.info(f"Using cached graph data synced {age:.0f} seconds ago")
+            typer.echo(f"Using cached graph data synced {age:.0f} seconds ago (use --force-sync to re-sync)")
     except Exception as e:
         logger.error(f"Failed to sync user followings: {e}")
         typer.secho(f"Error: Failed to sync user followings: {e}", fg=typer.colors.RED)
         raise typer.Exit(1)
 
     # 2) fetch and extract
-    logger.info("Fetching followings and bios from Neo4j...")
-    typer.echo("Fetching followings and bios from Neo4j…")
-    fetch_start = time.perf_counter()
-    neo4j = Neo4jClient(settings)
     try:
-        followings = neo4j.get_followings_with_bios(user)
-        logger.info(f"Fetched {len(followings)} followings from Neo4j")
-        typer.echo(f"{len(followings)} followings fetched")
-
-        fetch_end = time.perf_counter()
-        logger.debug(f"Data fetch took {fetch_end - fetch_start:.2f} seconds")
-        typer.echo(f"Data fetch took {fetch_end - fetch_start:.2f} seconds")
-
-        extract_start = time.perf_counter()
-        extractor = InterestExtractor(settings)
-        user_bio = neo4j.get_user_bio(user)
-        logger.debug(f"User bio: {user_bio[:100]}..." if user_bio else "No user bio found")
-        
-        user_interests = extractor.extract_interest_from_bio(user_bio)
-        logger.debug(f"Extracted user interests: {user_interests}")
-
-        followings_interests = [
-            extractor.extract_interest_from_bio(f["bio"]) for f in followings
-        ]
-        logger.info(f"Extracted interests using model {settings.model_name}")
-        typer.echo(f"Extracted interests using model {settings.model_name}")
-        extract_end = time.perf_counter()
-        logger.debug(f"Interest extraction for user and all followings took {extract_end - extract_start:.2f} seconds")
-        typer.echo(
-            f"Interest extraction for user and all followings took {extract_end - extract_start:.2f} seconds"
-        )
+        if settings.interest_store_enabled:
+            typer.echo("Refreshing stale stored interests and counting followings' interests in Neo4j…")
+            top_interests = infer_stored_interests(neo4j, user, settings, timings)
+            typer.echo(f"{timings.followings} followings counted, {timings.bios_encoded} stored interests recomputed")
+            logger.info(f"Analysis completed for @{user} from stored interests. Top interests: {top_interests}")
+            typer.secho(f"Top interests for @{user}: {top_interests}", fg=typer.colors.GREEN)
+        else:
+            logger.info("Fetching followings and bios from Neo4j...")
+            typer.echo("Fetching followings and bios from Neo4j…")
+            with timings.stage("fetch"):
+                profile = neo4j.get_user_with_followings(user, limit=settings.followings_page_size)
+            if profile is None:
+                raise ValueError(f"User @{user} not found in Neo4j")
+            user_bio = profile["bio"]
+            logger.info(f"Fetched first {len(profile['followings'])} followings from Neo4j")
 
-        agg_start = time.perf_counter()
-        aggregator = InterestAggregator(settings)
-        top_interests = aggregator.aggregate(user_interests, followings_interests)
-        agg_end = time.perf_counter()
-        logger.debug(f"Aggregation completed in {agg_end - agg_start:.2f} seconds")
-        typer.echo(f"Aggregation completed in {agg_end - agg_start:.2f} seconds")
+            logger.debug(f"Data fetch took {timings.seconds['fetch']:.2f} seconds")
+            typer.echo(f"Data fetch took {timings.seconds['fetch']:.2f} seconds")
 
-        logger.info(f"Analysis completed for @{user}. Top interests: {top_interests}")
-        typer.secho(
-            f"Top interests for @{user}: {top_interests}", fg=typer.colors.GREEN
-        )
+            # Remaining pages are fetched while earlier pages are being encoded
+            with timings.stage("model"):
+                extractor = InterestExtractor(settings)
+            logger.debug(f"User bio: {user_bio[:100]}..." if user_bio else "No user bio found")
+
+            pages = prefetch(iter_following_pages(neo4j, user, profile["followings"], settings.followings_page_size))
+            user_indices, followings_indices = extract_interests_paged(extractor, user, user_bio, pages, timings)
+            timings.followings, timings.bios_encoded = len(followings_indices), extractor.bios_encoded
+            logger.debug(f"Extracted user interests: {[extractor.categories[i] for i in user_indices if i >= 0]}")
+            logger.info(f"Fetched {len(followings_indices)} followings from Neo4j")
+            typer.echo(f"{len(followings_indices)} followings fetched")
+
+            logger.info(f"Extracted interests using model {settings.model_name}")
+            typer.echo(f"Extracted interests using model {settings.model_name}")
+            dedupe = preprocessing_stats()
+            logger.info(f"Bio preprocessing: {dedupe}")
+            typer.echo(
+                f"Bio preprocessing: {dedupe['bios']} bios, {dedupe['empty']} empty, "
+                f"{dedupe['duplicates']} duplicates, {dedupe['encoded']} encoded"
+            )
+
+            with timings.stage("aggregate"):
+                aggregator = InterestAggregator(settings)
+                top_interests = aggregator.aggregate_indices(user_indices, followings_indices, extractor.categories)
+
+            logger.info(f"Analysis completed for @{user}. Top interests: {top_interests}")
+            typer.secho(
+                f"Top interests for @{user}: {top_interests}", fg=typer.colors.GREEN
+            )
     except Exception as e:
         logger.error(f"Error during analysis: {e}")
         typer.secho(f"Error: Analysis failed: {e}", fg=typer.colors.RED)
@@ -85,9 +112,32 @@ def _run(userName: str, settings: Settings):
     finally:
         neo4j.close()
 
-    end_total = time.perf_counter()
-    logger.info(f"Total execution time: {end_total - start_total:.2f} seconds")
-    typer.echo(f"Total execution time: {end_total - start_total:.2f} seconds")
+    timings.add("total", time.perf_counter() - start_total)
+    timings.record()
+    logger.info(f"Stage timings for @{user}: {timings.server_timing()}")
+    typer.echo(f"Stage timings ({timings.bios_encoded} bios through the model):")
+    for stage, seconds in timings.seconds.items():
+        share = seconds / timings.seconds["total"] * 100 if timings.seconds["total"] else 0.0
+        typer.echo(f"  {stage:<9} {seconds:8.2f} s  ({share:5.1f}%)")
+    return timings
+
+
+def _run_profiled(userName: str, settings: Settings, force_sync: bool = False):
+    """`_run` under the sampling profiler and tracemalloc; the report is printed and saved to PROFILE_DIR."""
+    from .profiling import format_profile, profiled, save_profile
+
+    session = timings = None
+    try:
+        with profiled(f"analyze {userName}", settings.profile_sample_interval_ms / 1000) as session:
+            timings = _run(userName, settings, force_sync=force_sync)
+    finally:
+        # Failed runs are saved too; they are often the ones worth profiling. There is
+        # nothing to save when the profiler itself failed to start or to finish its report.
+        if session is not None and session.report:
+            session.report["stage_seconds"] = timings.seconds if timings is not None else None
+            path = save_profile(session, settings.profile_dir)
+            typer.echo(format_profile(session.report))
+            typer.echo(f"Profile saved to {path} (stacks for flamegraph.pl/speedscope in {path.with_suffix('.folded')})")
 
 
 @app.command("analyze")
@@ -105,6 +155,16 @@ def analyze(
         "-v",
         help="Enable verbose logging (DEBUG level)",
     ),
+    force_sync: bool = typer.Option(
+        False,
+        "--force-sync",
+        help="Re-sync followings even if they were synced recently",
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Profile the run (sampled stacks and allocations) and save the report to PROFILE_DIR",
+    ),
 ):
     """
     Analyze a Twitter user's followings and infer their top interests.
@@ -126,7 +186,175 @@ def analyze(
         settings.model_name = model
         logger.info(f"Using model override: {model}")
     
-    _run(user_name, settings)
+    from .neo4j_client import close_driver
+    try:
+        if profile:
+            _run_profiled(user_name, settings, force_sync=force_sync)
+        else:
+            _run(user_name, settings, force_sync=force_sync)
+    finally:
+        close_driver()
+
+
+@app.command("analyze-batch")
+def analyze_batch(
+    input_file: Optional[Path] = typer.Argument(
+        None,
+        help="File with one username per line; reads stdin if omitted or '-'",
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write JSON lines to this file instead of stdout",
+    ),
+    workers: int = typer.Option(
+        max(1, (os.cpu_count() or 2) // 2),
+        "--workers",
+        "-w",
+        min=1,
+        help="Worker processes; each loads the model once",
+    ),
+    checkpoint: Optional[Path] = typer.Option(
+        None,
+        "--checkpoint",
+        "-c",
+        help="Skip users listed in this file and append each finished user to it, to resume after a crash",
+    ),
+    model: str = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="Override the model name (defaults to what's in Settings)",
+    ),
+    verbose: bool = typer.Option(
+        False,
+        "--verbose",
+        "-v",
+        help="Enable verbose logging (DEBUG level)",
+    ),
+    force_sync: bool = typer.Option(
+        False,
+        "--force-sync",
+        help="Re-sync followings even if they were synced recently",
+    ),
+):
+    """
+    Infer interests for many users, streaming one JSON line per user as each finishes.
+    """
+    from .batch import read_usernames, run_batch
+
+    settings = Settings()
+    log_level = "DEBUG" if verbose else settings.log_level
+    # Logs go to stderr so stdout carries only the JSON lines
+    setup_logging(
+        level=log_level,
+        log_file=settings.log_file,
+        enable_file_logging=settings.enable_file_logging,
+        enable_rotation=settings.enable_log_rotation,
+        max_file_size=settings.max_log_file_size,
+        retention=settings.log_retention,
+        console=sys.stderr,
+    )
+
+    source = sys.stdin if input_file is None or str(input_file) == "-" else input_file.open(encoding="utf-8")
+    # Resumed runs append, so lines written before the crash are kept
+    mode = "a" if checkpoint is not None and checkpoint.exists() else "w"
+    out = output.open(mode, encoding="utf-8") if output is not None else sys.stdout
+    try:
+        summary = run_batch(
+            read_usernames(source),
+            out,
+            workers=workers,
+            checkpoint=checkpoint,
+            model=model,
+            force_sync=force_sync,
+            log_level=log_level,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    typer.echo(
+        f"Analyzed {summary.processed} users ({summary.failed} failed, {summary.skipped} skipped from checkpoint) "
+        f"in {summary.elapsed_seconds:.2f} seconds ({summary.users_per_second:.2f} users/sec)",
+        err=True,
+    )
+    if summary.failed:
+        raise typer.Exit(1)
+
+
+@app.command("precompute")
+def precompute(
+    chunk_size: int = typer.Option(
+        1000,
+        "--chunk-size",
+        min=1,
+        help="Users fetched, encoded and written per chunk",
+    ),
+    checkpoint: Optional[Path] = typer.Option(
+        None,
+        "--checkpoint",
+        "-c",
+        help="Save progress to this file after every chunk and resume from it",
+    ),
+    threads: Optional[int] = typer.Option(
+        None,
+        "--threads",
+        min=1,
+        help="Threads used for encoding (defaults to all cores)",
+    ),
+    full: bool = typer.Option(
+        False,
+        "--full",
+        help="Recompute every user, not just those whose bio, model or settings changed",
+    ),
+    model: str = typer.Option(
+        None,
+        "--model",
+        "-m",
+        help="Override the model name (defaults to what's in Settings)",
+    ),
+    verbose: bool = typer.Option(
+        False,
+        "--verbose",
+        "-v",
+        help="Enable verbose logging (DEBUG level)",
+    ),
+):
+    """
+    Precompute and store interests for every user in the graph.
+    """
+    from .precompute import precompute_interests
+    from .neo4j_client import close_driver
+
+    settings = Settings()
+    setup_logging(
+        level="DEBUG" if verbose else settings.log_level,
+        log_file=settings.log_file,
+        enable_file_logging=settings.enable_file_logging,
+        enable_rotation=settings.enable_log_rotation,
+        max_file_size=settings.max_log_file_size,
+        retention=settings.log_retention
+    )
+    if model:
+        settings.model_name = model
+        logger.info(f"Using model override: {model}")
+
+    try:
+        report = precompute_interests(settings, chunk_size, checkpoint=checkpoint, threads=threads, full=full)
+    finally:
+        close_driver()
+
+    typer.echo(
+        f"Scanned {report.scanned} users in {report.chunks} chunks, recomputed {report.recomputed}, "
+        f"in {report.elapsed_seconds:.2f} seconds ({report.users_per_second:.1f} users/sec)"
+    )
+    for stage, seconds in report.stage_seconds.items():
+        share = seconds / report.elapsed_seconds * 100 if report.elapsed_seconds else 0.0
+        typer.echo(f"  {stage:<7} {seconds:8.2f} s  ({share:5.1f}%)")
 
 
 def main():
@@ -0,0 +1,271 @@
+"""
+Persistent, content-addressed cache of bio embeddings.
+
+Embeddings are keyed by (model key, sha256 of the normalized bio), where the
+model key names the model and the token length bios were truncated to (see
+`model_key`), and kept in two tiers: a per-process in-memory LRU, and an on-disk SQLite database opened in
+WAL mode with memory-mapped reads. SQLite's file locking makes the disk tier
+safe to share between worker processes on one host, and it survives restarts.
+
+The disk tier's row count is kept in a one-row table by triggers, so checking
+it against max_entries after a write doesn't scan the table. Lookups from
+either tier queue an access-time update for the key; queued updates are
+written in one transaction with the next write, or once _TOUCH_BATCH_SIZE
+have built up, so eviction follows recent use without a write per read.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from .settings import Settings
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK_SIZE = 500
+_TOUCH_BATCH_SIZE = 1000
+
+
+def normalize_bio(bio: str) -> str:
+    """Collapses whitespace so bios that differ only in spacing share a cache entry."""
+    return " ".join(bio.split())
+
+
+def bio_hash(bio: str) -> str:
+    return hashlib.sha256(normalize_bio(bio).encode("utf-8")).hexdigest()
+
+
+def model_key(model_name: str, max_seq_length: int | None) -> str:
+    """Cache key of a model variant: the same bio embeds differently under another truncation length."""
+    return f"{model_name}@{max_seq_length}"
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int = 500_000,
+        memory_entries: int = 50_000,
+        mmap_size: int = 256 * 2**20,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.mmap_size = mmap_size
+
+        self._memory: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        # (model, bio_hash) -> last access not yet written to the disk tier
+        self._touched: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " bio_hash TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " PRIMARY KEY (model, bio_hash)"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+            # Concurrent processes opening the same cache initialize the counter once
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings_count ("
+                    " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                    " rows INTEGER NOT NULL"
+                    ")"
+                )
+                # Caches created before the counter existed are counted once here
+                conn.execute("INSERT OR IGNORE INTO embeddings_count VALUES (0, (SELECT count(*) FROM embeddings))")
+                conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS embeddings_count_insert AFTER INSERT ON embeddings"
+                    " BEGIN UPDATE embeddings_count SET rows = rows + 1; END"
+                )
+                conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS embeddings_count_delete AFTER DELETE ON embeddings"
+                    " BEGIN UPDATE embeddings_count SET rows = rows - 1; END"
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        logger.debug(f"Initialized EmbeddingCache at {self.path} (max_entries={max_entries}, memory_entries={memory_entries})")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model_name: str, bios: list[str]) -> list[np.ndarray | None]:
+        """Returns the cached embedding for each bio, or None where it isn't cached."""
+        hashes = [bio_hash(bio) for bio in bios]
+        results: list[np.ndarray | None] = [None] * len(bios)
+        missing: dict[str, list[int]] = {}
+        now = time.time()
+
+        with self._lock:
+            for i, h in enumerate(hashes):
+                vector = self._memory.get((model_name, h))
+                if vector is not None:
+                    self._memory.move_to_end((model_name, h))
+                    self._touched[(model_name, h)] = now
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(h, []).append(i)
+
+        if missing:
+            found = self._read_disk(model_name, list(missing))
+            with self._lock:
+                for h, vector in found.items():
+                    self._remember(model_name, h, vector)
+                    self._touched[(model_name, h)] = now
+                    for i in missing[h]:
+                        results[i] = vector
+                    self.disk_hits += len(missing[h])
+                self.misses += sum(len(missing[h]) for h in missing if h not in found)
+
+        with self._lock:
+            flush = len(self._touched) >= _TOUCH_BATCH_SIZE
+        if flush:
+            self._write_disk([])
+        return results
+
+    def put_many(self, model_name: str, bios: list[str], embeddings: np.ndarray) -> None:
+        rows = []
+        now = time.time()
+        with self._lock:
+            for bio, vector in zip(bios, embeddings):
+                vector = np.asarray(vector, dtype=np.float32)
+                h = bio_hash(bio)
+                self._remember(model_name, h, vector)
+                rows.append((model_name, h, vector.tobytes(), now))
+
+        if rows:
+            self._write_disk(rows)
+
+    def _write_disk(self, rows: list[tuple]) -> None:
+        """
+        Inserts `rows` and the queued access times in one transaction, then
+        evicts if the disk tier went over max_entries.
+        """
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An embedding is determined by its key, so existing rows only need their access time
+                conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+                touched.update({(model, h): now for model, h, _, now in rows})
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND bio_hash = ?",
+                    [(now, model, h) for (model, h), now in touched.items()],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if rows:
+                self._evict_disk(conn)
+        except sqlite3.Error as e:
+            # The disk tier is an optimization; never fail a request because of it
+            logger.warning(f"Failed to write {len(rows)} embeddings to cache {self.path}: {e}")
+
+    def _read_disk(self, model_name: str, hashes: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        try:
+            conn = self._connection()
+            for start in range(0, len(hashes), _QUERY_CHUNK_SIZE):
+                chunk = hashes[start:start + _QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT bio_hash, vector FROM embeddings WHERE model = ? AND bio_hash IN ({placeholders})",
+                    [model_name, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read embeddings from cache {self.path}: {e}")
+        return found
+
+    def _remember(self, model_name: str, h: str, vector: np.ndarray) -> None:
+        self._memory[(model_name, h)] = vector
+        self._memory.move_to_end((model_name, h))
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, conn: sqlite3.Connection) -> None:
+        """Deletes the least recently accessed rows once the disk tier exceeds max_entries."""
+        (count,) = conn.execute("SELECT rows FROM embeddings_count").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM embeddings WHERE (model, bio_hash) IN ("
+            " SELECT model, bio_hash FROM embeddings ORDER BY last_access LIMIT ?"
+            ")",
+            (excess,),
+        )
+        with self._lock:
+            self.evictions += excess
+        logger.debug(f"Evicted {excess} embeddings from cache {self.path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "path": str(self.path),
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+_caches: dict[Path, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(settings: Settings) -> EmbeddingCache | None:
+    """
+    Returns the process-wide EmbeddingCache for the configured directory,
+    or None when the cache is disabled.
+    """
+    if not settings.embedding_cache_enabled:
+        return None
+    path = Path(settings.embedding_cache_dir) / "embeddings.sqlite3"
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = EmbeddingCache(
+                path,
+                max_entries=settings.embedding_cache_max_entries,
+                memory_entries=settings.embedding_cache_memory_entries,
+            )
+            _caches[path] = cache
+        return cache
@@ -0,0 +1,180 @@
+"""
+Multi-process sharded encoding for large bio lists.
+
+One encode call only keeps part of a many-core node busy, so with
+ENCODE_PROCESSES > 0 inputs of at least ENCODE_PROCESSES_MIN_BIOS bios are
+split into one contiguous shard per worker process. Each worker has the model
+loaded once and writes its rows straight into a shared-memory float32 array
+allocated by the caller, so no embeddings are pickled back. Smaller inputs are
+cheaper to encode in-process; see benchmarks/bench_sharded_encoding.py for the
+crossover point on a given machine.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .settings import Settings
+from .model_registry import ModelRegistry, get_model_registry
+from .encoding import encode_length_bucketed
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# The model of a pool worker process, set up by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, max_seq_length: int | None, threads: int) -> None:
+    # Only what loading the model needs is sent over; the Settings (and their secrets) stay in the parent
+    global _worker_model
+    import torch
+
+    torch.set_num_threads(threads)
+    # A worker holds a single model, so its registry needs no memory cap
+    _worker_model = ModelRegistry(max_bytes=sys.maxsize, max_seq_length=max_seq_length).get_model(model_name)
+
+
+def _worker_dimension() -> int:
+    return _worker_model.get_sentence_embedding_dimension()
+
+
+def _encode_shard(shm_name: str, shape: tuple[int, int], start: int, texts: list[str], batch_size: int) -> int:
+    """Runs in a worker process: encodes `texts` into rows start.. of the shared output."""
+    # Spawned workers share the caller's resource tracker, so attaching here doesn't take ownership
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[start:start + len(texts)] = encode_length_bucketed(_worker_model, texts, batch_size)
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class EncoderPool:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.processes = settings.encode_processes
+        self.threads_per_process = max(1, (os.cpu_count() or 1) // self.processes)
+        # Read from the model if it is already loaded here, otherwise from a worker on first use;
+        # the parent doesn't load a model only to learn its size
+        registry = get_model_registry(settings)
+        self.dim: int | None = None
+        if registry.is_resident(settings.model_name):
+            self.dim = registry.get_model(settings.model_name).get_sentence_embedding_dimension()
+        self._lock = threading.Lock()
+        self._pool = self._start()
+
+        self.calls = 0
+        self.bios = 0
+
+    def _start(self) -> ProcessPoolExecutor:
+        logger.info(
+            f"Starting {self.processes} encoder processes for {self.settings.model_name} "
+            f"({self.threads_per_process} threads each)"
+        )
+        # Spawned workers don't inherit torch or driver state from this process
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.settings.model_name, self.settings.bio_max_seq_length, self.threads_per_process),
+        )
+
+    def _dimension(self, pool: ProcessPoolExecutor) -> int:
+        if self.dim is None:
+            self.dim = pool.submit(_worker_dimension).result()
+        return self.dim
+
+    def encode(self, bios: list[str], batch_size: int) -> np.ndarray:
+        """Encodes `bios` across the worker processes; returns (len(bios), dim) float32 rows in order."""
+        with self._lock:
+            pool = self._pool
+        try:
+            embeddings = self._encode(pool, bios, batch_size)
+        except BrokenProcessPool:
+            logger.error("An encoder process died; restarting the encoder pool")
+            self._restart(pool)
+            raise
+        with self._lock:
+            self.calls += 1
+            self.bios += len(bios)
+        return embeddings
+
+    def _encode(self, pool: ProcessPoolExecutor, bios: list[str], batch_size: int) -> np.ndarray:
+        shape = (len(bios), self._dimension(pool))
+        shm = SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
+        try:
+            bounds = np.linspace(0, len(bios), self.processes + 1, dtype=np.int64)
+            futures = [
+                pool.submit(_encode_shard, shm.name, shape, int(start), bios[start:end], batch_size)
+                for start, end in zip(bounds[:-1], bounds[1:])
+                if end > start
+            ]
+            for future in futures:
+                future.result()
+            out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            embeddings = out.copy()
+            del out
+            return embeddings
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is broken:
+                self._pool = self._start()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "processes": self.processes,
+            "threads_per_process": self.threads_per_process,
+            "min_bios": self.settings.encode_processes_min_bios,
+            "calls": self.calls,
+            "bios": self.bios,
+        }
+
+
+_pools: dict[str, EncoderPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_encoder_pool(settings: Settings) -> EncoderPool | None:
+    """
+    Returns the process-wide encoder pool for `settings.model_name`, or None
+    when ENCODE_PROCESSES is 0. Worker processes are started on first use.
+    """
+    if settings.encode_processes == 0:
+        return None
+    with _pools_lock:
+        pool = _pools.get(settings.model_name)
+        if pool is None:
+            pool = EncoderPool(settings)
+            _pools[settings.model_name] = pool
+        return pool
+
+
+def encoder_pool_stats() -> dict:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {model_name: pool.stats() for model_name, pool in pools.items()}
+
+
+def shutdown_encoder_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -0,0 +1,50 @@
+"""
+Length-bucketed bio encoding.
+
+A transformer pads every sequence in a batch to the longest one, and bios
+range from a couple of tokens to well over a hundred once emoji and URLs are
+tokenized. Bios are therefore sorted by token count and sent through the
+model in batches of neighbours of similar length, then put back in their
+original order.
+"""
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+def token_lengths(model: "SentenceTransformer", texts: list[str]) -> np.ndarray:
+    """Token count of each text, special tokens included, after truncation to the model's max_seq_length."""
+    input_ids = model.tokenizer(
+        texts, add_special_tokens=True, truncation=True, max_length=model.max_seq_length
+    )["input_ids"]
+    return np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(texts))
+
+
+def length_sorted_batches(lengths: np.ndarray, batch_size: int) -> list[np.ndarray]:
+    """Splits positions into batches of similar length, longest first so memory peaks early."""
+    order = np.argsort(-lengths, kind="stable")
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def encode_length_bucketed(model: "SentenceTransformer", texts: list[str], batch_size: int) -> np.ndarray:
+    """
+    Encodes `texts` into normalized float32 embeddings in their original order,
+    running the model on one length bucket at a time.
+    """
+    embeddings = None
+    for batch in length_sorted_batches(token_lengths(model, texts), batch_size):
+        encoded = model.encode(
+            [texts[i] for i in batch],
+            batch_size=len(batch),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[batch] = encoded
+    if embeddings is None:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    return embeddings
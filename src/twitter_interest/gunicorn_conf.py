@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration for preload-before-fork serving (see `serving`):
+
+    gunicorn -c python:twitter_interest.gunicorn_conf twitter_interest.api:app
+
+Workers are uvicorn workers, so the app, its lifespan and /ready behave as
+under uvicorn. SERVE_WORKERS and SERVE_BIND set the worker count and address.
+SERVE_WORKERS defaults to 1: the result cache, taxonomy swaps through the
+admin API and /metrics are per process and not shared between workers.
+"""
+from twitter_interest.settings import Settings
+from twitter_interest.serving import configure_worker, preload_for_fork
+
+_settings = Settings()
+
+bind = _settings.serve_bind
+workers = _settings.serve_workers
+worker_class = "uvicorn.workers.UvicornWorker"
+# Import the app in the master, so the workers are forked from a process that already has it
+preload_app = True
+
+
+def when_ready(server):
+    preload_for_fork(_settings)
+
+
+def post_fork(server, worker):
+    configure_worker(workers)
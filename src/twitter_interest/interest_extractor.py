@@ -1,6 +1,11 @@
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
 from .settings import Settings
+from .model_registry import get_model_registry
+from .embedding_cache import get_embedding_cache, model_key
+from .scheduler import get_inference_scheduler
+from .encoder_pool import get_encoder_pool
+from .encoding import encode_length_bucketed
+from .preprocessing import normalize_bio_text, preprocess_bios
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -11,18 +16,27 @@ class InterestExtractor:
         self.settings = settings
         logger.info(f"Initializing InterestExtractor with model: {settings.model_name}")
         logger.debug(f"Available categories: {settings.categories}")
-        
+
+        # Models and category embeddings are loaded once per process and shared
+        registry = get_model_registry(settings)
         try:
-            self.model = SentenceTransformer(settings.model_name)
-            logger.info(f"Successfully loaded SentenceTransformer model: {settings.model_name}")
+            self.model = registry.get_model(settings.model_name)
+            logger.debug(f"Using SentenceTransformer model from registry: {settings.model_name}")
         except Exception as e:
             logger.error(f"Failed to load SentenceTransformer model {settings.model_name}: {e}")
             raise
             
         self.categories = settings.categories
-        logger.debug("Encoding category embeddings...")
-        self.category_embeddings = self.model.encode(self.categories, normalize_embeddings=True)
-        logger.debug(f"Encoded {len(self.categories)} category embeddings")
+        self.category_embeddings = registry.get_category_embeddings(settings.model_name, self.categories)
+        logger.debug(f"Using {len(self.categories)} category embeddings")
+
+        self.embedding_cache = get_embedding_cache(settings)
+        # Cached embeddings are only reused under the truncation length they were computed with
+        self.embedding_cache_key = model_key(settings.model_name, self.model.max_seq_length)
+        self.scheduler = get_inference_scheduler(settings)
+        self.encoder_pool = get_encoder_pool(settings)
+        # Bios this extractor sent through the model, after deduplication and the embedding cache
+        self.bios_encoded = 0
 
     def extract_interest_from_bio(
         self, 
@@ -36,13 +50,15 @@ class InterestExtractor:
 
         logger.debug(f"Extracting interests from bio: '{bio[:100]}...' with top_n={top_n}, threshold={similarity_threshold}")
 
-        if not bio.strip():
+        text = normalize_bio_text(bio)
+        if not text:
             logger.debug("Empty bio provided, returning empty interests list")
             return []
         
         try:
-            bio_embedding = self.model.encode([bio], normalize_embeddings=True)[0]
-            similarities = util.cos_sim(bio_embedding, self.category_embeddings)[0].cpu().numpy()
+            bio_embedding = self.encode_bios([text])[0]
+            # Embeddings are normalized, so the dot product is the cosine similarity
+            similarities = self.category_embeddings @ bio_embedding
             sorted_indices = np.argsort(similarities)[::-1]
             
             interests = []
@@ -60,3 +76,129 @@ class InterestExtractor:
         except Exception as e:
             logger.error(f"[{username}] Error extracting interests from bio: {e}")
             raise
+
+    def encode_bios(self, bios: list[str], batch_size: int | None = None) -> np.ndarray:
+        """
+        Encodes bios into normalized embeddings, in mini-batches of `batch_size`
+        bios of similar token length.
+        Bios found in the embedding cache are not sent through the model again.
+        Returns a float32 array of shape (len(bios), embedding_dim).
+        """
+        batch_size = batch_size or self.settings.encode_batch_size
+        logger.debug(f"Encoding {len(bios)} bios with batch_size={batch_size}")
+
+        if not bios:
+            return np.empty((0, self.category_embeddings.shape[1]), dtype=np.float32)
+
+        if self.embedding_cache is None:
+            return self._encode(bios, batch_size)
+
+        cached = self.embedding_cache.get_many(self.embedding_cache_key, bios)
+        misses = [i for i, vector in enumerate(cached) if vector is None]
+        logger.debug(f"Embedding cache: {len(bios) - len(misses)} hits, {len(misses)} misses")
+
+        if misses:
+            encoded = self._encode([bios[i] for i in misses], batch_size)
+            self.embedding_cache.put_many(self.embedding_cache_key, [bios[i] for i in misses], encoded)
+            for i, vector in zip(misses, encoded):
+                cached[i] = vector
+        return np.stack(cached)
+
+    def _encode(self, bios: list[str], batch_size: int) -> np.ndarray:
+        self.bios_encoded += len(bios)
+        if self.encoder_pool is not None and len(bios) >= self.settings.encode_processes_min_bios:
+            return self.encoder_pool.encode(bios, batch_size)
+        # Shared micro-batches encode with the scheduler's ENCODE_BATCH_SIZE
+        if self.scheduler is not None:
+            return self.scheduler.encode(bios)
+        return encode_length_bucketed(self.model, bios, batch_size)
+
+    def extract_category_indices(
+        self,
+        bios: list[str],
+        top_n: int | None = None,
+        similarity_threshold: float | None = None,
+        batch_size: int | None = None,
+    ) -> np.ndarray:
+        """
+        Matches every bio against the categories in one pass. Bios are
+        normalized and deduplicated first (see `preprocessing`), so bios that
+        normalize to the same text share one encode.
+
+        Returns an int array of shape (len(bios), top_n) holding category indices
+        ordered by descending similarity, with -1 where the similarity is below
+        the threshold or the bio is empty after normalization.
+        """
+        indices, _ = self.extract_category_scores(
+            bios, top_n=top_n, similarity_threshold=similarity_threshold, batch_size=batch_size
+        )
+        return indices
+
+    def extract_category_scores(
+        self,
+        bios: list[str],
+        top_n: int | None = None,
+        similarity_threshold: float | None = None,
+        batch_size: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Like `extract_category_indices`, but also returns the matching cosine
+        similarities as a float array of the same shape (0.0 where the index is -1).
+        """
+        top_n = top_n or self.settings.top_n_extractor
+        similarity_threshold = similarity_threshold or self.settings.similarity_threshold
+        top_n = min(top_n, len(self.categories))
+
+        indices = np.full((len(bios), top_n), -1, dtype=np.int64)
+        scores = np.zeros((len(bios), top_n), dtype=np.float32)
+        prepared = preprocess_bios(bios)
+        if not prepared.texts:
+            return indices, scores
+
+        # Each distinct normalized bio is encoded and matched once, then fanned out to its duplicates
+        embeddings = self.encode_bios(prepared.texts, batch_size=batch_size)
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        similarities = embeddings @ self.category_embeddings.T
+
+        top = np.argsort(similarities, axis=1, kind="stable")[:, ::-1][:, :top_n]
+        top_scores = np.take_along_axis(similarities, top, axis=1)
+        matched = top_scores >= similarity_threshold
+        rows = np.flatnonzero(prepared.inverse >= 0)
+        unique = prepared.inverse[rows]
+        indices[rows] = np.where(matched, top, -1)[unique]
+        scores[rows] = np.where(matched, top_scores, 0.0)[unique]
+        return indices, scores
+
+    def extract_interests_batch(
+        self,
+        bios: list[str],
+        usernames: list[str] | None = None,
+        top_n: int | None = None,
+        similarity_threshold: float | None = None,
+        batch_size: int | None = None,
+    ) -> list[list[str]]:
+        """
+        Batched equivalent of `extract_interest_from_bio`: returns one list of
+        interests per bio, in the same order as `bios`.
+        """
+        if usernames is not None and len(usernames) != len(bios):
+            raise ValueError(f"Got {len(usernames)} usernames for {len(bios)} bios")
+
+        logger.debug(f"Extracting interests from {len(bios)} bios in batch")
+
+        try:
+            indices = self.extract_category_indices(
+                bios, top_n=top_n, similarity_threshold=similarity_threshold, batch_size=batch_size
+            )
+        except Exception as e:
+            logger.error(f"Error extracting interests from {len(bios)} bios: {e}")
+            raise
+
+        interests_list = [[self.categories[idx] for idx in row if idx >= 0] for row in indices.tolist()]
+
+        if usernames is not None:
+            for username, interests in zip(usernames, interests_list):
+                logger.debug(f"[{username}] Extracted {len(interests)} interests from bio: {interests}")
+        matched = sum(1 for interests in interests_list if interests)
+        logger.info(f"Extracted interests for {matched}/{len(bios)} bios")
+        return interests_list
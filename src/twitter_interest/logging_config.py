@@ -3,6 +3,7 @@ Centralized logging configuration for Twitter Interest Inference using Loguru.
 """
 import sys
 from pathlib import Path
+from typing import TextIO
 from loguru import logger
 import logging
 
@@ -12,7 +13,8 @@ def setup_logging(
     enable_file_logging: bool = True,
     enable_rotation: bool = True,
     max_file_size: str = "10 MB",
-    retention: str = "7 days"
+    retention: str = "7 days",
+    console: TextIO = sys.stdout,
 ) -> None:
     """
     Setup centralized logging configuration using Loguru.
@@ -24,13 +26,15 @@ def setup_logging(
         enable_rotation: Whether to enable log file rotation
         max_file_size: Maximum size per log file (e.g., "10 MB", "100 KB")
         retention: How long to keep log files (e.g., "7 days", "2 weeks")
+        console: Stream for console messages below WARNING. Commands that write
+            results to stdout pass sys.stderr to keep it clean.
     """
     # Remove default handler
     logger.remove()
     
-    # Add console handler for INFO, DEBUG, SUCCESS (and others if level allows) to stdout
+    # Add console handler for INFO, DEBUG, SUCCESS (and others if level allows) to the console stream
     logger.add(
-        sys.stdout,
+        console,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=level,
         colorize=True,
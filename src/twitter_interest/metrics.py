@@ -0,0 +1,112 @@
+"""
+Process-wide latency metrics, exported by GET /metrics in the Prometheus text
+format.
+
+Every completed inference records the seconds spent in each of its stages
+(see `service.StageTimings`), how many followings it covered and how many bios
+went through the model. The micro-batch schedulers' batch sizes and queueing
+delays are exported alongside. Each API worker process keeps its own metrics.
+"""
+import threading
+
+from .scheduler import Histogram, scheduler_stats
+
+STAGE_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _InferenceMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds: dict[str, Histogram] = {}
+        self.followings = Histogram(SIZE_BUCKETS)
+        self.bios_encoded = Histogram(SIZE_BUCKETS)
+
+    def record(self, stage_seconds: dict[str, float], followings: int | None, bios_encoded: int | None) -> None:
+        with self._lock:
+            for stage, seconds in stage_seconds.items():
+                if stage not in self.stage_seconds:
+                    self.stage_seconds[stage] = Histogram(STAGE_SECONDS_BUCKETS)
+                self.stage_seconds[stage].observe(seconds)
+            if followings is not None:
+                self.followings.observe(followings)
+            if bios_encoded is not None:
+                self.bios_encoded.observe(bios_encoded)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "stage_seconds": {stage: histogram.as_dict() for stage, histogram in self.stage_seconds.items()},
+                "followings": self.followings.as_dict(),
+                "bios_encoded": self.bios_encoded.as_dict(),
+            }
+
+
+_metrics = _InferenceMetrics()
+
+
+def record_inference(stage_seconds: dict[str, float], followings: int | None = None, bios_encoded: int | None = None) -> None:
+    """Adds one completed inference to the process-wide histograms."""
+    _metrics.record(stage_seconds, followings, bios_encoded)
+
+
+def inference_metrics() -> dict:
+    """Process-wide histograms of stage latencies, followings and bios encoded per inference."""
+    return _metrics.as_dict()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, help_text: str, series: list[tuple[dict[str, str], dict]]) -> list[str]:
+    """Renders histograms in the shape of `Histogram.as_dict()` as one Prometheus metric family."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        for bound, count in histogram["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {float(histogram['sum'])!r}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    inference = inference_metrics()
+    schedulers = scheduler_stats()
+    lines = [
+        *_histogram_lines(
+            "interest_stage_duration_seconds",
+            "Wall-clock seconds spent in each stage of an interest inference.",
+            [({"stage": stage}, histogram) for stage, histogram in inference["stage_seconds"].items()],
+        ),
+        *_histogram_lines(
+            "interest_followings",
+            "Followings covered by an interest inference.",
+            [({}, inference["followings"])],
+        ),
+        *_histogram_lines(
+            "interest_bios_encoded",
+            "Bios sent through the model by an interest inference, after deduplication and the embedding cache.",
+            [({}, inference["bios_encoded"])],
+        ),
+        *_histogram_lines(
+            "interest_microbatch_size",
+            "Bios per micro-batch run through the model.",
+            [({"model": model}, stats["batch_size"]) for model, stats in schedulers.items()],
+        ),
+        *_histogram_lines(
+            "interest_microbatch_queue_delay_seconds",
+            "Seconds a request waited in the micro-batch queue.",
+            [({"model": model}, stats["queue_delay_seconds"]) for model, stats in schedulers.items()],
+        ),
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,228 @@
+"""
+Process-wide registry of loaded SentenceTransformer models.
+
+Each model is loaded once per process and shared by every InterestExtractor.
+Resident models are kept under a memory cap and evicted least-recently-used.
+Category embeddings are cached per model and category list, in memory and on
+disk.
+
+Loading a model or encoding its categories holds only that model's lock, so a
+request for a model that isn't resident yet never blocks requests for the
+ones that are.
+"""
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .settings import Settings, categories_hash
+from .logging_config import get_logger
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = get_logger(__name__)
+
+
+def _load_sentence_transformer(model_name: str) -> "SentenceTransformer":
+    # Deferred so importing the package (e.g. the API) doesn't pull in torch
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def _model_nbytes(model: "SentenceTransformer") -> int:
+    """Approximate resident size of a model from its parameters and buffers."""
+    return sum(
+        tensor.numel() * tensor.element_size()
+        for tensor in itertools.chain(model.parameters(), model.buffers())
+    )
+
+
+@dataclass
+class _ModelEntry:
+    model: "SentenceTransformer"
+    nbytes: int
+    category_embeddings: dict[tuple[str, ...], np.ndarray] = field(default_factory=dict)
+
+
+class ModelRegistry:
+    def __init__(self, max_bytes: int, max_seq_length: int | None = None, category_cache_dir: str | None = None):
+        self.max_bytes = max_bytes
+        self.max_seq_length = max_seq_length
+        self.category_cache_dir = category_cache_dir
+        self._entries: OrderedDict[str, _ModelEntry] = OrderedDict()
+        # Guards _entries and the counters; never held while loading or encoding
+        self._lock = threading.Lock()
+        # Per model name: serializes loading the model and encoding its categories
+        self._model_locks: dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+        logger.debug(f"Initialized ModelRegistry with max_bytes={max_bytes}")
+
+    def get_model(self, model_name: str) -> "SentenceTransformer":
+        return self._get_entry(model_name).model
+
+    def is_resident(self, model_name: str, categories: list[str] | None = None) -> bool:
+        """True if the model, and the embeddings of `categories` if given, are loaded; never loads anything."""
+        # No lock needed: single dict lookups are atomic
+        entry = self._entries.get(model_name)
+        return entry is not None and (categories is None or tuple(categories) in entry.category_embeddings)
+
+    def get_category_embeddings(self, model_name: str, categories: list[str]) -> np.ndarray:
+        """
+        Returns normalized embeddings for `categories`. They are kept in memory
+        per category list and persisted under CATEGORY_CACHE_DIR, keyed by the
+        model and a hash of the list. A list not seen before only has the
+        categories this model hasn't already encoded sent through it.
+        """
+        key = tuple(categories)
+        entry = self._get_entry(model_name)
+        embeddings = entry.category_embeddings.get(key)
+        if embeddings is not None:
+            return embeddings
+        with self._model_lock(model_name):
+            embeddings = entry.category_embeddings.get(key)
+            if embeddings is None:
+                embeddings = self._load_category_embeddings(model_name, key)
+            if embeddings is None:
+                embeddings = self._encode_categories(model_name, entry, key)
+                self._save_category_embeddings(model_name, key, embeddings)
+            entry.category_embeddings[key] = embeddings
+            return embeddings
+
+    def _encode_categories(self, model_name: str, entry: _ModelEntry, categories: tuple[str, ...]) -> np.ndarray:
+        known: dict[str, np.ndarray] = {}
+        for other, embeddings in entry.category_embeddings.items():
+            known.update(zip(other, embeddings))
+        missing = [category for category in categories if category not in known]
+        logger.debug(f"Encoding {len(missing)} of {len(categories)} category embeddings for model {model_name}")
+        if missing:
+            known.update(zip(missing, entry.model.encode(missing, normalize_embeddings=True)))
+        return np.stack([known[category] for category in categories]).astype(np.float32, copy=False)
+
+    def _category_cache_path(self, model_name: str, categories: tuple[str, ...]) -> Path | None:
+        if not self.category_cache_dir:
+            return None
+        return Path(self.category_cache_dir) / model_name.replace("/", "__") / f"{categories_hash(list(categories))}.npy"
+
+    def _load_category_embeddings(self, model_name: str, categories: tuple[str, ...]) -> np.ndarray | None:
+        path = self._category_cache_path(model_name, categories)
+        if path is None or not path.exists():
+            return None
+        try:
+            embeddings = np.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable category embeddings {path}: {e}")
+            return None
+        if len(embeddings) != len(categories):
+            return None
+        logger.debug(f"Loaded {len(categories)} category embeddings for model {model_name} from {path}")
+        return embeddings
+
+    def _save_category_embeddings(self, model_name: str, categories: tuple[str, ...], embeddings: np.ndarray) -> None:
+        path = self._category_cache_path(model_name, categories)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename, so concurrent processes never read a partial file
+            tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+            with tmp.open("wb") as f:
+                np.save(f, embeddings)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not persist category embeddings to {path}: {e}")
+
+    def _model_lock(self, model_name: str) -> threading.Lock:
+        with self._lock:
+            return self._model_locks.setdefault(model_name, threading.Lock())
+
+    def _resident_entry(self, model_name: str) -> _ModelEntry | None:
+        with self._lock:
+            entry = self._entries.get(model_name)
+            if entry is not None:
+                self._entries.move_to_end(model_name)
+            return entry
+
+    def _get_entry(self, model_name: str) -> _ModelEntry:
+        entry = self._resident_entry(model_name)
+        if entry is not None:
+            return entry
+        with self._model_lock(model_name):
+            # Another thread may have loaded it while this one waited
+            entry = self._resident_entry(model_name)
+            if entry is not None:
+                return entry
+
+            logger.info(f"Loading SentenceTransformer model: {model_name}")
+            model = _load_sentence_transformer(model_name)
+            # Inference only: with no autograd state written next to the weights, their pages stay
+            # shared between forked workers (see serving.preload_for_fork)
+            model.eval()
+            model.requires_grad_(False)
+            if self.max_seq_length is not None:
+                # Bios are short; a lower limit only truncates outliers, it can't exceed what the model supports
+                model.max_seq_length = min(model.max_seq_length or self.max_seq_length, self.max_seq_length)
+            entry = _ModelEntry(model=model, nbytes=_model_nbytes(model))
+            with self._lock:
+                self.loads += 1
+                self._evict_for(entry.nbytes)
+                self._entries[model_name] = entry
+                resident = list(self._entries)
+            logger.info(f"Loaded model {model_name} ({entry.nbytes / 2**20:.1f} MB), resident: {resident}")
+            return entry
+
+    def _evict_for(self, nbytes: int) -> None:
+        """Evicts least-recently-used models until `nbytes` more fits under the cap."""
+        while self._entries and self.resident_bytes + nbytes > self.max_bytes:
+            model_name, evicted = self._entries.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"Evicted model {model_name} ({evicted.nbytes / 2**20:.1f} MB) from registry")
+        if nbytes > self.max_bytes:
+            logger.warning(f"Model size {nbytes / 2**20:.1f} MB exceeds registry cap {self.max_bytes / 2**20:.1f} MB")
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "models": list(self._entries),
+                "resident_bytes": self.resident_bytes,
+                "max_bytes": self.max_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_registry: ModelRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry(settings: Settings) -> ModelRegistry:
+    """
+    Returns the process-wide ModelRegistry, creating it on first call with
+    the memory cap, bio sequence length limit and category cache directory
+    from `settings`.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(
+                max_bytes=settings.model_cache_max_mb * 2**20,
+                max_seq_length=settings.bio_max_seq_length,
+                category_cache_dir=settings.category_cache_dir,
+            )
+        return _registry
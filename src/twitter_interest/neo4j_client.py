@@ -1,15 +1,313 @@
-from neo4j import GraphDatabase
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+from neo4j import AsyncDriver, AsyncGraphDatabase, Driver, GraphDatabase
 from .settings import Settings
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+_driver: Driver | None = None
+_async_driver: AsyncDriver | None = None
+_driver_lock = threading.Lock()
+
+# Queries shared by the sync and async clients
+_USER_WITH_FOLLOWINGS_QUERY = (
+    "MATCH (u:User {{id: $user_id}}) "
+    "OPTIONAL MATCH (u)-[:FOLLOWS]->(f:User) "
+    "{limit_clause}"
+    "RETURN u.bio AS bio, "
+    "[x IN collect(f) | {{username: x.id, bio: coalesce(x.bio, '')}}] AS followings"
+)
+_FOLLOWINGS_PAGE_QUERY = (
+    "MATCH (u:User {id: $user_id})-[:FOLLOWS]->(f:User) "
+    "WHERE $after IS NULL OR f.id > $after "
+    "RETURN f.id AS username, coalesce(f.bio, '') AS bio "
+    "ORDER BY f.id LIMIT $page_size"
+)
+_LAST_SYNCED_QUERY = "MATCH (u:User {id: $user_id}) RETURN u.lastSyncedAt AS last_synced_at"
+_MARK_SYNCED_QUERY = "MATCH (u:User {id: $user_id}) SET u.lastSyncedAt = $synced_at"
+_FOLLOWINGS_LIMIT_QUERY = (
+    "MATCH (u:User {id: $username})-[:FOLLOWS]->(f:User) "
+    "RETURN f.id AS username, f.bio AS bio "
+    "LIMIT $max_records"
+)
+
+# Interests persisted on :User nodes: `interests` (category labels, best first),
+# `interestScores`, `interestsModel`, `interestsConfig` (hash of the extraction
+# settings), `bioHash` and `interestsBio` (the bio they were computed from, so
+# Cypher can tell a changed bio without hashing it). `interestsCheckedAt` on the
+# analysed user records when its followings were last checked for stale interests.
+_INTEREST_STATE_QUERY = (
+    "MATCH (u:User {id: $user_id}) "
+    "RETURN coalesce(u.bio, '') AS bio, u.bioHash AS bio_hash, u.interestsModel AS model, "
+    "u.interestsConfig AS config, u.lastSyncedAt AS last_synced_at, u.interestsCheckedAt AS checked_at"
+)
+# Only followings whose stored interests are missing or stale leave the database
+_INTEREST_CANDIDATES_PAGE_QUERY = (
+    "MATCH (u:User {id: $user_id})-[:FOLLOWS]->(f:User) "
+    "WHERE ($after IS NULL OR f.id > $after) "
+    "AND (f.interestsModel IS NULL OR f.interestsModel <> $model "
+    "OR f.interestsConfig IS NULL OR f.interestsConfig <> $config "
+    "OR f.interestsBio IS NULL OR f.interestsBio <> coalesce(f.bio, '')) "
+    "RETURN f.id AS username, coalesce(f.bio, '') AS bio, f.bioHash AS bio_hash, "
+    "f.interestsModel AS model, f.interestsConfig AS config "
+    "ORDER BY f.id LIMIT $page_size"
+)
+_STORE_INTERESTS_QUERY = (
+    "UNWIND $rows AS row "
+    "MATCH (n:User {id: row.username}) "
+    "SET n.interests = row.interests, n.interestScores = row.scores, n.bioHash = row.bio_hash, "
+    "n.interestsBio = row.bio, "
+    "n.interestsModel = $model, n.interestsConfig = $config"
+)
+_ALL_USERS_PAGE_QUERY = (
+    "MATCH (n:User) "
+    "WHERE $after IS NULL OR n.id > $after "
+    "RETURN n.id AS username, coalesce(n.bio, '') AS bio, n.bioHash AS bio_hash, "
+    "n.interestsModel AS model, n.interestsConfig AS config "
+    "ORDER BY n.id LIMIT $page_size"
+)
+_MARK_INTERESTS_CHECKED_QUERY = "MATCH (u:User {id: $user_id}) SET u.interestsCheckedAt = $checked_at"
+# Counts the followings' stored interests in the database. Each interest also
+# carries where it was first seen (following id, position in its list) so ties
+# rank exactly as they would when aggregating the followings in id order.
+_STORED_INTEREST_COUNTS_QUERY = (
+    "MATCH (u:User {id: $user_id}) "
+    "CALL { "
+    "  WITH u "
+    "  MATCH (u)-[:FOLLOWS]->(f:User) "
+    "  UNWIND range(0, size(coalesce(f.interests, [])) - 1) AS i "
+    "  WITH f.id AS fid, i, f.interests[i] AS interest "
+    "  ORDER BY fid, i "
+    "  WITH interest, count(*) AS occurrences, collect(fid)[0] AS first_id, collect(i)[0] AS first_pos "
+    "  ORDER BY first_id, first_pos "
+    "  RETURN collect({interest: interest, count: occurrences}) AS followings_counts "
+    "} "
+    "CALL { "
+    "  WITH u "
+    "  OPTIONAL MATCH (u)-[:FOLLOWS]->(f:User) "
+    "  RETURN count(f) AS followings_total "
+    "} "
+    "RETURN coalesce(u.interests, []) AS interests, followings_counts, followings_total"
+)
+
+def _user_with_followings_query(limit: int | None) -> str:
+    return _USER_WITH_FOLLOWINGS_QUERY.format(
+        limit_clause="WITH u, f ORDER BY f.id LIMIT $limit " if limit is not None else ""
+    )
+
+
+class _PoolStats:
+    """Counts sessions checked out of the shared driver's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.max_pool_size = 0
+        self.sessions_opened = 0
+        self.sessions_in_use = 0
+        self.peak_sessions_in_use = 0
+        self.session_errors = 0
+
+    def acquired(self):
+        with self._lock:
+            self.sessions_opened += 1
+            self.sessions_in_use += 1
+            self.peak_sessions_in_use = max(self.peak_sessions_in_use, self.sessions_in_use)
+
+    def released(self, failed: bool):
+        with self._lock:
+            self.sessions_in_use -= 1
+            if failed:
+                self.session_errors += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": self.max_pool_size,
+                "sessions_opened": self.sessions_opened,
+                "sessions_in_use": self.sessions_in_use,
+                "peak_sessions_in_use": self.peak_sessions_in_use,
+                "session_errors": self.session_errors,
+            }
+
+
+_pool_stats = _PoolStats()
+
+
+def get_driver(settings: Settings) -> Driver:
+    """
+    Returns the process-wide Neo4j driver, creating it on first call.
+    The driver owns a connection pool and lives until `close_driver()`.
+    """
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            _driver = GraphDatabase.driver(
+                settings.neo4j_uri,
+                auth=(settings.neo4j_user, settings.neo4j_password.get_secret_value()),
+                max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+                connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+            )
+            _pool_stats.max_pool_size = settings.neo4j_max_connection_pool_size
+            logger.info(
+                f"Opened Neo4j driver to {settings.neo4j_uri} "
+                f"(pool size: {settings.neo4j_max_connection_pool_size})"
+            )
+        return _driver
+
+
+def close_driver() -> None:
+    """Closes the process-wide Neo4j driver and its connection pool."""
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            logger.info("Closing Neo4j driver")
+            _driver.close()
+            _driver = None
+
+
+def get_async_driver(settings: Settings) -> AsyncDriver:
+    """
+    Returns the process-wide async Neo4j driver used by the API, creating it
+    on first call. It must be closed from the event loop with `close_async_driver()`.
+    """
+    global _async_driver
+    with _driver_lock:
+        if _async_driver is None:
+            _async_driver = AsyncGraphDatabase.driver(
+                settings.neo4j_uri,
+                auth=(settings.neo4j_user, settings.neo4j_password.get_secret_value()),
+                max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+                connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
+            )
+            _pool_stats.max_pool_size = settings.neo4j_max_connection_pool_size
+            logger.info(
+                f"Opened async Neo4j driver to {settings.neo4j_uri} "
+                f"(pool size: {settings.neo4j_max_connection_pool_size})"
+            )
+        return _async_driver
+
+
+async def close_async_driver() -> None:
+    """Closes the process-wide async Neo4j driver and its connection pool."""
+    global _async_driver
+    with _driver_lock:
+        driver, _async_driver = _async_driver, None
+    if driver is not None:
+        logger.info("Closing async Neo4j driver")
+        await driver.close()
+
+
+def pool_stats() -> dict:
+    """
+    Returns session counters for the shared driver, plus the driver's own
+    connection counts when its pool internals are available.
+    """
+    stats = _pool_stats.as_dict()
+    for driver in (_driver, _async_driver):
+        connections = getattr(getattr(driver, "_pool", None), "connections", None)
+        if connections is None:
+            continue
+        try:
+            conns = [conn for address_conns in list(connections.values()) for conn in list(address_conns)]
+            stats["connections_open"] = stats.get("connections_open", 0) + len(conns)
+            stats["connections_in_use"] = stats.get("connections_in_use", 0) + sum(
+                1 for conn in conns if getattr(conn, "in_use", False)
+            )
+        except Exception as e:
+            logger.debug(f"Could not read Neo4j pool internals: {e}")
+    return stats
+
+
 class Neo4jClient:
-    def __init__(self, settings: Settings):
-        self.driver = GraphDatabase.driver(
-            settings.neo4j_uri, 
-            auth=(settings.neo4j_user, settings.neo4j_password.get_secret_value()))
-        logger.debug(f"Initialized Neo4j connection to {settings.neo4j_uri}")
+    def __init__(self, settings: Settings, driver: Driver | None = None):
+        self.driver = driver or get_driver(settings)
+        logger.debug(f"Initialized Neo4j client for {settings.neo4j_uri}")
+
+    @contextmanager
+    def _session(self):
+        _pool_stats.acquired()
+        failed = False
+        try:
+            with self.driver.session() as session:
+                yield session
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _pool_stats.released(failed)
+
+    def get_last_synced_at(self, user_id) -> float | None:
+        """
+        Returns when the user's followings were last synced (epoch seconds),
+        or None if they never were or the user doesn't exist.
+        """
+        try:
+            with self._session() as session:
+                record = session.run(_LAST_SYNCED_QUERY, user_id=user_id).single()
+                return record["last_synced_at"] if record else None
+        except Exception as e:
+            logger.error(f"Error fetching last sync time for user {user_id}: {e}")
+            raise
+
+    def mark_synced(self, user_id, synced_at: float) -> None:
+        """Records on the user's node that their followings were synced at `synced_at`."""
+        try:
+            with self._session() as session:
+                session.run(_MARK_SYNCED_QUERY, user_id=user_id, synced_at=synced_at).consume()
+                logger.debug(f"Marked user {user_id} as synced at {synced_at}")
+        except Exception as e:
+            logger.error(f"Error recording sync time for user {user_id}: {e}")
+            raise
+
+    def get_user_with_followings(self, user_id, limit: int | None = None) -> dict | None:
+        """
+        Fetches a user's bio and their followings' ids and bios in a single
+        query. Returns None if the user doesn't exist, otherwise a dict with
+        'bio' and 'followings' (list of dicts with 'username' and 'bio' keys).
+
+        If `limit` is given, only the first `limit` followings ordered by id are
+        returned; fetch the rest with `iter_followings_with_bios`.
+        """
+        query = _user_with_followings_query(limit)
+        logger.debug(f"Fetching bio and followings for user: {user_id} (limit: {limit})")
+
+        try:
+            with self._session() as session:
+                record = session.run(query, user_id=user_id, limit=limit).single()
+                if record is None:
+                    logger.info(f"User {user_id} not found in Neo4j")
+                    return None
+                profile = {"bio": record["bio"] or "", "followings": record["followings"]}
+                logger.info(f"Retrieved bio and {len(profile['followings'])} followings for user {user_id}")
+                return profile
+        except Exception as e:
+            logger.error(f"Error fetching bio and followings for user {user_id}: {e}")
+            raise
+
+    def iter_followings_with_bios(self, user_id, page_size: int, after: str | None = None):
+        """
+        Yields a user's followings in pages of up to `page_size` dicts with
+        'username' and 'bio' keys, using keyset pagination on the following's id.
+        Pages start after the id `after` when given. Each page uses its own
+        short-lived session, so no connection is held between pages.
+        """
+        query = _FOLLOWINGS_PAGE_QUERY
+        while True:
+            logger.debug(f"Fetching followings page for user {user_id} after {after!r} (page_size: {page_size})")
+            try:
+                with self._session() as session:
+                    page = [record.data() for record in session.run(query, user_id=user_id, after=after, page_size=page_size)]
+            except Exception as e:
+                logger.error(f"Error fetching followings page for user {user_id}: {e}")
+                raise
+
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
 
     def get_followings_with_bios(self, user_id):
         """
@@ -22,7 +320,7 @@ class Neo4jClient:
         logger.debug(f"Fetching followings with bios for user: {user_id}")
         
         try:
-            with self.driver.session() as session:
+            with self._session() as session:
                 results = session.run(query, user_id=user_id)
                 followings = [{"username": record["username"], "bio": record["bio"] or ""} for record in results]
                 logger.info(f"Retrieved {len(followings)} followings for user {user_id}")
@@ -43,7 +341,7 @@ class Neo4jClient:
         logger.debug(f"Fetching bio for user: {user_id}")
         
         try:
-            with self.driver.session() as session:
+            with self._session() as session:
                 result = session.run(query, user_id=user_id).single()
                 bio = result["bio"] if result and result["bio"] else ""
                 logger.debug(f"Retrieved bio for user {user_id}: {bio[:100]}..." if bio else f"No bio found for user {user_id}")
@@ -63,15 +361,11 @@ class Neo4jClient:
         Returns:
             List[dict]: List of dicts with 'username' and 'bio' keys.
         """
-        query = (
-            "MATCH (u:User {id: $username})-[:FOLLOWS]->(f:User) "
-            "RETURN f.id AS username, f.bio AS bio "
-            "LIMIT $max_records"
-        )
+        query = _FOLLOWINGS_LIMIT_QUERY
         logger.debug(f"Fetching up to {max_records} followings with bios for user: {username}")
         
         try:
-            with self.driver.session() as session:
+            with self._session() as session:
                 results = session.run(query, username=username, max_records=max_records)
                 followings = [{"username": record["username"], "bio": record["bio"] or ""} for record in results]
                 logger.info(f"Retrieved {len(followings)} followings (limited to {max_records}) for user {username}")
@@ -80,6 +374,276 @@ class Neo4jClient:
             logger.error(f"Error fetching limited followings for user {username}: {e}")
             raise
 
+    def get_interest_state(self, user_id) -> dict | None:
+        """
+        Returns the user's bio and stored-interest metadata (bio_hash, model,
+        config, last_synced_at, checked_at), or None if the user doesn't exist.
+        """
+        try:
+            with self._session() as session:
+                record = session.run(_INTEREST_STATE_QUERY, user_id=user_id).single()
+                return record.data() if record else None
+        except Exception as e:
+            logger.error(f"Error fetching stored interest state for user {user_id}: {e}")
+            raise
+
+    def iter_interest_candidates(self, user_id, page_size: int, model: str, config: str, after: str | None = None):
+        """
+        Yields, in keyset pages like `iter_followings_with_bios`, the user's
+        followings whose stored interests are missing, were computed with
+        another model or extraction config, or predate a bio change. Their bios
+        are sent along to be encoded; up-to-date followings are filtered out
+        in Cypher.
+        """
+        while True:
+            try:
+                with self._session() as session:
+                    page = [
+                        record.data()
+                        for record in session.run(
+                            _INTEREST_CANDIDATES_PAGE_QUERY,
+                            user_id=user_id, after=after, page_size=page_size, model=model, config=config,
+                        )
+                    ]
+            except Exception as e:
+                logger.error(f"Error fetching stored interests page for user {user_id}: {e}")
+                raise
+
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    def iter_all_users(self, page_size: int, after: str | None = None):
+        """
+        Yields every :User in id order, in keyset pages with the same fields as
+        `iter_interest_candidates`. Used by the offline precompute job.
+        """
+        while True:
+            try:
+                with self._session() as session:
+                    page = [
+                        record.data()
+                        for record in session.run(_ALL_USERS_PAGE_QUERY, after=after, page_size=page_size)
+                    ]
+            except Exception as e:
+                logger.error(f"Error fetching users page after {after!r}: {e}")
+                raise
+
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    def store_interests(self, rows: list[dict], model: str, config: str) -> None:
+        """
+        Writes extracted interests back onto :User nodes in one UNWIND query.
+        Each row has 'username', 'bio', 'interests', 'scores' and 'bio_hash'.
+        """
+        try:
+            with self._session() as session:
+                session.run(_STORE_INTERESTS_QUERY, rows=rows, model=model, config=config).consume()
+                logger.debug(f"Stored interests for {len(rows)} users")
+        except Exception as e:
+            logger.error(f"Error storing interests for {len(rows)} users: {e}")
+            raise
+
+    def mark_interests_checked(self, user_id, checked_at: float) -> None:
+        try:
+            with self._session() as session:
+                session.run(_MARK_INTERESTS_CHECKED_QUERY, user_id=user_id, checked_at=checked_at).consume()
+        except Exception as e:
+            logger.error(f"Error recording interest check for user {user_id}: {e}")
+            raise
+
+    def get_stored_interest_counts(self, user_id) -> dict | None:
+        """
+        Aggregates the followings' stored interests in Cypher. Returns None if the
+        user doesn't exist, otherwise a dict with the user's own 'interests', the
+        followings' interest 'followings_counts' (dicts with 'interest' and
+        'count', in first-seen order) and 'followings_total'.
+        """
+        try:
+            with self._session() as session:
+                record = session.run(_STORED_INTEREST_COUNTS_QUERY, user_id=user_id).single()
+                if record is None:
+                    return None
+                counts = record.data()
+                logger.info(
+                    f"Counted {len(counts['followings_counts'])} stored interests over "
+                    f"{counts['followings_total']} followings of user {user_id}"
+                )
+                return counts
+        except Exception as e:
+            logger.error(f"Error aggregating stored interests for user {user_id}: {e}")
+            raise
+
     def close(self):
-        logger.debug("Closing Neo4j driver connection")
-        self.driver.close()
\ No newline at end of file
+        # The driver is shared by the whole process; see close_driver()
+        logger.debug("Releasing Neo4j client, shared driver stays open")
+
+
+class AsyncNeo4jClient:
+    """Async counterpart of Neo4jClient, backed by the process-wide async driver."""
+
+    def __init__(self, settings: Settings, driver: AsyncDriver | None = None):
+        self.driver = driver or get_async_driver(settings)
+        logger.debug(f"Initialized async Neo4j client for {settings.neo4j_uri}")
+
+    @asynccontextmanager
+    async def _session(self):
+        _pool_stats.acquired()
+        failed = False
+        try:
+            async with self.driver.session() as session:
+                yield session
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _pool_stats.released(failed)
+
+    async def get_last_synced_at(self, user_id) -> float | None:
+        """See `Neo4jClient.get_last_synced_at`."""
+        try:
+            async with self._session() as session:
+                result = await session.run(_LAST_SYNCED_QUERY, user_id=user_id)
+                record = await result.single()
+                return record["last_synced_at"] if record else None
+        except Exception as e:
+            logger.error(f"Error fetching last sync time for user {user_id}: {e}")
+            raise
+
+    async def mark_synced(self, user_id, synced_at: float) -> None:
+        """See `Neo4jClient.mark_synced`."""
+        try:
+            async with self._session() as session:
+                result = await session.run(_MARK_SYNCED_QUERY, user_id=user_id, synced_at=synced_at)
+                await result.consume()
+                logger.debug(f"Marked user {user_id} as synced at {synced_at}")
+        except Exception as e:
+            logger.error(f"Error recording sync time for user {user_id}: {e}")
+            raise
+
+    async def get_user_with_followings(self, user_id, limit: int | None = None) -> dict | None:
+        """See `Neo4jClient.get_user_with_followings`."""
+        logger.debug(f"Fetching bio and followings for user: {user_id} (limit: {limit})")
+        try:
+            async with self._session() as session:
+                result = await session.run(_user_with_followings_query(limit), user_id=user_id, limit=limit)
+                record = await result.single()
+                if record is None:
+                    logger.info(f"User {user_id} not found in Neo4j")
+                    return None
+                profile = {"bio": record["bio"] or "", "followings": record["followings"]}
+                logger.info(f"Retrieved bio and {len(profile['followings'])} followings for user {user_id}")
+                return profile
+        except Exception as e:
+            logger.error(f"Error fetching bio and followings for user {user_id}: {e}")
+            raise
+
+    async def iter_followings_with_bios(self, user_id, page_size: int, after: str | None = None):
+        """See `Neo4jClient.iter_followings_with_bios`."""
+        while True:
+            logger.debug(f"Fetching followings page for user {user_id} after {after!r} (page_size: {page_size})")
+            try:
+                async with self._session() as session:
+                    result = await session.run(_FOLLOWINGS_PAGE_QUERY, user_id=user_id, after=after, page_size=page_size)
+                    page = await result.data()
+            except Exception as e:
+                logger.error(f"Error fetching followings page for user {user_id}: {e}")
+                raise
+
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    async def get_followings_usernames_with_bios_limit(self, username: str, max_records: int = 10):
+        """See `Neo4jClient.get_followings_usernames_with_bios_limit`."""
+        logger.debug(f"Fetching up to {max_records} followings with bios for user: {username}")
+        try:
+            async with self._session() as session:
+                result = await session.run(_FOLLOWINGS_LIMIT_QUERY, username=username, max_records=max_records)
+                followings = [{"username": record["username"], "bio": record["bio"] or ""} async for record in result]
+                logger.info(f"Retrieved {len(followings)} followings (limited to {max_records}) for user {username}")
+                return followings
+        except Exception as e:
+            logger.error(f"Error fetching limited followings for user {username}: {e}")
+            raise
+
+    async def get_interest_state(self, user_id) -> dict | None:
+        """See `Neo4jClient.get_interest_state`."""
+        try:
+            async with self._session() as session:
+                result = await session.run(_INTEREST_STATE_QUERY, user_id=user_id)
+                record = await result.single()
+                return record.data() if record else None
+        except Exception as e:
+            logger.error(f"Error fetching stored interest state for user {user_id}: {e}")
+            raise
+
+    async def iter_interest_candidates(self, user_id, page_size: int, model: str, config: str, after: str | None = None):
+        """See `Neo4jClient.iter_interest_candidates`."""
+        while True:
+            try:
+                async with self._session() as session:
+                    result = await session.run(
+                        _INTEREST_CANDIDATES_PAGE_QUERY,
+                        user_id=user_id, after=after, page_size=page_size, model=model, config=config,
+                    )
+                    page = await result.data()
+            except Exception as e:
+                logger.error(f"Error fetching stored interests page for user {user_id}: {e}")
+                raise
+
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after = page[-1]["username"]
+
+    async def store_interests(self, rows: list[dict], model: str, config: str) -> None:
+        """See `Neo4jClient.store_interests`."""
+        try:
+            async with self._session() as session:
+                result = await session.run(_STORE_INTERESTS_QUERY, rows=rows, model=model, config=config)
+                await result.consume()
+                logger.debug(f"Stored interests for {len(rows)} users")
+        except Exception as e:
+            logger.error(f"Error storing interests for {len(rows)} users: {e}")
+            raise
+
+    async def mark_interests_checked(self, user_id, checked_at: float) -> None:
+        try:
+            async with self._session() as session:
+                result = await session.run(_MARK_INTERESTS_CHECKED_QUERY, user_id=user_id, checked_at=checked_at)
+                await result.consume()
+        except Exception as e:
+            logger.error(f"Error recording interest check for user {user_id}: {e}")
+            raise
+
+    async def get_stored_interest_counts(self, user_id) -> dict | None:
+        """See `Neo4jClient.get_stored_interest_counts`."""
+        try:
+            async with self._session() as session:
+                result = await session.run(_STORED_INTEREST_COUNTS_QUERY, user_id=user_id)
+                record = await result.single()
+                if record is None:
+                    return None
+                counts = record.data()
+                logger.info(
+                    f"Counted {len(counts['followings_counts'])} stored interests over "
+                    f"{counts['followings_total']} followings of user {user_id}"
+                )
+                return counts
+        except Exception as e:
+            logger.error(f"Error aggregating stored interests for user {user_id}: {e}")
+            raise
+
+    async def close(self):
+        # The driver is shared by the whole process; see close_async_driver()
+        logger.debug("Releasing async Neo4j client, shared driver stays open")
@@ -0,0 +1,152 @@
+"""
+Offline precompute of stored interests for every :User in the graph.
+
+Users are scanned in id-ordered keyset chunks. Bios whose stored interests
+are missing or stale (see `service.refresh_stored_interests`) are batch
+encoded, and the results are written back with one UNWIND query per chunk.
+Fetching the next chunk and writing the previous one overlap with encoding,
+and encoding uses every core through torch's intra-op thread pool. After each
+chunk is written, the last user id is saved to an optional checkpoint file so
+an interrupted run resumes where it left off.
+"""
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .neo4j_client import Neo4jClient
+from .settings import Settings
+from .service import stale_interest_candidates, extract_interest_rows, interest_config_hash, prefetch
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+STAGES = ("fetch", "filter", "encode", "write")
+
+
+@dataclass
+class PrecomputeReport:
+    scanned: int = 0
+    recomputed: int = 0
+    chunks: int = 0
+    resumed_after: str | None = None
+    elapsed_seconds: float = 0.0
+    # Busy time per stage; fetch and write overlap with encoding, so they can add up to more than the elapsed time
+    stage_seconds: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+
+    @property
+    def users_per_second(self) -> float:
+        return self.scanned / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "scanned": self.scanned,
+            "recomputed": self.recomputed,
+            "chunks": self.chunks,
+            "resumed_after": self.resumed_after,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "users_per_second": round(self.users_per_second, 2),
+            "stage_seconds": {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+        }
+
+
+def load_checkpoint(path: Path | None, model: str, config: str) -> str | None:
+    """Returns the last user id written by a previous run with the same model and settings."""
+    if path is None or not path.exists():
+        return None
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if state.get("model") != model or state.get("config") != config:
+        logger.warning(f"Ignoring checkpoint {path}: it was written for another model or extraction settings")
+        return None
+    return state.get("after")
+
+
+def save_checkpoint(path: Path, after: str, model: str, config: str) -> None:
+    # Write-then-rename, so a crash never leaves a truncated checkpoint behind
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"after": after, "model": model, "config": config}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def precompute_interests(
+    settings: Settings,
+    chunk_size: int,
+    checkpoint: Path | None = None,
+    threads: int | None = None,
+    full: bool = False,
+) -> PrecomputeReport:
+    """
+    Computes and stores interests for every :User. With `full`, every user is
+    recomputed; otherwise only users whose bio, model or settings changed.
+    """
+    import torch
+
+    threads = threads or os.cpu_count() or 1
+    torch.set_num_threads(threads)
+    logger.info(f"Precomputing interests with model {settings.model_name} on {threads} threads")
+    if settings.encode_processes and chunk_size < settings.encode_processes_min_bios:
+        logger.warning(
+            f"Chunks of {chunk_size} users are below ENCODE_PROCESSES_MIN_BIOS "
+            f"({settings.encode_processes_min_bios}), so the encoder processes won't be used"
+        )
+
+    config = interest_config_hash(settings)
+    report = PrecomputeReport()
+    report.resumed_after = load_checkpoint(checkpoint, settings.model_name, config)
+    if report.resumed_after is not None:
+        logger.info(f"Resuming after user id {report.resumed_after!r}")
+
+    neo4j = Neo4jClient(settings)
+
+    def write(rows: list[dict], last_id: str) -> None:
+        start = time.perf_counter()
+        if rows:
+            neo4j.store_interests(rows, settings.model_name, config)
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, last_id, settings.model_name, config)
+        report.stage_seconds["write"] += time.perf_counter() - start
+
+    start_total = time.perf_counter()
+    pending_write: Future | None = None
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompute-writer") as writer:
+        try:
+            pages = prefetch(neo4j.iter_all_users(chunk_size, after=report.resumed_after))
+            while True:
+                stage_start = time.perf_counter()
+                page = next(pages, None)
+                report.stage_seconds["fetch"] += time.perf_counter() - stage_start
+                if page is None:
+                    break
+
+                stage_start = time.perf_counter()
+                stale = page if full else stale_interest_candidates(page, settings, config)
+                report.stage_seconds["filter"] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                rows = extract_interest_rows(settings, stale) if stale else []
+                report.stage_seconds["encode"] += time.perf_counter() - stage_start
+
+                # One write in flight: chunk k is written while chunk k+1 is encoded
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = writer.submit(write, rows, page[-1]["username"])
+
+                report.chunks += 1
+                report.scanned += len(page)
+                report.recomputed += len(stale)
+                elapsed = time.perf_counter() - start_total
+                logger.info(
+                    f"Chunk {report.chunks}: {report.scanned} users scanned, {report.recomputed} recomputed, "
+                    f"{report.scanned / elapsed:.1f} users/sec"
+                )
+        finally:
+            # Let the last write land, so the checkpoint matches what was stored
+            if pending_write is not None:
+                pending_write.result()
+            neo4j.close()
+            report.elapsed_seconds = time.perf_counter() - start_total
+
+    logger.info(f"Precompute finished: {report.as_dict()}")
+    return report
@@ -0,0 +1,103 @@
+"""
+Bio normalization and per-request deduplication ahead of encoding.
+
+Bios are lowercased, stripped of t.co links and @handles, and whitespace is
+collapsed. Followings often share template bios, or bios that differ only in
+those details, so each distinct normalized bio is encoded once and its result
+is shared by every bio that normalizes to it. Bios that end up empty are
+never sent to the model.
+"""
+import re
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bumped whenever normalization changes what is encoded, so stored interests are recomputed
+BIO_PREPROCESSING_VERSION = 1
+
+_TCO_LINK = re.compile(r"https?://t\.co/\S*", re.IGNORECASE)
+_HANDLE = re.compile(r"(?<![\w@])@\w{1,15}\b")
+
+
+def normalize_bio_text(bio: str) -> str:
+    """
+    Text a bio is encoded as. Lowercasing loses nothing for the uncased
+    tokenizers of the default models.
+    """
+    bio = _HANDLE.sub(" ", _TCO_LINK.sub(" ", bio))
+    return " ".join(bio.lower().split())
+
+
+@dataclass
+class PreprocessedBios:
+    # Distinct non-empty normalized bios, in first-seen order
+    texts: list[str]
+    # For each input bio, its position in `texts`, or -1 if it normalized to nothing
+    inverse: np.ndarray
+    empty: int
+    duplicates: int
+
+
+class _PreprocessingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bios = 0
+        self.empty = 0
+        self.duplicates = 0
+
+    def record(self, prepared: PreprocessedBios) -> None:
+        with self._lock:
+            self.bios += len(prepared.inverse)
+            self.empty += prepared.empty
+            self.duplicates += prepared.duplicates
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            encoded = self.bios - self.empty - self.duplicates
+            return {
+                "bios": self.bios,
+                "empty": self.empty,
+                "duplicates": self.duplicates,
+                "encoded": encoded,
+                "saved_ratio": 1 - encoded / self.bios if self.bios else 0.0,
+            }
+
+
+_stats = _PreprocessingStats()
+
+
+def preprocess_bios(bios: list[str]) -> PreprocessedBios:
+    """Normalizes `bios` and deduplicates them; totals are added to `preprocessing_stats()`."""
+    positions: dict[str, int] = {}
+    inverse = np.full(len(bios), -1, dtype=np.int64)
+    empty = 0
+    for row, bio in enumerate(bios):
+        text = normalize_bio_text(bio)
+        if not text:
+            empty += 1
+            continue
+        inverse[row] = positions.setdefault(text, len(positions))
+
+    prepared = PreprocessedBios(
+        texts=list(positions),
+        inverse=inverse,
+        empty=empty,
+        duplicates=len(bios) - empty - len(positions),
+    )
+    _stats.record(prepared)
+    if bios:
+        logger.debug(
+            f"Preprocessed {len(bios)} bios: {prepared.empty} empty, "
+            f"{prepared.duplicates} duplicates, {len(prepared.texts)} to encode"
+        )
+    return prepared
+
+
+def preprocessing_stats() -> dict:
+    """Process-wide totals of bios seen, skipped as empty and shared as duplicates."""
+    return _stats.as_dict()
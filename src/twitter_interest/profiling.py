@@ -0,0 +1,250 @@
+"""
+On-demand profiling of a single run, for finding out where one slow account
+spends its time without redeploying.
+
+`profiled()` wraps the run with two collectors:
+
+- A sampling profiler. A background thread snapshots the Python stack of
+  every other thread every PROFILE_SAMPLE_INTERVAL_MS, so its cost doesn't
+  depend on how many calls the run makes. Samples of threads blocked waiting
+  (on a lock, a queue, a socket or the event loop's selector) are counted
+  but left out of the stacks. What remains shows where CPU time goes across
+  the event loop, the inference threads and the micro-batch scheduler.
+- A tracemalloc snapshot diff. It gives the peak traced memory and the
+  source lines that allocated the most during the run, numpy arrays
+  included. Tracing slows the run down, so compare stage timings of
+  profiled runs only with each other.
+
+Sampling covers the whole process, so requests served concurrently show up
+in the profile too. One profile runs at a time per process.
+
+Reports are saved under PROFILE_DIR as `<id>.json`, and the sampled stacks as
+`<id>.folded` in the collapsed format read by flamegraph.pl and speedscope.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+TRACEMALLOC_FRAMES = 1
+
+# Innermost Python frames of a thread that is blocked rather than running
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "readinto"),
+    ("socket.py", "accept"),
+    ("ssl.py", "read"),
+    ("socketserver.py", "serve_forever"),
+    # An inference executor thread between tasks
+    ("thread.py", "_worker"),
+}
+
+_PROFILE_ID = re.compile(r"[A-Za-z0-9_-]+")
+
+
+class ProfilerBusyError(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    location = f"{path.parent.name}/{path.name}" if path.parent.name else path.name
+    return f"{code.co_name} ({location}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """Snapshots the stacks of every other thread every `interval` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if _is_idle(frame):
+                    self.idle_samples += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, str(ident)), *reversed(stack))] += 1
+                self.samples += 1
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> list[dict]:
+        """Functions by samples spent in them (self) and under them (total)."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for (_, *frames), count in self.stacks.items():
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        ranked = sorted(total, key=lambda label: (own[label], total[label]), reverse=True)[:limit]
+        return [
+            {
+                "function": label,
+                "self_samples": own[label],
+                "self_percent": round(100 * own[label] / self.samples, 1) if self.samples else 0.0,
+                "total_samples": total[label],
+                "total_percent": round(100 * total[label] / self.samples, 1) if self.samples else 0.0,
+            }
+            for label in ranked
+        ]
+
+    def folded(self) -> str:
+        """Stacks in the collapsed format: `thread;outer;...;inner count` per line."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _top_allocations(start: tracemalloc.Snapshot, end: tracemalloc.Snapshot, limit: int) -> list[dict]:
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = end.filter_traces(ignored).compare_to(start.filter_traces(ignored), "lineno")
+    grown = [difference for difference in differences if difference.size_diff > 0][:limit]
+    return [
+        {
+            "location": f"{difference.traceback[0].filename}:{difference.traceback[0].lineno}",
+            "size_bytes": difference.size_diff,
+            "count": difference.count_diff,
+        }
+        for difference in grown
+    ]
+
+
+class ProfileSession:
+    """A profile in progress; `report` is filled in when the `profiled` block exits."""
+
+    def __init__(self, label: str, interval: float):
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-')[:40]}-{uuid.uuid4().hex[:6]}"
+        self.label = label
+        self.profiler = SamplingProfiler(interval)
+        self.report: dict = {}
+
+
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profiled(label: str, interval: float) -> Iterator[ProfileSession]:
+    """
+    Profiles the enclosed block. Raises ProfilerBusyError if another profile
+    is already running in this process.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Another profile is already running in this process")
+    try:
+        session = ProfileSession(label, interval)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        start_snapshot = tracemalloc.take_snapshot()
+        started_at, start = time.time(), time.perf_counter()
+        session.profiler.start()
+        try:
+            yield session
+        finally:
+            duration = time.perf_counter() - start
+            session.profiler.stop()
+            end_snapshot = tracemalloc.take_snapshot()
+            traced, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            session.report = {
+                "id": session.id,
+                "label": label,
+                "started_at": started_at,
+                "duration_seconds": duration,
+                "sampling": {
+                    "interval_ms": interval * 1000,
+                    "samples": session.profiler.samples,
+                    "idle_samples": session.profiler.idle_samples,
+                    "top_functions": session.profiler.top_functions(),
+                },
+                "memory": {
+                    "traced_bytes": traced,
+                    "peak_bytes": peak,
+                    "top_allocations": _top_allocations(start_snapshot, end_snapshot, TOP_ALLOCATIONS),
+                },
+            }
+            logger.info(
+                f"Profiled {label} in {duration:.2f}s: {session.profiler.samples} samples, "
+                f"peak traced memory {peak / 2**20:.1f} MB"
+            )
+    finally:
+        _profile_lock.release()
+
+
+def save_profile(session: ProfileSession, directory: str) -> Path:
+    """Writes the session's report and its folded stacks to `directory`; returns the report's path."""
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / f"{session.id}.folded").write_text(session.profiler.folded(), encoding="utf-8")
+    report_path = path / f"{session.id}.json"
+    report_path.write_text(json.dumps(session.report, indent=2), encoding="utf-8")
+    logger.info(f"Saved profile report {report_path}")
+    return report_path
+
+
+def load_profile(profile_id: str, directory: str) -> dict | None:
+    """The saved report `profile_id`, or None if there is none."""
+    if not _PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = Path(directory) / f"{profile_id}.json"
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def format_profile(report: dict, limit: int = 15) -> str:
+    """Human-readable summary of a report: hottest functions and largest allocation sites."""
+    sampling, memory = report["sampling"], report["memory"]
+    lines = [
+        f"Profile {report['id']}: {report['duration_seconds']:.2f}s, {sampling['samples']} samples "
+        f"every {sampling['interval_ms']:g}ms ({sampling['idle_samples']} idle), "
+        f"peak traced memory {memory['peak_bytes'] / 2**20:.1f} MB",
+        f"  {'self %':>7} {'total %':>8}  function",
+    ]
+    for function in sampling["top_functions"][:limit]:
+        lines.append(f"  {function['self_percent']:>7.1f} {function['total_percent']:>8.1f}  {function['function']}")
+    lines.append(f"  {'size':>10} {'blocks':>8}  allocated at")
+    for allocation in memory["top_allocations"][:limit]:
+        lines.append(f"  {allocation['size_bytes'] / 2**10:>7.1f} kB {allocation['count']:>8}  {allocation['location']}")
+    return "\n".join(lines)
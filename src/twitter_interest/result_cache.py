@@ -0,0 +1,143 @@
+"""
+In-process cache of inference results for the API.
+
+Results are keyed by the username plus every setting that changes the outcome
+(model, categories, weights, top-n, threshold and whether scores are returned),
+expire after RESULT_CACHE_TTL_SECONDS, and are dropped as soon as the user's
+followings are re-synced by this process.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Tuple, Union
+
+from .settings import Settings, categories_hash
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def result_cache_key(user: str, settings: Settings) -> tuple:
+    return (
+        user,
+        settings.model_name,
+        categories_hash(settings.categories),
+        settings.self_weight,
+        settings.followings_weight,
+        settings.top_n_extractor,
+        settings.top_n_aggregator,
+        settings.similarity_threshold,
+        settings.return_scores,
+    )
+
+
+@dataclass
+class CachedResult:
+    interests: Union[List[str], List[Tuple[str, float]]]
+    synced_at: float | None
+    computed_at: float
+    etag: str
+
+
+def make_etag(key: tuple, interests, synced_at: float | None) -> str:
+    """
+    Weak validator over the cache key and the result. It is weak because the
+    response body also reports whether it was served from cache.
+    """
+    payload = json.dumps([list(key), interests, synced_at], default=str, separators=(",", ":"))
+    return 'W/"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+class ResultCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, CachedResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        logger.debug(f"Initialized ResultCache (ttl={ttl_seconds}s, max_entries={max_entries})")
+
+    def get(self, key: tuple) -> CachedResult | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.computed_at >= self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, interests, synced_at: float | None) -> CachedResult:
+        entry = CachedResult(interests, synced_at, time.time(), make_etag(key, interests, synced_at))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate_user(self, user: str) -> int:
+        """Drops every cached result for `user`, whatever settings produced it."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == user]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached results for user {user}")
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_result_cache: ResultCache | None = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache(settings: Settings) -> ResultCache | None:
+    """Returns the process-wide ResultCache, or None when it is disabled."""
+    global _result_cache
+    if not settings.result_cache_enabled:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                ttl_seconds=settings.result_cache_ttl_seconds,
+                max_entries=settings.result_cache_max_entries,
+            )
+        return _result_cache
+
+
+def invalidate_user_results(user: str) -> None:
+    """Called after a successful re-sync of `user`; a no-op if no cache was created."""
+    with _result_cache_lock:
+        cache = _result_cache
+    if cache is not None:
+        cache.invalidate_user(user)
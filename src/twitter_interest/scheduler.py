@@ -0,0 +1,186 @@
+"""
+Dynamic micro-batching of model calls across concurrent requests.
+
+Each model gets one scheduler thread. Callers enqueue the bios they need
+encoded and block on a future; the scheduler takes the oldest request, keeps
+collecting more until MICROBATCH_MAX_BATCH_SIZE bios are queued or the oldest
+has waited MICROBATCH_MAX_WAIT_MS, then runs the whole batch through the
+model at once and hands each caller back its own rows.
+"""
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .settings import Settings
+from .model_registry import get_model_registry
+from .encoding import encode_length_bucketed
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_DELAY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative `le` buckets."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class _Pending:
+    bios: list[str]
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class MicroBatchScheduler:
+    def __init__(self, settings: Settings, model_name: str):
+        self.settings = settings
+        self.model_name = model_name
+        self.max_batch_size = settings.microbatch_max_batch_size
+        self.max_wait = settings.microbatch_max_wait_ms / 1000
+        self.encode_batch_size = settings.encode_batch_size
+
+        self._queue: queue.Queue[_Pending] = queue.Queue()
+        # A request that didn't fit in the previous batch opens the next one
+        self._carry: _Pending | None = None
+        self._lock = threading.Lock()
+        self._pending_bios = 0
+
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.requests_per_batch = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delay = Histogram(QUEUE_DELAY_BUCKETS)
+
+        self._thread = threading.Thread(target=self._run, name=f"microbatch-{model_name}", daemon=True)
+        self._thread.start()
+        logger.debug(
+            f"Started micro-batch scheduler for {model_name} "
+            f"(max_batch_size={self.max_batch_size}, max_wait={self.max_wait * 1000:.1f}ms)"
+        )
+
+    def encode(self, bios: list[str]) -> np.ndarray:
+        """Encodes `bios` as part of a shared batch; blocks until its rows are ready."""
+        pending = _Pending(bios, Future())
+        with self._lock:
+            self._pending_bios += len(bios)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def _next_batch(self) -> list[_Pending]:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        batch, size = [first], len(first.bios)
+        deadline = first.enqueued_at + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(item.bios) > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item.bios)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self._execute(batch)
+            except Exception as e:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+
+    def _execute(self, batch: list[_Pending]) -> None:
+        started = time.monotonic()
+        bios = [bio for pending in batch for bio in pending.bios]
+        with self._lock:
+            self._pending_bios -= len(bios)
+            self.batches += 1
+            self.requests += len(batch)
+            self.batch_sizes.observe(len(bios))
+            self.requests_per_batch.observe(len(batch))
+            for pending in batch:
+                self.queue_delay.observe(started - pending.enqueued_at)
+
+        model = get_model_registry(self.settings).get_model(self.model_name)
+        embeddings = encode_length_bucketed(model, bios, self.encode_batch_size)
+        logger.debug(f"Encoded micro-batch of {len(bios)} bios from {len(batch)} requests")
+
+        offset = 0
+        for pending in batch:
+            pending.future.set_result(embeddings[offset:offset + len(pending.bios)])
+            offset += len(pending.bios)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize() + (1 if self._carry is not None else 0),
+                "queued_bios": self._pending_bios,
+                "batches": self.batches,
+                "requests": self.requests,
+                "batch_size": self.batch_sizes.as_dict(),
+                "requests_per_batch": self.requests_per_batch.as_dict(),
+                "queue_delay_seconds": self.queue_delay.as_dict(),
+            }
+
+
+_schedulers: dict[str, MicroBatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_inference_scheduler(settings: Settings) -> MicroBatchScheduler | None:
+    """
+    Returns the process-wide scheduler for `settings.model_name`, or None when
+    micro-batching is disabled.
+    """
+    if not settings.microbatch_enabled:
+        return None
+    with _schedulers_lock:
+        scheduler = _schedulers.get(settings.model_name)
+        if scheduler is None:
+            scheduler = MicroBatchScheduler(settings, settings.model_name)
+            _schedulers[settings.model_name] = scheduler
+        return scheduler
+
+
+def scheduler_stats() -> dict:
+    with _schedulers_lock:
+        schedulers = dict(_schedulers)
+    return {model_name: scheduler.stats() for model_name, scheduler in schedulers.items()}
@@ -1,61 +1,811 @@
-from typing import List, Tuple, Union
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Awaitable, Callable, Iterable, Iterator, List, Tuple, TypeVar, Union
 
-from .api_client import APIClient
-from .neo4j_client import Neo4jClient
+import numpy as np
+
+from .api_client import APIClient, AsyncAPIClient
+from .neo4j_client import AsyncNeo4jClient, Neo4jClient
 from .interest_extractor import InterestExtractor
 from .aggregation import InterestAggregator
+from .result_cache import get_result_cache, invalidate_user_results, make_etag, result_cache_key
+from .embedding_cache import bio_hash
+from .settings import categories_hash
+from .preprocessing import BIO_PREPROCESSING_VERSION
+from .metrics import record_inference
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+_DONE = object()
+
+_inference_executor: ThreadPoolExecutor | None = None
+_MICROBATCH_THREADS_PER_WORKER = 8
+_executor_lock = threading.Lock()
+
+# Users with a background re-sync in flight, and the asyncio tasks running them
+_background_syncs: set[str] = set()
+_background_tasks: set[asyncio.Task] = set()
+_background_lock = threading.Lock()
+
+DATA_SOURCE_FRESH = "fresh"
+DATA_SOURCE_CACHED = "cached"
+
 class UserNotFoundError(Exception):
     pass
 
-def infer_interests(username: str, settings) -> Union[List[str], List[Tuple[str, float]]]:
+@dataclass
+class SyncStatus:
+    """
+    Outcome of `ensure_synced`: whether the graph data is fresh from a sync
+    made for this request or cached from an earlier one, and when it was synced.
+    """
+    data_source: str
+    synced_at: float | None
+    result: dict | None = None
+    refreshing: bool = False
+
+@dataclass
+class InferenceResult:
+    interests: Union[List[str], List[Tuple[str, float]]]
+    data_source: str
+    synced_at: float | None
+    computed_at: float | None = None
+    etag: str | None = None
+
+@dataclass
+class StageTimings:
+    """
+    Wall-clock seconds spent in each stage of one inference, and its size.
+    Stages are "cache", "sync", "model", "fetch", "encode", "refresh",
+    "aggregate" and "total"; stages that overlap (syncing while the model
+    loads, fetching the next page while one is encoded) are timed as seen by
+    the request, so only time it actually waited on is counted.
+    """
+    seconds: dict[str, float] = field(default_factory=dict)
+    followings: int | None = None
+    bios_encoded: int | None = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    async def timed(self, stage: str, awaitable: Awaitable[T]) -> T:
+        """Awaits `awaitable`, timing it as `stage`; for stages that run under `asyncio.gather`."""
+        with self.stage(stage):
+            return await awaitable
+
+    def record(self) -> None:
+        """Adds this inference to the process-wide histograms exported by /metrics."""
+        record_inference(self.seconds, self.followings, self.bios_encoded)
+
+    def server_timing(self) -> str:
+        """The stages as a `Server-Timing` header value, in milliseconds."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.seconds.items())
+
+def _needs_sync(last_synced_at: float | None, settings, force_sync: bool) -> bool:
+    if force_sync or last_synced_at is None:
+        return True
+    return time.time() - last_synced_at >= settings.sync_ttl_seconds
+
+def _sync_succeeded(result) -> bool:
+    return not isinstance(result, dict) or result.get("status", "success") == "success"
+
+def _claim_background_sync(user: str) -> bool:
+    with _background_lock:
+        if user in _background_syncs:
+            return False
+        _background_syncs.add(user)
+        return True
+
+def _release_background_sync(user: str) -> None:
+    with _background_lock:
+        _background_syncs.discard(user)
+
+def _sync_now(api: APIClient, neo4j: Neo4jClient, user: str, last_synced_at: float | None) -> SyncStatus:
+    result = api.sync_user_followings(user)
+    synced_at = time.time()
+    if not _sync_succeeded(result):
+        return _failed_sync(user, last_synced_at, result)
+    neo4j.mark_synced(user, synced_at)
+    invalidate_user_results(user)
+    return SyncStatus(DATA_SOURCE_FRESH, synced_at, result)
+
+def _failed_sync(user: str, last_synced_at: float | None, result: dict) -> SyncStatus:
+    # The graph wasn't updated, so whatever it holds comes from the previous sync
+    logger.warning(f"Sync failed for user {user}, serving data from the previous sync: {result}")
+    return SyncStatus(DATA_SOURCE_CACHED, last_synced_at, result)
+
+def _background_sync(api: APIClient, neo4j: Neo4jClient, user: str, last_synced_at: float | None) -> None:
+    try:
+        if _sync_now(api, neo4j, user, last_synced_at).data_source == DATA_SOURCE_FRESH:
+            logger.info(f"Background re-sync completed for user {user}")
+    except Exception as e:
+        logger.error(f"Background re-sync failed for user {user}: {e}")
+    finally:
+        _release_background_sync(user)
+
+def ensure_synced(api: APIClient, neo4j: Neo4jClient, user: str, settings, force_sync: bool = False) -> SyncStatus:
+    """
+    Syncs the user's followings only if the last sync is older than
+    SYNC_TTL_SECONDS (or `force_sync` is set). With SYNC_BACKGROUND_REFRESH,
+    a stale user is served from the graph as-is and re-synced in the background.
+    """
+    last_synced_at = neo4j.get_last_synced_at(user)
+    if not _needs_sync(last_synced_at, settings, force_sync):
+        logger.info(f"Skipping sync for user {user}, last synced {time.time() - last_synced_at:.0f}s ago")
+        return SyncStatus(DATA_SOURCE_CACHED, last_synced_at)
+
+    if last_synced_at is not None and not force_sync and settings.sync_background_refresh:
+        if _claim_background_sync(user):
+            logger.info(f"Serving stale data for user {user}, re-syncing in the background")
+            threading.Thread(target=_background_sync, args=(api, neo4j, user, last_synced_at), daemon=True).start()
+        return SyncStatus(DATA_SOURCE_CACHED, last_synced_at, refreshing=True)
+
+    return _sync_now(api, neo4j, user, last_synced_at)
+
+def prefetch(iterable: Iterable[T]) -> Iterator[T]:
+    """
+    Iterates `iterable` on a background thread, fetching the next item while
+    the caller is still processing the current one.
+    """
+    iterator = iter(iterable)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as pool:
+        future = pool.submit(next, iterator, _DONE)
+        while True:
+            item = future.result()
+            if item is _DONE:
+                return
+            future = pool.submit(next, iterator, _DONE)
+            yield item
+
+def iter_following_pages(neo4j: Neo4jClient, user: str, first_page: list[dict], page_size: int) -> Iterator[list[dict]]:
+    """
+    Yields `first_page` (as returned by `get_user_with_followings`) followed by
+    the remaining pages of the user's followings.
+    """
+    yield first_page
+    if len(first_page) == page_size:
+        yield from neo4j.iter_followings_with_bios(user, page_size, after=first_page[-1]["username"])
+
+def _page_bios(page: list[dict], page_number: int, user_bio: str) -> List[str]:
+    """Bios to encode for one page; the user's bio rides along with the first page."""
+    bios = [f["bio"] for f in page]
+    return [user_bio] + bios if page_number == 0 else bios
+
+def _split_indices(
+    page_indices: List[np.ndarray], top_n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Splits per-page index matrices into the user's row and the followings' matrix."""
+    indices = np.concatenate(page_indices) if page_indices else np.full((1, top_n), -1)
+    return indices[0], indices[1:]
+
+def extract_interests_paged(
+    extractor: InterestExtractor,
+    user: str,
+    user_bio: str,
+    pages: Iterable[list[dict]],
+    timings: StageTimings | None = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extracts interests page by page, so only one page of bios and embeddings is
+    held at a time. The user's bio is encoded together with the first page.
+    Time spent waiting for a page is added to the "fetch" stage of `timings`,
+    time spent extracting to "encode".
+
+    Returns the user's category index row and the followings' category index
+    matrix, as produced by `InterestExtractor.extract_category_indices`.
+    """
+    timings = timings or StageTimings()
+    page_indices: List[np.ndarray] = []
+    pages = iter(pages)
+    page_number = 0
+    while True:
+        with timings.stage("fetch"):
+            page = next(pages, None)
+        if page is None:
+            break
+        with timings.stage("encode"):
+            page_indices.append(extractor.extract_category_indices(_page_bios(page, page_number, user_bio)))
+        logger.debug(f"[{user}] Extracted interests from page {page_number} ({len(page)} followings)")
+        page_number += 1
+    return _split_indices(page_indices, extractor.settings.top_n_extractor)
+
+def interest_config_hash(settings) -> str:
+    """Hash of the extraction settings that stored interests depend on, besides the model."""
+    return categories_hash(
+        [
+            *settings.categories,
+            f"top_n={settings.top_n_extractor}",
+            f"threshold={settings.similarity_threshold}",
+            f"preprocessing={BIO_PREPROCESSING_VERSION}",
+        ]
+    )
+
+def _stored_interests_fresh(state: dict, settings, config: str) -> bool:
+    """True if the user's followings were checked after their last sync, with the same settings."""
+    return (
+        state["checked_at"] is not None
+        and (state["last_synced_at"] is None or state["checked_at"] >= state["last_synced_at"])
+        and state["model"] == settings.model_name
+        and state["config"] == config
+        and state["bio_hash"] == bio_hash(state["bio"])
+    )
+
+def stale_interest_candidates(page: list[dict], settings, config: str) -> list[dict]:
+    return [
+        row for row in page
+        if row["model"] != settings.model_name or row["config"] != config or row["bio_hash"] != bio_hash(row["bio"])
+    ]
+
+def extract_interest_rows(settings, candidates: list[dict]) -> list[dict]:
+    """Extracts interests for `candidates` as rows for `Neo4jClient.store_interests`."""
+    extractor = InterestExtractor(settings)
+    indices, scores = extractor.extract_category_scores([c["bio"] for c in candidates])
+    rows = []
+    for candidate, index_row, score_row in zip(candidates, indices.tolist(), scores.tolist()):
+        matched = [(extractor.categories[i], score) for i, score in zip(index_row, score_row) if i >= 0]
+        rows.append({
+            "username": candidate["username"],
+            "bio": candidate["bio"],
+            "interests": [interest for interest, _ in matched],
+            "scores": [score for _, score in matched],
+            "bio_hash": bio_hash(candidate["bio"]),
+        })
+    return rows
+
+def _with_user_row(pages: Iterable[list[dict]], user_row: dict) -> Iterator[list[dict]]:
+    """Prepends the user's own row to the first page, so it is refreshed together with it."""
+    first = True
+    for page in pages:
+        yield [user_row, *page] if first else page
+        first = False
+    if first:
+        yield [user_row]
+
+def refresh_stored_interests(neo4j: Neo4jClient, user: str, settings) -> int:
+    """
+    Recomputes the interests stored on the user's node and their followings'
+    nodes where the bio, model or extraction settings changed. Stale
+    followings are picked out in Cypher, so only their bios are fetched. The
+    scan is skipped when nothing was re-synced since the user was last
+    checked. Returns how many nodes were recomputed.
+    """
+    state = neo4j.get_interest_state(user)
+    if state is None:
+        logger.error(f"User {user} not found in Neo4j")
+        raise UserNotFoundError(f"User {user} not found in Neo4j")
+    config = interest_config_hash(settings)
+    if _stored_interests_fresh(state, settings, config):
+        logger.info(f"Stored interests for user {user} and followings are up to date")
+        return 0
+
+    # Taken before the scan, so a re-sync that lands during it triggers another check
+    checked_at = time.time()
+    refreshed = 0
+    pages = neo4j.iter_interest_candidates(user, settings.followings_page_size, settings.model_name, config)
+    user_row = {"username": user, **state}
+    if stale_interest_candidates([user_row], settings, config):
+        pages = _with_user_row(pages, user_row)
+    for page in prefetch(pages):
+        neo4j.store_interests(extract_interest_rows(settings, page), settings.model_name, config)
+        refreshed += len(page)
+    neo4j.mark_interests_checked(user, checked_at)
+    logger.info(f"Recomputed stored interests for {refreshed} users in the network of {user}")
+    return refreshed
+
+def aggregate_stored_interests(counts: dict | None, user: str, settings):
+    """Ranks the result of `get_stored_interest_counts`, which was aggregated in Cypher."""
+    if counts is None:
+        logger.error(f"User {user} not found in Neo4j")
+        raise UserNotFoundError(f"User {user} not found in Neo4j")
+    logger.info(f"Found {counts['followings_total']} followings for user {user}")
+    aggregator = InterestAggregator(settings)
+    return aggregator.aggregate_counts(
+        counts["interests"], [(c["interest"], c["count"]) for c in counts["followings_counts"]]
+    )
+
+def infer_stored_interests(neo4j: Neo4jClient, user: str, settings, timings: StageTimings):
+    """
+    Infers the user's interests from the interests stored in the graph, after
+    recomputing the stale ones. Only new or changed bios are encoded; the
+    followings are counted in Cypher.
+    """
+    with timings.stage("refresh"):
+        timings.bios_encoded = refresh_stored_interests(neo4j, user, settings)
+    with timings.stage("fetch"):
+        counts = neo4j.get_stored_interest_counts(user)
+    with timings.stage("aggregate"):
+        result = aggregate_stored_interests(counts, user, settings)
+    timings.followings = counts["followings_total"]
+    return result
+
+def _record_total(timings: StageTimings, start: float) -> None:
+    timings.add("total", time.perf_counter() - start)
+    timings.record()
+
+def infer_interests(
+    username: str, settings, force_sync: bool = False, timings: StageTimings | None = None
+) -> Union[List[str], List[Tuple[str, float]]]:
+    """
+    Infers the user's interests from their followings' bios. The time spent
+    in each stage is added to `timings`, if given, and to the process-wide
+    metrics.
+    """
     user = username.lower()
     logger.info(f"Starting interest inference for user: {user}")
-    
+    timings = timings if timings is not None else StageTimings()
+    start = time.perf_counter()
+
     try:
-        # Sync user followings
-        logger.debug("Initializing API client for user sync")
+        logger.debug("Initializing API and Neo4j clients")
         api = APIClient(settings)
-        api.sync_user_followings(user)
-
-        # Get data from Neo4j
-        logger.debug("Initializing Neo4j client to fetch user data")
         neo4j = Neo4jClient(settings)
         try:
-            followings = neo4j.get_followings_with_bios(user)
-            if followings is None:
+            # Sync user followings unless they were synced recently
+            with timings.stage("sync"):
+                ensure_synced(api, neo4j, user, settings, force_sync=force_sync)
+
+            if settings.interest_store_enabled:
+                result = infer_stored_interests(neo4j, user, settings, timings)
+                logger.info(f"Successfully completed interest inference for user {user} from stored interests")
+                _record_total(timings, start)
+                return result
+
+            page_size = settings.followings_page_size
+            with timings.stage("fetch"):
+                profile = neo4j.get_user_with_followings(user, limit=page_size)
+            if profile is None:
                 logger.error(f"User {user} not found in Neo4j")
                 raise UserNotFoundError(f"User {user} not found in Neo4j")
-                
-            logger.info(f"Found {len(followings)} followings for user {user}")
-            
+
             # Extract interests
             logger.debug("Initializing interest extractor")
-            extractor = InterestExtractor(settings)
-            
-            user_bio = neo4j.get_user_bio(user)
-            user_interests = extractor.extract_interest_from_bio(user_bio, username=user)
-            logger.debug(f"Extracted {len(user_interests)} interests from user bio")
-            
-            followings_interests = [
-                extractor.extract_interest_from_bio(f["bio"], username=f["username"]) for f in followings
-            ]
-            logger.debug(f"Extracted interests from {len(followings_interests)} following bios")
-            
-            # Aggregate results
+            with timings.stage("model"):
+                extractor = InterestExtractor(settings)
+
+            # Stream the remaining pages of followings into batched encoding,
+            # fetching each next page while the current one is being encoded
+            pages = prefetch(iter_following_pages(neo4j, user, profile["followings"], page_size))
+            user_indices, followings_indices = extract_interests_paged(
+                extractor, user, profile["bio"], pages, timings
+            )
+            timings.followings, timings.bios_encoded = len(followings_indices), extractor.bios_encoded
+            logger.info(f"Found {len(followings_indices)} followings for user {user}")
+
+            # Aggregate results straight from the category index matrices
             logger.debug("Starting interest aggregation")
-            aggregator = InterestAggregator(settings)
-            result = aggregator.aggregate(user_interests, followings_interests)
-            
+            with timings.stage("aggregate"):
+                aggregator = InterestAggregator(settings)
+                result = aggregator.aggregate_indices(user_indices, followings_indices, extractor.categories)
+
             logger.info(f"Successfully completed interest inference for user {user}")
+            _record_total(timings, start)
             return result
-            
+
         finally:
             neo4j.close()
-            
+
+    except Exception as e:
+        logger.error(f"Error during interest inference for user {user}: {e}")
+        raise
+
+def get_inference_executor(settings) -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor for CPU-bound model work. It is bounded
+    to INFERENCE_WORKERS threads, so concurrent requests queue for the model
+    instead of piling onto the event loop or the default threadpool.
+
+    With micro-batching the model itself runs on the scheduler thread and these
+    threads mostly wait for their rows, so more of them are allowed in order to
+    let concurrent requests share a batch.
+    """
+    global _inference_executor
+    with _executor_lock:
+        if _inference_executor is None:
+            workers = settings.inference_workers
+            if settings.microbatch_enabled:
+                workers *= _MICROBATCH_THREADS_PER_WORKER
+            _inference_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        return _inference_executor
+
+async def run_inference(settings, fn: Callable[..., T], *args, **kwargs) -> T:
+    """Runs `fn` on the inference executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(settings), functools.partial(fn, *args, **kwargs))
+
+async def _aiter_following_pages(
+    neo4j: AsyncNeo4jClient, user: str, first_page: list[dict], page_size: int
+) -> AsyncGenerator[list[dict], None]:
+    """Async counterpart of `iter_following_pages`."""
+    yield first_page
+    if len(first_page) == page_size:
+        async for page in neo4j.iter_followings_with_bios(user, page_size, after=first_page[-1]["username"]):
+            yield page
+
+async def extract_interests_paged_async(
+    extractor: InterestExtractor,
+    user: str,
+    user_bio: str,
+    pages: AsyncGenerator[list[dict], None],
+    settings,
+    timings: StageTimings | None = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Async counterpart of `extract_interests_paged`: each page is encoded on the
+    inference executor while the next page is fetched from Neo4j.
+    """
+    timings = timings or StageTimings()
+    page_indices: List[np.ndarray] = []
+    next_page = asyncio.ensure_future(anext(pages, None))
+    try:
+        page_number = 0
+        while True:
+            with timings.stage("fetch"):
+                page = await next_page
+            if page is None:
+                break
+            next_page = asyncio.ensure_future(anext(pages, None))
+            bios = _page_bios(page, page_number, user_bio)
+            with timings.stage("encode"):
+                page_indices.append(await run_inference(settings, extractor.extract_category_indices, bios))
+            logger.debug(f"[{user}] Extracted interests from page {page_number} ({len(page)} followings)")
+            page_number += 1
+    finally:
+        if not next_page.done():
+            next_page.cancel()
+            try:
+                await next_page
+            except (asyncio.CancelledError, Exception):
+                pass
+        await pages.aclose()
+    return _split_indices(page_indices, extractor.settings.top_n_extractor)
+
+async def _sync_now_async(
+    api: AsyncAPIClient, neo4j: AsyncNeo4jClient, user: str, last_synced_at: float | None
+) -> SyncStatus:
+    result = await api.sync_user_followings(user)
+    synced_at = time.time()
+    if not _sync_succeeded(result):
+        return _failed_sync(user, last_synced_at, result)
+    await neo4j.mark_synced(user, synced_at)
+    invalidate_user_results(user)
+    return SyncStatus(DATA_SOURCE_FRESH, synced_at, result)
+
+async def _background_sync_async(
+    api: AsyncAPIClient, neo4j: AsyncNeo4jClient, user: str, last_synced_at: float | None
+) -> None:
+    try:
+        if (await _sync_now_async(api, neo4j, user, last_synced_at)).data_source == DATA_SOURCE_FRESH:
+            logger.info(f"Background re-sync completed for user {user}")
+    except Exception as e:
+        logger.error(f"Background re-sync failed for user {user}: {e}")
+    finally:
+        _release_background_sync(user)
+
+async def ensure_synced_async(
+    api: AsyncAPIClient, neo4j: AsyncNeo4jClient, user: str, settings, force_sync: bool = False
+) -> SyncStatus:
+    """Async counterpart of `ensure_synced`; background re-syncs run as event loop tasks."""
+    last_synced_at = await neo4j.get_last_synced_at(user)
+    if not _needs_sync(last_synced_at, settings, force_sync):
+        logger.info(f"Skipping sync for user {user}, last synced {time.time() - last_synced_at:.0f}s ago")
+        return SyncStatus(DATA_SOURCE_CACHED, last_synced_at)
+
+    if last_synced_at is not None and not force_sync and settings.sync_background_refresh:
+        if _claim_background_sync(user):
+            logger.info(f"Serving stale data for user {user}, re-syncing in the background")
+            task = asyncio.create_task(_background_sync_async(api, neo4j, user, last_synced_at))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return SyncStatus(DATA_SOURCE_CACHED, last_synced_at, refreshing=True)
+
+    return await _sync_now_async(api, neo4j, user, last_synced_at)
+
+def _store_result(cache, key: tuple, result, sync_status: SyncStatus) -> InferenceResult:
+    """Wraps a freshly computed result, storing it in the result cache when that is safe."""
+    # Don't cache results computed while a background re-sync is in flight: it
+    # may already have invalidated this user, and the result would outlive it
+    if cache is not None and not sync_status.refreshing:
+        entry = cache.put(key, result, sync_status.synced_at)
+        computed_at, etag = entry.computed_at, entry.etag
+    else:
+        computed_at, etag = time.time(), make_etag(key, result, sync_status.synced_at)
+    return InferenceResult(result, sync_status.data_source, sync_status.synced_at, computed_at, etag)
+
+async def refresh_stored_interests_async(neo4j: AsyncNeo4jClient, user: str, settings) -> int:
+    """Async counterpart of `refresh_stored_interests`; extraction runs on the inference executor."""
+    state = await neo4j.get_interest_state(user)
+    if state is None:
+        logger.error(f"User {user} not found in Neo4j")
+        raise UserNotFoundError(f"User {user} not found in Neo4j")
+    config = interest_config_hash(settings)
+    if _stored_interests_fresh(state, settings, config):
+        logger.info(f"Stored interests for user {user} and followings are up to date")
+        return 0
+
+    async def refresh_page(page: list[dict]) -> int:
+        rows = await run_inference(settings, extract_interest_rows, settings, page)
+        await neo4j.store_interests(rows, settings.model_name, config)
+        return len(page)
+
+    checked_at = time.time()
+    refreshed = 0
+    # The user's own row, if stale, rides along with the first page
+    pending = stale_interest_candidates([{"username": user, **state}], settings, config)
+    async for page in neo4j.iter_interest_candidates(user, settings.followings_page_size, settings.model_name, config):
+        refreshed += await refresh_page(pending + page)
+        pending = []
+    if pending:
+        refreshed += await refresh_page(pending)
+    await neo4j.mark_interests_checked(user, checked_at)
+    logger.info(f"Recomputed stored interests for {refreshed} users in the network of {user}")
+    return refreshed
+
+async def infer_stored_interests_async(neo4j: AsyncNeo4jClient, user: str, settings, timings: StageTimings):
+    """Async counterpart of `infer_stored_interests`."""
+    with timings.stage("refresh"):
+        timings.bios_encoded = await refresh_stored_interests_async(neo4j, user, settings)
+    with timings.stage("fetch"):
+        counts = await neo4j.get_stored_interest_counts(user)
+    with timings.stage("aggregate"):
+        result = aggregate_stored_interests(counts, user, settings)
+    timings.followings = counts["followings_total"]
+    return result
+
+async def infer_interests_async(
+    username: str, settings, force_sync: bool = False, timings: StageTimings | None = None
+) -> InferenceResult:
+    """
+    Async counterpart of `infer_interests` used by the API. Network and Neo4j
+    I/O run on the event loop; model loading and encoding run on the bounded
+    inference executor, overlapping with the I/O where they are independent.
+
+    Results are served from the result cache when possible; `force_sync`
+    bypasses it. The time spent in each stage is added to `timings`, if
+    given, and to the process-wide metrics.
+    """
+    user = username.lower()
+    logger.info(f"Starting interest inference for user: {user}")
+    timings = timings if timings is not None else StageTimings()
+    start = time.perf_counter()
+
+    cache = get_result_cache(settings)
+    key = result_cache_key(user, settings)
+    if cache is not None and not force_sync:
+        with timings.stage("cache"):
+            entry = cache.get(key)
+        if entry is not None:
+            logger.info(f"Serving cached interests for user {user}")
+            _record_total(timings, start)
+            return InferenceResult(entry.interests, DATA_SOURCE_CACHED, entry.synced_at, entry.computed_at, entry.etag)
+
+    try:
+        api = AsyncAPIClient(settings)
+        neo4j = AsyncNeo4jClient(settings)
+        try:
+            if settings.interest_store_enabled:
+                with timings.stage("sync"):
+                    sync_status = await ensure_synced_async(api, neo4j, user, settings, force_sync=force_sync)
+                result = await infer_stored_interests_async(neo4j, user, settings, timings)
+                logger.info(f"Successfully completed interest inference for user {user} from stored interests")
+                _record_total(timings, start)
+                return _store_result(cache, key, result, sync_status)
+
+            # Sync followings (if stale) while the extractor and its model load
+            sync_status, extractor = await asyncio.gather(
+                timings.timed("sync", ensure_synced_async(api, neo4j, user, settings, force_sync=force_sync)),
+                timings.timed("model", run_inference(settings, InterestExtractor, settings)),
+            )
+
+            page_size = settings.followings_page_size
+            with timings.stage("fetch"):
+                profile = await neo4j.get_user_with_followings(user, limit=page_size)
+            if profile is None:
+                logger.error(f"User {user} not found in Neo4j")
+                raise UserNotFoundError(f"User {user} not found in Neo4j")
+
+            pages = _aiter_following_pages(neo4j, user, profile["followings"], page_size)
+            user_indices, followings_indices = await extract_interests_paged_async(
+                extractor, user, profile["bio"], pages, settings, timings
+            )
+            timings.followings, timings.bios_encoded = len(followings_indices), extractor.bios_encoded
+            logger.info(f"Found {len(followings_indices)} followings for user {user}")
+
+            with timings.stage("aggregate"):
+                aggregator = InterestAggregator(settings)
+                result = aggregator.aggregate_indices(user_indices, followings_indices, extractor.categories)
+
+            logger.info(f"Successfully completed interest inference for user {user} ({sync_status.data_source} data)")
+            _record_total(timings, start)
+            return _store_result(cache, key, result, sync_status)
+
+        finally:
+            await neo4j.close()
+
     except Exception as e:
         logger.error(f"Error during interest inference for user {user}: {e}")
         raise
+
+@dataclass
+class BatchInferenceResult:
+    """
+    Outcome of `infer_interests_batch_async`: a result or an exception for
+    every requested user, plus how much work deduplication saved.
+    """
+    results: dict[str, Union[InferenceResult, Exception]]
+    followings_total: int = 0
+    # Left at 0 when the interest store is enabled, where followings aren't loaded
+    unique_followings: int = 0
+    unique_bios: int = 0
+
+async def _fetch_profile(neo4j: AsyncNeo4jClient, user: str, page_size: int) -> dict:
+    """The user's bio and all of their followings, fetched page by page."""
+    profile = await neo4j.get_user_with_followings(user, limit=page_size)
+    if profile is None:
+        logger.error(f"User {user} not found in Neo4j")
+        raise UserNotFoundError(f"User {user} not found in Neo4j")
+    followings = list(profile["followings"])
+    if len(followings) == page_size:
+        async for page in neo4j.iter_followings_with_bios(user, page_size, after=followings[-1]["username"]):
+            followings.extend(page)
+    return {"bio": profile["bio"], "followings": followings}
+
+async def infer_interests_batch_async(
+    usernames: List[str], settings, force_sync: bool = False
+) -> BatchInferenceResult:
+    """
+    Infers interests for many users at once. Users are synced and fetched
+    concurrently; their followings are deduplicated across the batch so each
+    unique bio is encoded once, then interests are aggregated per user. With
+    the interest store enabled, each user goes through
+    `infer_stored_interests_async` instead. Every computed user's stage
+    timings are added to the process-wide metrics.
+
+    A failure for one user (not found, sync error, ...) is returned as that
+    user's result instead of failing the batch.
+    """
+    users = list(dict.fromkeys(username.lower() for username in usernames))
+    logger.info(f"Starting batch interest inference for {len(users)} users")
+    batch = BatchInferenceResult(results={})
+
+    cache = get_result_cache(settings)
+    keys = {user: result_cache_key(user, settings) for user in users}
+    pending = []
+    for user in users:
+        entry = cache.get(keys[user]) if cache is not None and not force_sync else None
+        if entry is not None:
+            batch.results[user] = InferenceResult(
+                entry.interests, DATA_SOURCE_CACHED, entry.synced_at, entry.computed_at, entry.etag
+            )
+        else:
+            pending.append(user)
+    if not pending:
+        return batch
+
+    try:
+        await _infer_pending_batch(batch, pending, keys, cache, settings, force_sync)
+    finally:
+        # Report users in the order they were requested
+        batch.results = {user: batch.results[user] for user in users if user in batch.results}
+    return batch
+
+def _batch_outcomes(batch: BatchInferenceResult, users: List[str], outcomes: list) -> dict:
+    """Records the users whose outcome is an exception as failed; returns the others' outcomes."""
+    succeeded = {}
+    for user, outcome in zip(users, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Batch inference failed for user {user}: {outcome}")
+            batch.results[user] = outcome
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            succeeded[user] = outcome
+    return succeeded
+
+async def _infer_pending_batch(
+    batch: BatchInferenceResult, pending: List[str], keys: dict, cache, settings, force_sync: bool
+) -> None:
+    """Computes results for the users of a batch that weren't in the result cache."""
+    api = AsyncAPIClient(settings)
+    neo4j = AsyncNeo4jClient(settings)
+    start = time.perf_counter()
+    timings = {user: StageTimings() for user in pending}
+    try:
+        if settings.interest_store_enabled:
+            synced = await asyncio.gather(
+                *(
+                    timings[user].timed("sync", ensure_synced_async(api, neo4j, user, settings, force_sync=force_sync))
+                    for user in pending
+                ),
+                return_exceptions=True,
+            )
+            # One user at a time, so a following shared by several of them is recomputed once
+            for user, sync_status in _batch_outcomes(batch, pending, synced).items():
+                try:
+                    result = await infer_stored_interests_async(neo4j, user, settings, timings[user])
+                except Exception as e:
+                    logger.error(f"Batch inference failed for user {user}: {e}")
+                    batch.results[user] = e
+                    continue
+                batch.followings_total += timings[user].followings
+                _record_total(timings[user], start)
+                batch.results[user] = _store_result(cache, keys[user], result, sync_status)
+            logger.info(f"Completed batch interest inference for {len(pending)} uncached users from stored interests")
+            return
+
+        page_size = settings.followings_page_size
+        # Model loading and encoding are shared by the whole batch, so every user waited on them
+        shared = StageTimings()
+
+        async def sync_and_fetch(user: str) -> Tuple[SyncStatus, dict]:
+            sync_status = await timings[user].timed(
+                "sync", ensure_synced_async(api, neo4j, user, settings, force_sync=force_sync)
+            )
+            return sync_status, await timings[user].timed("fetch", _fetch_profile(neo4j, user, page_size))
+
+        # Sync and fetch every user while the extractor and its model load
+        extractor, *fetched = await asyncio.gather(
+            shared.timed("model", run_inference(settings, InterestExtractor, settings)),
+            *(sync_and_fetch(user) for user in pending),
+            return_exceptions=True,
+        )
+        if isinstance(extractor, BaseException):
+            raise extractor
+
+        profiles: dict[str, Tuple[SyncStatus, dict]] = _batch_outcomes(batch, pending, fetched)
+
+        # Deduplicate bios across the batch; shared followings collapse to one row
+        rows: dict[str, int] = {}
+        following_bios: dict[str, str] = {}
+        for _, profile in profiles.values():
+            rows.setdefault(profile["bio"], len(rows))
+            for f in profile["followings"]:
+                following_bios[f["username"]] = f["bio"]
+                rows.setdefault(f["bio"], len(rows))
+                batch.followings_total += 1
+        batch.unique_followings = len(following_bios)
+        batch.unique_bios = len(rows)
+        logger.info(
+            f"Batch of {len(profiles)} users has {batch.followings_total} followings, "
+            f"{batch.unique_followings} unique accounts and {batch.unique_bios} unique bios"
+        )
+
+        unique_bios = list(rows)
+        with shared.stage("encode"):
+            chunks = [
+                await run_inference(settings, extractor.extract_category_indices, unique_bios[offset:offset + page_size])
+                for offset in range(0, len(unique_bios), page_size)
+            ]
+        indices = np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.int64)
+
+        aggregator = InterestAggregator(settings)
+        for user, (sync_status, profile) in profiles.items():
+            with timings[user].stage("aggregate"):
+                followings_rows = [rows[f["bio"]] for f in profile["followings"]]
+                result = aggregator.aggregate_indices(
+                    indices[rows[profile["bio"]]], indices[followings_rows], extractor.categories
+                )
+            for stage, seconds in shared.seconds.items():
+                timings[user].add(stage, seconds)
+            # Bios encoded are counted for the batch as a whole (unique_bios), not per user
+            timings[user].followings = len(profile["followings"])
+            _record_total(timings[user], start)
+            batch.results[user] = _store_result(cache, keys[user], result, sync_status)
+
+        logger.info(f"Completed batch interest inference for {len(profiles)}/{len(pending)} uncached users")
+    finally:
+        await neo4j.close()
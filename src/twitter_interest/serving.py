@@ -0,0 +1,54 @@
+"""
+Preload-before-fork serving.
+
+With several uvicorn workers, each worker loads its own copy of the model.
+Under gunicorn with `twitter_interest.gunicorn_conf`, the master loads the
+default model and the category embeddings once, before forking. The workers
+then share those pages copy-on-write:
+
+- The weights are frozen (eval mode, no gradients), so inference never writes
+  to them.
+- `gc.freeze()` moves every object loaded so far out of the collector's
+  reach, so collections in the workers don't dirty their pages either.
+
+The master runs torch on a single thread. An OpenMP thread pool started
+before fork is unusable in the children, which hang on their first parallel
+op. Each worker sets its own thread count after the fork.
+"""
+import gc
+import os
+import time
+
+from .settings import Settings
+from .model_registry import get_model_registry
+from .taxonomy import with_current_taxonomy
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def preload_for_fork(settings: Settings) -> None:
+    """Loads the default model and category embeddings in the master, ready to be shared by forked workers."""
+    import torch
+
+    torch.set_num_threads(1)
+    start = time.perf_counter()
+    settings = with_current_taxonomy(settings)
+    registry = get_model_registry(settings)
+    registry.get_model(settings.model_name)
+    registry.get_category_embeddings(settings.model_name, settings.categories)
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        f"Preloaded {settings.model_name} and {len(settings.categories)} category embeddings "
+        f"in {time.perf_counter() - start:.2f}s; {gc.get_freeze_count()} objects frozen for the workers"
+    )
+
+
+def configure_worker(workers: int) -> None:
+    """Gives a forked worker its share of the cores for torch's intra-op threads."""
+    import torch
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+    logger.info(f"Worker {os.getpid()} using {threads} torch threads")
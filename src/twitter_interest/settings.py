@@ -1,6 +1,8 @@
+import hashlib
+import json
 from functools import lru_cache
 from typing import List
-from pydantic import Field, SecretStr
+from pydantic import Field, SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 
@@ -13,15 +15,44 @@ class Settings(BaseSettings):
     neo4j_uri: str = Field(default=..., validation_alias="NEO4J_URI")
     neo4j_user: str = Field(default=..., validation_alias="NEO4J_USERNAME")
     neo4j_password: SecretStr = Field(default=..., validation_alias="NEO4J_PASSWORD")
+    neo4j_max_connection_pool_size: int = Field(
+        default=100, gt=0, validation_alias="NEO4J_MAX_CONNECTION_POOL_SIZE"
+    )
+    neo4j_connection_acquisition_timeout: float = Field(
+        default=60.0, gt=0, validation_alias="NEO4J_CONNECTION_ACQUISITION_TIMEOUT"
+    )
+    followings_page_size: int = Field(default=1000, gt=0, validation_alias="FOLLOWINGS_PAGE_SIZE")
 
     # Sync API
+    # Read timeout of /api/sync; syncs of large accounts can take minutes, and the circuit breaker is what fails fast
     api_timeout: float = Field(default=300.0, validation_alias="API_TIMEOUT_SECONDS")
+    api_store_timeout: float = Field(default=30.0, validation_alias="API_STORE_TIMEOUT_SECONDS")
+    api_mutual_timeout: float = Field(default=30.0, validation_alias="API_MUTUAL_TIMEOUT_SECONDS")
+    api_connect_timeout: float = Field(default=5.0, validation_alias="API_CONNECT_TIMEOUT_SECONDS")
+    api_pool_size: int = Field(default=20, gt=0, validation_alias="API_POOL_SIZE")
+    api_max_retries: int = Field(default=2, ge=0, validation_alias="API_MAX_RETRIES")
+    api_backoff_base: float = Field(default=0.5, ge=0, validation_alias="API_BACKOFF_BASE_SECONDS")
+    api_backoff_max: float = Field(default=8.0, ge=0, validation_alias="API_BACKOFF_MAX_SECONDS")
+    circuit_breaker_failure_threshold: int = Field(
+        default=5, gt=0, validation_alias="CIRCUIT_BREAKER_FAILURE_THRESHOLD"
+    )
+    circuit_breaker_reset_timeout: float = Field(
+        default=30.0, gt=0, validation_alias="CIRCUIT_BREAKER_RESET_SECONDS"
+    )
     network_sync_url: str = Field(
         default="http://localhost:4000",
         validation_alias="NETWORK_SYNC_URL",
         description="Base URL for your Network Sync Express API",
     )
 
+    # Freshness: skip re-syncing users synced within the TTL
+    sync_ttl_seconds: float = Field(default=900.0, ge=0, validation_alias="SYNC_TTL_SECONDS")
+    sync_background_refresh: bool = Field(
+        default=False,
+        validation_alias="SYNC_BACKGROUND_REFRESH",
+        description="Serve stale graph data immediately and re-sync the user in the background",
+    )
+
     # Interest extraction
     model_name: str = Field(
         # default="all-MiniLM-L6-v2", validation_alias="INTEREST_MODEL_NAME"
@@ -58,17 +89,124 @@ class Settings(BaseSettings):
         ],
         validation_alias="INTEREST_CATEGORIES",
     )
+    categories_file: str | None = Field(
+        default=None,
+        validation_alias="CATEGORIES_FILE",
+        description="Category list, one per line (or a JSON array); overrides INTEREST_CATEGORIES and is watched by the API",
+    )
+    categories_watch_seconds: float = Field(default=5.0, gt=0, validation_alias="CATEGORIES_WATCH_SECONDS")
+    category_cache_dir: str = Field(default=".cache/categories", validation_alias="CATEGORY_CACHE_DIR")
     similarity_threshold: float = Field(
         gt=0.0, lt=1.0, default=0.4, validation_alias="SIMILARITY_THRESHOLD"
     )
     top_n_extractor: int = Field(default=3, validation_alias="TOP_N_EXTRACTOR")
     return_scores: bool = Field(default=False, validation_alias="RETURN_SCORES")
+    encode_batch_size: int = Field(default=64, gt=0, validation_alias="ENCODE_BATCH_SIZE")
+    bio_max_seq_length: int = Field(
+        default=128,
+        gt=0,
+        validation_alias="BIO_MAX_SEQ_LENGTH",
+        description="Token limit bios are truncated to; can only lower the model's own limit",
+    )
+    encode_processes: int = Field(
+        default=0,
+        ge=0,
+        validation_alias="ENCODE_PROCESSES",
+        description="Worker processes for sharded encoding of large inputs; 0 encodes in-process",
+    )
+    # Inputs are paged by FOLLOWINGS_PAGE_SIZE before they reach the encoder, so this has to stay below it
+    encode_processes_min_bios: int = Field(
+        default=256,
+        gt=0,
+        validation_alias="ENCODE_PROCESSES_MIN_BIOS",
+        description="Inputs with fewer bios are encoded in-process even when ENCODE_PROCESSES is set",
+    )
+    # The result cache, PUT /admin/categories and /metrics are per worker process;
+    # see "Multi-worker serving" in the README before raising this
+    serve_workers: int = Field(
+        default=1,
+        gt=0,
+        validation_alias="SERVE_WORKERS",
+        description="API worker processes forked from a preloaded master by gunicorn_conf",
+    )
+    serve_bind: str = Field(default="0.0.0.0:8000", validation_alias="SERVE_BIND")
+    inference_workers: int = Field(
+        default=2,
+        gt=0,
+        validation_alias="INFERENCE_WORKERS",
+        description="Threads running model inference for the async API",
+    )
+    microbatch_enabled: bool = Field(
+        default=True,
+        validation_alias="MICROBATCH_ENABLED",
+        description="Coalesce model calls from concurrent requests into shared batches",
+    )
+    microbatch_max_batch_size: int = Field(default=256, gt=0, validation_alias="MICROBATCH_MAX_BATCH_SIZE")
+    microbatch_max_wait_ms: float = Field(
+        default=5.0,
+        ge=0,
+        validation_alias="MICROBATCH_MAX_WAIT_MS",
+        description="How long the oldest queued request may wait for others to join its batch",
+    )
+    warmup_on_startup: bool = Field(
+        default=True,
+        validation_alias="WARMUP_ON_STARTUP",
+        description="Load the default model in the background when the API starts; /ready reports when it is done",
+    )
+    interest_store_enabled: bool = Field(
+        default=False,
+        validation_alias="INTEREST_STORE_ENABLED",
+        description="Persist extracted interests on :User nodes and aggregate followings in Cypher",
+    )
+    model_cache_max_mb: int = Field(
+        default=2048,
+        gt=0,
+        validation_alias="MODEL_CACHE_MAX_MB",
+        description="Memory cap for models kept resident by the model registry",
+    )
+
+    # Bio embedding cache
+    embedding_cache_enabled: bool = Field(default=True, validation_alias="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_dir: str = Field(default=".cache/embeddings", validation_alias="EMBEDDING_CACHE_DIR")
+    embedding_cache_max_entries: int = Field(
+        default=500_000, gt=0, validation_alias="EMBEDDING_CACHE_MAX_ENTRIES"
+    )
+    embedding_cache_memory_entries: int = Field(
+        default=50_000, gt=0, validation_alias="EMBEDDING_CACHE_MEMORY_ENTRIES"
+    )
+
+    # Inference result cache (API)
+    result_cache_enabled: bool = Field(default=True, validation_alias="RESULT_CACHE_ENABLED")
+    result_cache_ttl_seconds: float = Field(
+        default=300.0,
+        gt=0,
+        validation_alias="RESULT_CACHE_TTL_SECONDS",
+        description="How long /interests results are reused; keep it at or below SYNC_TTL_SECONDS",
+    )
+    result_cache_max_entries: int = Field(default=10_000, gt=0, validation_alias="RESULT_CACHE_MAX_ENTRIES")
+
+    # Batch inference (API)
+    batch_max_usernames: int = Field(
+        default=50, gt=0, validation_alias="BATCH_MAX_USERNAMES", description="Limit for POST /interests/batch"
+    )
 
     # Aggregator
     self_weight: float = Field(default=0.2, validation_alias="SELF_WEIGHT")
     followings_weight: float = Field(default=0.8, validation_alias="FOLLOWINGS_WEIGHT")
     top_n_aggregator: int = Field(default=5, validation_alias="TOP_N_AGGREGATOR")
 
+    # Admin endpoints (API); disabled while unset
+    admin_token: SecretStr | None = Field(default=None, validation_alias="ADMIN_TOKEN")
+
+    # On-demand profiling of single requests (admin only) and `analyze --profile`
+    profile_sample_interval_ms: float = Field(
+        default=5.0,
+        gt=0,
+        validation_alias="PROFILE_SAMPLE_INTERVAL_MS",
+        description="How often the sampling profiler snapshots thread stacks",
+    )
+    profile_dir: str = Field(default="profiles", validation_alias="PROFILE_DIR")
+
     # Logging
     log_level: str = Field(default="INFO", validation_alias="LOG_LEVEL")
     log_file: str | None = Field(default=None, validation_alias="LOG_FILE")
@@ -77,6 +215,43 @@ class Settings(BaseSettings):
     max_log_file_size: str = Field(default="10 MB", validation_alias="MAX_LOG_FILE_SIZE")
     log_retention: str = Field(default="7 days", validation_alias="LOG_RETENTION")
 
+    @model_validator(mode="after")
+    def _load_categories_file(self) -> "Settings":
+        if self.categories_file:
+            self.categories = read_categories_file(self.categories_file)
+        return self
+
+    @model_validator(mode="after")
+    def _check_encode_processes_min_bios(self) -> "Settings":
+        # No single encode is larger than a page, so a higher threshold would never use the pool
+        if self.encode_processes and self.encode_processes_min_bios > self.followings_page_size:
+            raise ValueError(
+                f"ENCODE_PROCESSES_MIN_BIOS ({self.encode_processes_min_bios}) must not exceed "
+                f"FOLLOWINGS_PAGE_SIZE ({self.followings_page_size}) when ENCODE_PROCESSES is set"
+            )
+        return self
+
+
+def categories_hash(categories: list[str]) -> str:
+    """Stable hash of an ordered category list."""
+    return hashlib.sha256("\n".join(categories).encode("utf-8")).hexdigest()
+
+
+def read_categories_file(path: str | Path) -> List[str]:
+    """
+    Reads a category list: a JSON array, or one category per line with blank
+    lines and '#' comments skipped. Duplicates are dropped, keeping order.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    if text.lstrip().startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [line for line in text.splitlines() if not line.strip().startswith("#")]
+    categories = list(dict.fromkeys(entry.strip() for entry in entries if entry.strip()))
+    if not categories:
+        raise ValueError(f"No categories found in {path}")
+    return categories
+
 
 @lru_cache()
 def get_settings() -> Settings:
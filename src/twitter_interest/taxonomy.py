@@ -0,0 +1,133 @@
+"""
+Hot-reloadable category taxonomy for the API.
+
+The category list starts out as `settings.categories` (INTEREST_CATEGORIES or
+CATEGORIES_FILE) and can be replaced at runtime through PUT /admin/categories
+or by editing CATEGORIES_FILE, which a background thread polls. A new list is
+fully encoded, re-using the embeddings of categories that were already known,
+before it is swapped in with a single reference assignment. Each request takes
+a snapshot of the taxonomy when it starts (`with_current_taxonomy`), so
+requests already in flight finish with the list they started with.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from .settings import Settings, categories_hash, read_categories_file
+from .model_registry import get_model_registry
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    categories: tuple[str, ...]
+    version: str
+    loaded_at: float
+    source: str
+
+    def as_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "categories": list(self.categories),
+            "loaded_at": self.loaded_at,
+            "source": self.source,
+        }
+
+
+def _make_taxonomy(categories: list[str], source: str) -> Taxonomy:
+    categories = list(dict.fromkeys(category.strip() for category in categories if category.strip()))
+    if not categories:
+        raise ValueError("The category list is empty")
+    return Taxonomy(tuple(categories), categories_hash(categories), time.time(), source)
+
+
+_taxonomy: Taxonomy | None = None
+_taxonomy_lock = threading.Lock()
+# Serializes updates, so two reloads can't interleave their encoding and swap
+_update_lock = threading.Lock()
+
+
+def get_taxonomy(settings: Settings) -> Taxonomy:
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = _make_taxonomy(settings.categories, settings.categories_file or "settings")
+        return _taxonomy
+
+
+def with_current_taxonomy(settings: Settings) -> Settings:
+    """Per-request copy of `settings` carrying the category list in effect right now."""
+    return settings.model_copy(update={"categories": list(get_taxonomy(settings).categories)})
+
+
+def update_taxonomy(settings: Settings, categories: list[str], source: str) -> tuple[Taxonomy, list[str], list[str]]:
+    """
+    Encodes `categories` for every resident model and then makes them the
+    current taxonomy. Returns the new taxonomy and the added and removed
+    categories.
+    """
+    global _taxonomy
+    taxonomy = _make_taxonomy(categories, source)
+    with _update_lock:
+        current = get_taxonomy(settings)
+        added = [category for category in taxonomy.categories if category not in current.categories]
+        removed = [category for category in current.categories if category not in taxonomy.categories]
+        if taxonomy.categories == current.categories:
+            return current, added, removed
+
+        # Encode before swapping, so no request ever waits on the new categories
+        registry = get_model_registry(settings)
+        for model_name in dict.fromkeys([settings.model_name, *registry.stats()["models"]]):
+            registry.get_category_embeddings(model_name, list(taxonomy.categories))
+
+        with _taxonomy_lock:
+            _taxonomy = taxonomy
+    logger.info(
+        f"Category taxonomy {current.version[:12]} -> {taxonomy.version[:12]} from {source}: "
+        f"{len(added)} added, {len(removed)} removed, {len(taxonomy.categories)} total"
+    )
+    return taxonomy, added, removed
+
+
+class CategoriesFileWatcher:
+    """Polls CATEGORIES_FILE and reloads the taxonomy when its contents change."""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.path = settings.categories_file
+        self.interval = settings.categories_watch_seconds
+        self._stop = threading.Event()
+        self._mtime = self._stat()
+        self._thread = threading.Thread(target=self._run, name="categories-watcher", daemon=True)
+
+    def _stat(self) -> int | None:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def start(self) -> None:
+        logger.info(f"Watching {self.path} for category changes every {self.interval}s")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1)
+
+    def check(self) -> None:
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            update_taxonomy(self.settings, read_categories_file(self.path), source=self.path)
+        except Exception as e:
+            # A half-written or invalid file keeps the current taxonomy in place
+            logger.error(f"Failed to reload categories from {self.path}: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
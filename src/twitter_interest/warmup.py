@@ -0,0 +1,102 @@
+"""
+Model warm-up for fast API startup.
+
+Importing the API no longer imports torch or sentence-transformers; the
+default model is loaded in a background thread started by the app's
+lifespan, so the server accepts connections (and answers /health) right away
+while /ready reports 503 until the model and the category embeddings are
+resident. `warm_up` times each stage, which the startup benchmark reports.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .settings import Settings
+from .model_registry import get_model_registry
+from .encoding import encode_length_bucketed
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+WARMUP_STAGES = ("import", "model", "categories", "first_encode")
+
+
+def warm_up(settings: Settings) -> dict[str, float]:
+    """
+    Imports the ML stack, loads `settings.model_name`, encodes the categories
+    and runs one forward pass. Returns the seconds spent in each stage.
+    """
+    stage_seconds: dict[str, float] = {}
+
+    start = time.perf_counter()
+    import sentence_transformers  # noqa: F401
+    stage_seconds["import"] = time.perf_counter() - start
+
+    registry = get_model_registry(settings)
+    start = time.perf_counter()
+    model = registry.get_model(settings.model_name)
+    stage_seconds["model"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    registry.get_category_embeddings(settings.model_name, settings.categories)
+    stage_seconds["categories"] = time.perf_counter() - start
+
+    # The first forward pass pays for lazy kernel and allocator setup
+    start = time.perf_counter()
+    encode_length_bucketed(model, ["warming up"], batch_size=1)
+    stage_seconds["first_encode"] = time.perf_counter() - start
+    return stage_seconds
+
+
+@dataclass
+class WarmupState:
+    status: str = "pending"  # pending, running, done or failed
+    error: str | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stage_seconds": {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+        }
+
+
+_state = WarmupState()
+_state_lock = threading.Lock()
+
+
+def warmup_state() -> WarmupState:
+    return _state
+
+
+def start_warmup(settings: Settings) -> threading.Thread:
+    """Runs `warm_up` in a daemon thread, recording its progress in `warmup_state()`."""
+
+    def run() -> None:
+        with _state_lock:
+            _state.status, _state.started_at = "running", time.time()
+        logger.info(f"Warming up model {settings.model_name}")
+        try:
+            stage_seconds = warm_up(settings)
+        except Exception as e:
+            logger.error(f"Model warm-up failed: {e}")
+            with _state_lock:
+                _state.status, _state.error, _state.finished_at = "failed", f"{type(e).__name__}: {e}", time.time()
+            return
+        with _state_lock:
+            _state.status, _state.stage_seconds, _state.finished_at = "done", stage_seconds, time.time()
+        logger.info(f"Model warm-up finished in {sum(stage_seconds.values()):.2f}s: {_state.as_dict()['stage_seconds']}")
+
+    thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready(settings: Settings) -> bool:
+    """True once `settings.model_name` and the embeddings of `settings.categories` are resident."""
+    return get_model_registry(settings).is_resident(settings.model_name, settings.categories)
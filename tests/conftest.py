@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubSyncServer:
+    """
+    Local stand-in for the Network Sync API. Responses are queued per path as
+    (status, body) or (status, body, delay_seconds); once a queue is empty the
+    path answers 200 with {"status": "success"}.
+    """
+
+    def __init__(self):
+        self.responses: dict[str, list[tuple]] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.client_ports: set[int] = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                path = self.path.split("?")[0]
+                stub.requests.append((self.command, path))
+                stub.client_ports.add(self.client_address[1])
+                queued = stub.responses.get(path) or []
+                status, body, *delay = queued.pop(0) if queued else (200, {"status": "success"})
+                if delay:
+                    time.sleep(delay[0])
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def queue(self, path: str, *responses: tuple):
+        self.responses.setdefault(path, []).extend(responses)
+
+    def calls(self, path: str) -> int:
+        return sum(1 for _, p in self.requests if p == path)
+
+
+@pytest.fixture
+def sync_server():
+    server = StubSyncServer()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_result_cache():
+    """The result cache is process-wide; keep cached results from leaking between tests."""
+    from twitter_interest import result_cache
+    result_cache._result_cache = None
+    yield
+    result_cache._result_cache = None
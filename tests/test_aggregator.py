@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from twitter_interest.aggregation import InterestAggregator
 from twitter_interest.settings import Settings
@@ -83,4 +84,29 @@ def test_only_followings_interests(settings):
 
     result = agg.aggregate(user_interests, followings, return_scores=True)
     assert isinstance(result[0], tuple)
-    assert result[0][1] > result[1][1] # type: ignore
\ No newline at end of file
+    assert result[0][1] > result[1][1] # type: ignore
+
+
+def test_aggregate_indices_matches_aggregate(settings):
+    categories = ["a", "b", "c", "d"]
+    user_indices = np.array([1, 0, -1])
+    followings_indices = np.array([[2, 3, -1], [3, 2, 1], [-1, -1, -1], [0, 3, -1]])
+    user_interests = ["b", "a"]
+    followings = [["c", "d"], ["d", "c", "b"], [], ["a", "d"]]
+
+    agg = InterestAggregator(settings)
+    for top_n in (1, 2, 3, 4):
+        expected = agg.aggregate(user_interests, followings, top_n=top_n, return_scores=True)
+        fused = agg.aggregate_indices(user_indices, followings_indices, categories, top_n=top_n, return_scores=True)
+        assert fused == expected
+
+def test_aggregate_counts_matches_aggregate(settings):
+    user_interests = ["b", "a"]
+    followings = [["c", "d"], ["d", "c", "b"], [], ["a", "d"]]
+    # (interest, count) in first-seen order, as counted by the Cypher aggregation
+    followings_counts = [("c", 2), ("d", 3), ("b", 1), ("a", 1)]
+
+    agg = InterestAggregator(settings)
+    for top_n in (1, 2, 3, 4):
+        expected = agg.aggregate(user_interests, followings, top_n=top_n, return_scores=True)
+        assert agg.aggregate_counts(user_interests, followings_counts, top_n=top_n, return_scores=True) == expected
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+import requests
+from twitter_interest.api_client import APIClient, AsyncAPIClient, CircuitOpenError, close_async_http_client
+from twitter_interest.settings import Settings
+
+@pytest.fixture
+def settings(monkeypatch, sync_server):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setenv("NETWORK_SYNC_URL", sync_server.url)
+    monkeypatch.setenv("API_BACKOFF_BASE_SECONDS", "0.01")
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3")
+    return Settings()
+
+def test_connections_reused_across_clients(settings, sync_server):
+    APIClient(settings).sync_user_followings("alice")
+    APIClient(settings).sync_user_followings("bob")
+    assert sync_server.calls("/api/sync") == 2
+    assert len(sync_server.client_ports) == 1
+
+def test_idempotent_get_retried_on_5xx(settings, sync_server):
+    sync_server.queue("/api/mutual", (503, {}), (502, {}))
+    result = APIClient(settings).get_mutual_followings("alice", "bob")
+    assert result == {"status": "success"}
+    assert sync_server.calls("/api/mutual") == 3
+
+def test_post_not_retried(settings, sync_server):
+    sync_server.queue("/api/sync", (503, {}))
+    with pytest.raises(requests.exceptions.HTTPError):
+        APIClient(settings).sync_user_followings("alice")
+    assert sync_server.calls("/api/sync") == 1
+
+def test_client_errors_not_retried(settings, sync_server):
+    sync_server.queue("/api/mutual", (404, {"error": "not found"}))
+    with pytest.raises(requests.exceptions.HTTPError):
+        APIClient(settings).get_mutual_followings("alice", "bob")
+    assert sync_server.calls("/api/mutual") == 1
+
+def test_timeout_per_endpoint(settings, sync_server):
+    settings.api_timeout = 0.2
+    sync_server.queue("/api/sync", (200, {"status": "success"}, 1.0))
+    with pytest.raises(requests.exceptions.Timeout):
+        APIClient(settings).sync_user_followings("alice")
+
+def test_circuit_opens_and_fails_fast(settings, sync_server):
+    client = APIClient(settings)
+    sync_server.queue("/api/sync", *[(500, {})] * 3)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.sync_user_followings("alice")
+
+    with pytest.raises(CircuitOpenError):
+        client.sync_user_followings("alice")
+    assert sync_server.calls("/api/sync") == 3
+    assert client.breaker.state == "open"
+
+def test_circuit_half_open_trial_closes_on_success(settings, sync_server):
+    settings.circuit_breaker_reset_timeout = 0.05
+    client = APIClient(settings)
+    sync_server.queue("/api/sync", *[(500, {})] * 3)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.sync_user_followings("alice")
+
+    time.sleep(0.1)
+    assert client.breaker.state == "half-open"
+    assert client.sync_user_followings("alice") == {"status": "success"}
+    assert client.breaker.state == "closed"
+
+def test_async_client_retries_and_reuses_connection(settings, sync_server):
+    sync_server.queue("/api/mutual", (503, {}))
+
+    async def run():
+        client = AsyncAPIClient(settings)
+        try:
+            await client.sync_user_followings("alice")
+            return await client.get_mutual_followings("alice", "bob")
+        finally:
+            await close_async_http_client()
+
+    assert asyncio.run(run()) == {"status": "success"}
+    assert sync_server.calls("/api/mutual") == 2
+    assert len(sync_server.client_ports) == 1
+
+def test_retries_count_as_one_breaker_failure(settings, sync_server):
+    sync_server.queue("/api/mutual", *[(503, {})] * 3)
+    client = APIClient(settings)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_mutual_followings("alice", "bob")
+    assert sync_server.calls("/api/mutual") == 3
+    assert client.breaker.state == "closed"
+
+def test_cancelled_trial_releases_half_open_slot(settings, sync_server):
+    settings.circuit_breaker_reset_timeout = 0.05
+    sync_server.queue("/api/sync", *[(500, {})] * 3, (200, {"status": "success"}, 1.0))
+
+    async def run():
+        client = AsyncAPIClient(settings)
+        try:
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    await client.sync_user_followings("alice")
+            await asyncio.sleep(0.1)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.sync_user_followings("alice"), 0.1)
+            assert client.breaker.state == "half-open"
+            return await client.sync_user_followings("alice")
+        finally:
+            await close_async_http_client()
+
+    assert asyncio.run(run()) == {"status": "success"}
@@ -0,0 +1,57 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from twitter_interest.batch import _init_worker, read_usernames, run_batch
+
+@pytest.fixture
+def inline_pool(mocker):
+    """Runs batch workers on threads with a stubbed per-user analysis."""
+    mocker.patch(
+        "twitter_interest.batch.ProcessPoolExecutor",
+        side_effect=lambda max_workers, **kwargs: ThreadPoolExecutor(max_workers),
+    )
+
+    def analyze(username):
+        if username == "ghost":
+            return {"username": username, "status": "error", "error": "UserNotFoundError"}
+        return {"username": username, "status": "ok", "interests": ["python"]}
+
+    return mocker.patch("twitter_interest.batch._analyze_user", side_effect=analyze)
+
+def test_read_usernames_normalizes_and_dedupes():
+    lines = ["@Alice\n", "\n", "# tracked accounts\n", "bob\n", "alice\n", "  Carol  \n"]
+    assert list(read_usernames(lines)) == ["alice", "bob", "carol"]
+
+def test_run_batch_streams_one_line_per_user(inline_pool):
+    out = io.StringIO()
+    summary = run_batch(["alice", "ghost", "bob"], out, workers=2)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(r["username"] for r in records) == ["alice", "bob", "ghost"]
+    assert (summary.processed, summary.failed, summary.skipped) == (3, 1, 0)
+
+def test_run_batch_resumes_from_checkpoint(inline_pool, tmp_path):
+    checkpoint = tmp_path / "done.txt"
+    checkpoint.write_text("alice\nbob\n")
+
+    out = io.StringIO()
+    summary = run_batch(["alice", "bob", "carol"], out, workers=1, checkpoint=checkpoint)
+
+    assert [json.loads(line)["username"] for line in out.getvalue().splitlines()] == ["carol"]
+    assert summary.skipped == 2
+    assert checkpoint.read_text().split() == ["alice", "bob", "carol"]
+    inline_pool.assert_called_once_with("carol")
+
+def test_worker_initializer_splits_cores(mocker, monkeypatch):
+    # Restored afterwards; the initializer sets the worker's globals
+    monkeypatch.setattr("twitter_interest.batch._worker_settings", None)
+    configure_worker = mocker.patch("twitter_interest.serving.configure_worker")
+    mocker.patch("twitter_interest.batch.Settings")
+    mocker.patch("twitter_interest.batch.setup_logging")
+    mocker.patch("twitter_interest.interest_extractor.InterestExtractor")
+
+    _init_worker(None, False, "WARNING", 4)
+
+    configure_worker.assert_called_once_with(4)
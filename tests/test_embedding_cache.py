@@ -0,0 +1,68 @@
+import numpy as np
+from twitter_interest import embedding_cache
+from twitter_interest.embedding_cache import EmbeddingCache, bio_hash
+
+def vectors(n, dim=4):
+    return np.arange(n * dim, dtype=np.float32).reshape(n, dim)
+
+def test_roundtrip_and_counters(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3")
+    cache.put_many("model-a", ["python", "rust"], vectors(2))
+
+    hits = cache.get_many("model-a", ["python", "rust", "go"])
+    assert (hits[0] == vectors(2)[0]).all()
+    assert (hits[1] == vectors(2)[1]).all()
+    assert hits[2] is None
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+
+def test_keyed_by_model_name(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3")
+    cache.put_many("model-a", ["python"], vectors(1))
+    assert cache.get_many("model-b", ["python"]) == [None]
+
+def test_normalized_bios_share_entry():
+    assert bio_hash("  web3   builder\n") == bio_hash("web3 builder")
+
+def test_survives_restart(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    EmbeddingCache(path).put_many("model-a", ["python"], vectors(1))
+
+    reopened = EmbeddingCache(path)
+    (hit,) = reopened.get_many("model-a", ["python"])
+    assert (hit == vectors(1)[0]).all()
+    assert reopened.stats()["disk_hits"] == 1
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_entries=3, memory_entries=1)
+    for i in range(5):
+        cache.put_many("model-a", [f"bio {i}"], vectors(1))
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite3", max_entries=3)
+    hits = reopened.get_many("model-a", [f"bio {i}" for i in range(5)])
+    assert sum(hit is not None for hit in hits) == 3
+    assert hits[4] is not None
+    assert cache.stats()["evictions"] == 2
+
+def test_memory_hits_refresh_disk_recency(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: next(clock))
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_entries=2)
+    cache.put_many("model-a", ["a"], vectors(1))
+    cache.put_many("model-a", ["b"], vectors(1))
+    cache.get_many("model-a", ["a"])
+    cache.put_many("model-a", ["c"], vectors(1))
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite3", max_entries=2)
+    hits = reopened.get_many("model-a", ["a", "b", "c"])
+    assert [hit is not None for hit in hits] == [True, False, True]
+
+def test_row_count_survives_reopen(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    EmbeddingCache(path, max_entries=3).put_many("model-a", ["a", "b"], vectors(2))
+    reopened = EmbeddingCache(path, max_entries=3)
+    reopened.put_many("model-a", ["a", "c", "d"], vectors(3))
+
+    assert reopened.stats()["evictions"] == 1
@@ -0,0 +1,125 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+from twitter_interest import encoder_pool
+from twitter_interest.encoder_pool import EncoderPool, _encode_shard, get_encoder_pool
+from twitter_interest.settings import Settings
+
+
+class LengthModel:
+    """Embeds each text as [len(text), 1, 0]."""
+
+    max_seq_length = 128
+
+    def tokenizer(self, texts, **kwargs):
+        return {"input_ids": [[0] * len(text) for text in texts]}
+
+    def encode(self, texts, **kwargs):
+        return np.array([[len(text), 1.0, 0.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    return Settings()
+
+
+def test_shard_is_written_into_shared_memory(monkeypatch):
+    monkeypatch.setattr(encoder_pool, "_worker_model", LengthModel())
+    shape = (5, 3)
+    shm = SharedMemory(create=True, size=5 * 3 * 4)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[:] = -1
+
+        assert _encode_shard(shm.name, shape, 2, ["a", "bbb", "cc"], batch_size=2) == 3
+
+        np.testing.assert_array_equal(out[:, 0], [-1, -1, 1, 3, 2])
+        del out
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_pool_disabled_by_default(settings):
+    assert get_encoder_pool(settings) is None
+
+
+def test_extractor_uses_pool_only_for_large_inputs(settings, mocker):
+    from twitter_interest.interest_extractor import InterestExtractor
+
+    pool = mocker.Mock()
+    pool.encode.side_effect = lambda bios, batch_size: np.ones((len(bios), 3), dtype=np.float32)
+    mocker.patch("twitter_interest.interest_extractor.get_encoder_pool", return_value=pool)
+    mocker.patch("twitter_interest.interest_extractor.get_model_registry").return_value.get_model.return_value = LengthModel()
+    settings = settings.model_copy(update={
+        "encode_processes": 2, "encode_processes_min_bios": 3, "embedding_cache_enabled": False, "microbatch_enabled": False,
+    })
+    extractor = InterestExtractor(settings)
+
+    small = extractor.encode_bios(["a", "bb"])
+    assert pool.encode.call_count == 0
+    np.testing.assert_array_equal(small[:, 0], [1, 2])
+
+    extractor.encode_bios(["a", "bb", "ccc"])
+    pool.encode.assert_called_once_with(["a", "bb", "ccc"], settings.encode_batch_size)
+
+
+def test_workers_get_model_arguments_not_settings(settings, mocker):
+    executor = mocker.patch("twitter_interest.encoder_pool.ProcessPoolExecutor")
+    executor.return_value.submit.return_value.result.return_value = 768
+    registry = mocker.patch("twitter_interest.encoder_pool.get_model_registry").return_value
+    registry.is_resident.return_value = False
+    settings = settings.model_copy(update={"encode_processes": 2})
+
+    pool = EncoderPool(settings)
+
+    assert executor.call_args.kwargs["initargs"] == (
+        settings.model_name, settings.bio_max_seq_length, pool.threads_per_process
+    )
+    # The dimension comes from a worker rather than from loading the model here
+    registry.get_model.assert_not_called()
+    assert pool._dimension(executor.return_value) == 768
+    executor.return_value.submit.assert_called_once_with(encoder_pool._worker_dimension)
+
+
+def test_default_threshold_shards_a_page_of_followings(settings, mocker):
+    from twitter_interest.service import infer_interests
+
+    pool = mocker.Mock()
+    pool.encode.side_effect = lambda bios, batch_size: np.ones((len(bios), 3), dtype=np.float32)
+    mocker.patch("twitter_interest.interest_extractor.get_encoder_pool", return_value=pool)
+    mocker.patch("twitter_interest.interest_extractor.get_embedding_cache", return_value=None)
+    mocker.patch("twitter_interest.interest_extractor.get_inference_scheduler", return_value=None)
+    registry = mocker.patch("twitter_interest.interest_extractor.get_model_registry").return_value
+    registry.get_model.return_value = LengthModel()
+    registry.get_category_embeddings.return_value = np.ones((len(settings.categories), 3), dtype=np.float32)
+    mocker.patch("twitter_interest.service.APIClient")
+    neo4j = mocker.patch("twitter_interest.service.Neo4jClient").return_value
+    neo4j.get_last_synced_at.return_value = None
+    # A follow list smaller than one page, but above the default threshold
+    neo4j.get_user_with_followings.return_value = {
+        "bio": "builder",
+        "followings": [{"username": f"user{i}", "bio": f"bio {i}"} for i in range(300)],
+    }
+    settings = settings.model_copy(update={"encode_processes": 2})
+    assert settings.encode_processes_min_bios <= 300 < settings.followings_page_size
+
+    infer_interests("alice", settings)
+
+    pool.encode.assert_called_once()
+    assert len(pool.encode.call_args.args[0]) == 301
+
+
+def test_threshold_above_page_size_is_rejected(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setenv("ENCODE_PROCESSES", "2")
+    monkeypatch.setenv("ENCODE_PROCESSES_MIN_BIOS", "2048")
+
+    with pytest.raises(ValueError, match="FOLLOWINGS_PAGE_SIZE"):
+        Settings()
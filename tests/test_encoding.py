@@ -0,0 +1,47 @@
+import numpy as np
+from twitter_interest.encoding import encode_length_bucketed, length_sorted_batches, token_lengths
+
+
+class WordModel:
+    """One token per word plus two special tokens; embeds each text as [word count, position]."""
+
+    max_seq_length = 6
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def tokenizer(self, texts, max_length=None, **kwargs):
+        return {"input_ids": [([0] + [1] * len(text.split()) + [2])[:max_length] for text in texts]}
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[len(text.split()), float(text.split()[-1])] for text in texts], dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+
+def test_token_lengths_are_truncated_to_max_seq_length():
+    lengths = token_lengths(WordModel(), ["1", "1 2 3", "1 2 3 4 5 6 7 8"])
+    assert lengths.tolist() == [3, 5, 6]
+
+
+def test_batches_group_similar_lengths_longest_first():
+    lengths = np.array([2, 9, 3, 8, 2, 9])
+    batches = length_sorted_batches(lengths, batch_size=2)
+    assert [lengths[batch].tolist() for batch in batches] == [[9, 9], [8, 3], [2, 2]]
+
+
+def test_bucketed_encoding_restores_original_order():
+    model = WordModel()
+    texts = ["a 0", "a b c d 1", "2", "a b c 3", "a 4"]
+
+    embeddings = encode_length_bucketed(model, texts, batch_size=2)
+
+    assert embeddings.dtype == np.float32
+    np.testing.assert_array_equal(embeddings[:, 1], [0, 1, 2, 3, 4])
+    assert model.calls == [["a b c d 1", "a b c 3"], ["a 0", "a 4"], ["2"]]
+
+
+def test_bucketed_encoding_of_nothing():
+    assert encode_length_bucketed(WordModel(), [], batch_size=4).shape == (0, 2)
@@ -3,7 +3,9 @@ from twitter_interest.interest_extractor import InterestExtractor
 from twitter_interest.settings import Settings
 
 @pytest.fixture
-def settings(monkeypatch):
+def settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("CATEGORY_CACHE_DIR", str(tmp_path / "categories"))
     monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
     monkeypatch.setenv("NEO4J_USERNAME", "dummy")
     monkeypatch.setenv("NEO4J_PASSWORD", "dummy")
@@ -43,4 +45,66 @@ def test_multi_category_bio(extractor):
     bio = "I'm working on IPFS, cryptography, smart contracts, and Rust-based blockchain nodes."
     interests = extractor.extract_interest_from_bio(bio)
     expected = {"ipfs", "cryptography", "smart contracts", "rust"}
-    assert expected.intersection(set(interests))
\ No newline at end of file
+    assert expected.intersection(set(interests))
+
+def test_batch_matches_single_bio_extraction(extractor):
+    bios = [
+        "I work on decentralized finance and smart contracts with Ethereum.",
+        "",
+        "python",
+        "I love gardening and baking cakes on weekends.",
+        "I'm working on IPFS, cryptography, smart contracts, and Rust-based blockchain nodes.",
+    ]
+    batched = extractor.extract_interests_batch(bios, batch_size=2)
+    assert batched == [extractor.extract_interest_from_bio(bio) for bio in bios]
+
+def test_batch_top_n_and_threshold(extractor):
+    bios = [
+        "Machine learning, blockchain, cryptography and distributed systems.",
+        "I love gardening and baking cakes on weekends.",
+    ]
+    assert all(len(i) <= 2 for i in extractor.extract_interests_batch(bios, top_n=2))
+    assert extractor.extract_interests_batch(bios, similarity_threshold=0.99) == [[], []]
+
+def test_batch_rejects_mismatched_usernames(extractor):
+    with pytest.raises(ValueError):
+        extractor.extract_interests_batch(["python", "rust"], usernames=["only_one"])
+
+def test_category_indices_shape(extractor):
+    indices = extractor.extract_category_indices(["python", " "], top_n=3)
+    assert indices.shape == (2, 3)
+    assert (indices[1] == -1).all()
+
+def test_category_scores_match_indices(extractor):
+    bios = ["python and rust developer", "", "smart contracts"]
+    indices, scores = extractor.extract_category_scores(bios)
+    assert (indices == extractor.extract_category_indices(bios)).all()
+    assert (scores[indices >= 0] >= extractor.settings.similarity_threshold).all()
+    assert (scores[indices < 0] == 0).all()
+
+def test_cached_bios_skip_the_model(extractor, mocker):
+    bios = ["python and rust", "smart contracts"]
+    first = extractor.encode_bios(bios)
+    spy = mocker.spy(extractor.model, "encode")
+    second = extractor.encode_bios(bios)
+    spy.assert_not_called()
+    assert (first == second).all()
+
+def test_cache_is_keyed_by_truncation_length(extractor, settings, mocker):
+    bios = ["python and rust"]
+    extractor.encode_bios(bios)
+    mocker.patch.object(extractor.model, "max_seq_length", 16)
+    shorter = InterestExtractor(settings)
+    spy = mocker.spy(shorter.model, "encode")
+    shorter.encode_bios(bios)
+    spy.assert_called_once()
+
+def test_duplicate_bios_are_encoded_once(extractor, mocker):
+    spy = mocker.spy(extractor, "encode_bios")
+    bios = ["Smart contracts on Ethereum", "smart contracts  on ethereum https://t.co/xyz", "", "@vitalik"]
+
+    indices = extractor.extract_category_indices(bios)
+
+    assert spy.call_args.args[0] == ["smart contracts on ethereum"]
+    assert (indices[0] == indices[1]).all()
+    assert (indices[2:] == -1).all()
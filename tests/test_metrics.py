@@ -0,0 +1,33 @@
+from twitter_interest import metrics
+from twitter_interest.metrics import _InferenceMetrics, record_inference, render_prometheus
+
+
+def test_prometheus_histograms_per_stage(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", _InferenceMetrics())
+    monkeypatch.setattr(metrics, "scheduler_stats", lambda: {})
+    record_inference({"sync": 0.02, "encode": 0.3, "total": 0.4}, followings=120, bios_encoded=80)
+    record_inference({"sync": 0.004, "total": 0.01})
+
+    text = render_prometheus()
+
+    assert "# TYPE interest_stage_duration_seconds histogram" in text
+    assert 'interest_stage_duration_seconds_bucket{stage="sync",le="0.005"} 1' in text
+    assert 'interest_stage_duration_seconds_bucket{stage="sync",le="+Inf"} 2' in text
+    assert 'interest_stage_duration_seconds_count{stage="encode"} 1' in text
+    assert 'interest_followings_bucket{le="250"} 1' in text
+    assert "interest_followings_count 1" in text
+    assert "interest_bios_encoded_sum 80.0" in text
+    assert text.endswith("\n")
+
+
+def test_microbatch_histograms_labelled_by_model(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", _InferenceMetrics())
+    batch = {"count": 1, "sum": 3.0, "buckets": {"4": 1, "+Inf": 1}}
+    monkeypatch.setattr(
+        metrics, "scheduler_stats", lambda: {"all-MiniLM-L6-v2": {"batch_size": batch, "queue_delay_seconds": batch}}
+    )
+
+    text = render_prometheus()
+
+    assert 'interest_microbatch_size_bucket{model="all-MiniLM-L6-v2",le="4"} 1' in text
+    assert 'interest_microbatch_queue_delay_seconds_count{model="all-MiniLM-L6-v2"} 1' in text
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pytest
+from twitter_interest.model_registry import ModelRegistry
+
+MB = 2**20
+
+@pytest.fixture
+def fake_models(mocker):
+    """Patches model loading so each model 'weighs' the size given in `sizes`."""
+    sizes = {"small": 100 * MB, "medium": 300 * MB, "large": 600 * MB}
+    loader = mocker.patch("twitter_interest.model_registry._load_sentence_transformer")
+    loader.side_effect = lambda name: mocker.Mock(name=name, model_name=name)
+    mocker.patch(
+        "twitter_interest.model_registry._model_nbytes",
+        side_effect=lambda model: sizes[model.model_name],
+    )
+    return loader
+
+def test_model_loaded_once(fake_models):
+    registry = ModelRegistry(max_bytes=1024 * MB)
+    first = registry.get_model("small")
+    second = registry.get_model("small")
+    assert first is second
+    assert fake_models.call_count == 1
+
+def test_lru_eviction_under_memory_cap(fake_models):
+    registry = ModelRegistry(max_bytes=900 * MB)
+    registry.get_model("small")
+    registry.get_model("medium")
+    registry.get_model("small")  # small is now most recently used
+    registry.get_model("large")  # needs to evict medium only
+
+    stats = registry.stats()
+    assert stats["models"] == ["small", "large"]
+    assert stats["evictions"] == 1
+    assert stats["resident_bytes"] <= stats["max_bytes"]
+
+def test_category_embeddings_encoded_once(fake_models):
+    registry = ModelRegistry(max_bytes=1024 * MB)
+    model = registry.get_model("small")
+    model.encode.return_value = np.ones((2, 4))
+
+    first = registry.get_category_embeddings("small", ["python", "rust"])
+    second = registry.get_category_embeddings("small", ["python", "rust"])
+    assert first is second
+    model.encode.assert_called_once()
+
+def test_max_seq_length_only_lowers_model_limit(fake_models, mocker):
+    fake_models.side_effect = lambda name: mocker.Mock(name=name, model_name=name, max_seq_length=384 if name == "small" else 64)
+    registry = ModelRegistry(max_bytes=1024 * MB, max_seq_length=128)
+    assert registry.get_model("small").max_seq_length == 128
+    assert registry.get_model("medium").max_seq_length == 64
+
+def encode_by_name(texts, **kwargs):
+    return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+def test_category_embeddings_persisted_per_model_and_list(fake_models, tmp_path):
+    registry = ModelRegistry(max_bytes=1024 * MB, category_cache_dir=str(tmp_path))
+    registry.get_model("small").encode.side_effect = encode_by_name
+    first = registry.get_category_embeddings("small", ["python", "rust"])
+    assert len(list(tmp_path.glob("small/*.npy"))) == 1
+
+    # A fresh process finds them on disk instead of encoding again
+    restarted = ModelRegistry(max_bytes=1024 * MB, category_cache_dir=str(tmp_path))
+    second = restarted.get_category_embeddings("small", ["python", "rust"])
+    restarted.get_model("small").encode.assert_not_called()
+    np.testing.assert_array_equal(first, second)
+
+def test_new_category_list_encodes_only_added_categories(fake_models, tmp_path):
+    registry = ModelRegistry(max_bytes=1024 * MB, category_cache_dir=str(tmp_path))
+    model = registry.get_model("small")
+    model.encode.side_effect = encode_by_name
+    registry.get_category_embeddings("small", ["python", "rust"])
+
+    embeddings = registry.get_category_embeddings("small", ["rust", "solidity", "python"])
+
+    assert model.encode.call_args.args[0] == ["solidity"]
+    np.testing.assert_array_equal(embeddings[:, 0], [4, 8, 6])
+
+def test_is_resident_never_loads(fake_models, mocker):
+    registry = ModelRegistry(max_bytes=1024 * MB)
+    assert not registry.is_resident("small")
+    fake_models.assert_not_called()
+
+    registry.get_model("small").encode.return_value = np.ones((1, 2))
+    assert registry.is_resident("small")
+    assert not registry.is_resident("small", ["python"])
+    registry.get_category_embeddings("small", ["python"])
+    assert registry.is_resident("small", ["python"])
+
+def test_loaded_models_are_frozen_for_inference(fake_models):
+    model = ModelRegistry(max_bytes=1024 * MB).get_model("small")
+    model.eval.assert_called_once_with()
+    model.requires_grad_.assert_called_once_with(False)
+
+def test_loading_one_model_does_not_block_resident_ones(fake_models, mocker):
+    registry = ModelRegistry(max_bytes=1024 * MB)
+    resident = registry.get_model("small")
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_load(name):
+        loading.set()
+        release.wait(5)
+        return mocker.Mock(name=name, model_name=name)
+
+    fake_models.side_effect = slow_load
+    loader = threading.Thread(target=registry.get_model, args=("medium",))
+    loader.start()
+    try:
+        assert loading.wait(5)
+        served = []
+        reader = threading.Thread(target=lambda: served.append(registry.get_model("small")))
+        reader.start()
+        reader.join(1)
+        assert served == [resident]
+    finally:
+        release.set()
+        loader.join()
+    assert registry.stats()["models"] == ["small", "medium"]
+    assert fake_models.call_count == 2
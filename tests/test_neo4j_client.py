@@ -0,0 +1,115 @@
+import pytest
+from twitter_interest import neo4j_client
+from twitter_interest.neo4j_client import Neo4jClient, get_driver, close_driver, pool_stats
+from twitter_interest.settings import Settings
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "7")
+    return Settings()
+
+@pytest.fixture
+def graph_database(mocker):
+    close_driver()
+    mock = mocker.patch("twitter_interest.neo4j_client.GraphDatabase")
+    yield mock
+    close_driver()
+
+def test_driver_shared_across_clients(settings, graph_database):
+    first = Neo4jClient(settings)
+    first.close()
+    second = Neo4jClient(settings)
+
+    assert first.driver is second.driver is get_driver(settings)
+    graph_database.driver.assert_called_once()
+    assert graph_database.driver.call_args.kwargs["max_connection_pool_size"] == 7
+    first.driver.close.assert_not_called()
+
+def test_close_driver_closes_pool(settings, graph_database):
+    driver = get_driver(settings)
+    close_driver()
+    driver.close.assert_called_once()
+    assert neo4j_client._driver is None
+
+def test_pool_stats_track_sessions(settings, graph_database):
+    client = Neo4jClient(settings)
+    session = client.driver.session.return_value.__enter__.return_value
+    session.run.return_value.single.return_value = {"bio": "rust"}
+    before = pool_stats()["sessions_opened"]
+
+    assert client.get_user_bio("alice") == "rust"
+
+    stats = pool_stats()
+    assert stats["sessions_opened"] == before + 1
+    assert stats["sessions_in_use"] == 0
+    assert stats["max_pool_size"] == 7
+
+def test_user_with_followings_single_query(settings, graph_database):
+    client = Neo4jClient(settings)
+    session = client.driver.session.return_value.__enter__.return_value
+    session.run.return_value.single.return_value = {
+        "bio": None,
+        "followings": [{"username": "bob", "bio": "rust"}],
+    }
+
+    profile = client.get_user_with_followings("alice")
+
+    assert profile == {"bio": "", "followings": [{"username": "bob", "bio": "rust"}]}
+    session.run.assert_called_once()
+
+def test_user_with_followings_not_found(settings, graph_database):
+    client = Neo4jClient(settings)
+    session = client.driver.session.return_value.__enter__.return_value
+    session.run.return_value.single.return_value = None
+
+    assert client.get_user_with_followings("ghost") is None
+
+def test_iter_followings_keyset_pagination(settings, graph_database, mocker):
+    client = Neo4jClient(settings)
+    session = client.driver.session.return_value.__enter__.return_value
+
+    def record(username):
+        return mocker.Mock(data=lambda: {"username": username, "bio": ""})
+
+    session.run.side_effect = [
+        [record("a"), record("b")],
+        [record("c")],
+    ]
+
+    pages = list(client.iter_followings_with_bios("alice", page_size=2))
+
+    assert [[f["username"] for f in page] for page in pages] == [["a", "b"], ["c"]]
+    assert session.run.call_args_list[0].kwargs["after"] is None
+    assert session.run.call_args_list[1].kwargs["after"] == "b"
+
+def test_store_interests_single_unwind_write(settings, graph_database):
+    client = Neo4jClient(settings)
+    session = client.driver.session.return_value.__enter__.return_value
+    rows = [
+        {"username": "bob", "bio": "rust dev", "interests": ["rust"], "scores": [0.7], "bio_hash": "h1"},
+        {"username": "carol", "bio": "", "interests": [], "scores": [], "bio_hash": "h2"},
+    ]
+
+    client.store_interests(rows, "all-MiniLM-L6-v2", "cfg")
+
+    session.run.assert_called_once()
+    query = session.run.call_args.args[0]
+    assert query.startswith("UNWIND $rows")
+    assert session.run.call_args.kwargs == {"rows": rows, "model": "all-MiniLM-L6-v2", "config": "cfg"}
+
+def test_interest_candidates_filtered_in_cypher(settings, graph_database, mocker):
+    client = Neo4jClient(settings)
+    session = client.driver.session.return_value.__enter__.return_value
+    session.run.side_effect = [[mocker.Mock(data=lambda: {"username": "b", "bio": "go"})]]
+
+    pages = list(client.iter_interest_candidates("alice", 2, "all-MiniLM-L6-v2", "cfg"))
+
+    assert pages == [[{"username": "b", "bio": "go"}]]
+    query = session.run.call_args.args[0]
+    assert "f.interestsBio <> coalesce(f.bio, '')" in query
+    assert session.run.call_args.kwargs == {
+        "user_id": "alice", "after": None, "page_size": 2, "model": "all-MiniLM-L6-v2", "config": "cfg",
+    }
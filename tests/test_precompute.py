@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from twitter_interest.embedding_cache import bio_hash
+from twitter_interest.precompute import precompute_interests
+from twitter_interest.service import interest_config_hash
+from twitter_interest.settings import Settings
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    return Settings()
+
+@pytest.fixture
+def graph(mocker, settings):
+    """Five users in an in-memory graph; u1 already has up-to-date stored interests."""
+    users = [
+        {"username": f"u{i}", "bio": f"bio {i}", "bio_hash": None, "model": None, "config": None}
+        for i in range(5)
+    ]
+    users[1].update(bio_hash=bio_hash("bio 1"), model=settings.model_name, config=interest_config_hash(settings))
+
+    def iter_all_users(page_size, after=None):
+        rest = [u for u in users if after is None or u["username"] > after]
+        for start in range(0, len(rest), page_size):
+            yield rest[start:start + page_size]
+
+    client = mocker.patch("twitter_interest.precompute.Neo4jClient").return_value
+    client.iter_all_users.side_effect = iter_all_users
+    mocker.patch(
+        "twitter_interest.precompute.extract_interest_rows",
+        side_effect=lambda settings, candidates: [{"username": c["username"]} for c in candidates],
+    )
+    return client
+
+def stored_usernames(client):
+    return [row["username"] for call in client.store_interests.call_args_list for row in call.args[0]]
+
+def test_precompute_recomputes_only_stale_users(settings, graph):
+    report = precompute_interests(settings, chunk_size=2, threads=1)
+
+    assert stored_usernames(graph) == ["u0", "u2", "u3", "u4"]
+    assert (report.scanned, report.recomputed, report.chunks) == (5, 4, 3)
+    assert set(report.stage_seconds) == {"fetch", "filter", "encode", "write"}
+
+def test_precompute_full_and_checkpoint_resume(settings, graph, tmp_path):
+    checkpoint = tmp_path / "precompute.json"
+    checkpoint.write_text(json.dumps({
+        "after": "u2", "model": settings.model_name, "config": interest_config_hash(settings),
+    }))
+
+    report = precompute_interests(settings, chunk_size=2, checkpoint=checkpoint, threads=1, full=True)
+
+    assert report.resumed_after == "u2"
+    assert stored_usernames(graph) == ["u3", "u4"]
+    assert json.loads(checkpoint.read_text())["after"] == "u4"
+
+def test_checkpoint_for_other_model_is_ignored(settings, graph, tmp_path):
+    checkpoint = tmp_path / "precompute.json"
+    checkpoint.write_text(json.dumps({"after": "u3", "model": "another-model", "config": "x"}))
+
+    report = precompute_interests(settings, chunk_size=10, checkpoint=checkpoint, threads=1, full=True)
+
+    assert report.resumed_after is None
+    assert report.scanned == 5
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from twitter_interest.preprocessing import normalize_bio_text, preprocess_bios, preprocessing_stats
+
+
+@pytest.mark.parametrize("bio, expected", [
+    ("  Building   DeFi\ttools \n", "building defi tools"),
+    ("Rust dev https://t.co/AbC123xyz", "rust dev"),
+    ("Engineer @Google, ex-@meta. DMs open", "engineer , ex- . dms open"),
+    ("reach me at me@example.com", "reach me at me@example.com"),
+    ("https://example.com/keep", "https://example.com/keep"),
+    ("@someone https://t.co/x", ""),
+])
+def test_normalize_bio_text(bio, expected):
+    assert normalize_bio_text(bio) == expected
+
+
+def test_duplicates_share_one_text():
+    bios = ["Web3 builder", "", "web3  builder https://t.co/abc", "python", "   ", "WEB3 builder @dao"]
+
+    prepared = preprocess_bios(bios)
+
+    assert prepared.texts == ["web3 builder", "python"]
+    np.testing.assert_array_equal(prepared.inverse, [0, -1, 0, 1, -1, 0])
+    assert (prepared.empty, prepared.duplicates) == (2, 2)
+
+
+def test_stats_accumulate():
+    before = preprocessing_stats()
+    preprocess_bios(["a", "A", ""])
+    after = preprocessing_stats()
+    assert after["bios"] - before["bios"] == 3
+    assert after["duplicates"] - before["duplicates"] == 1
+    assert after["empty"] - before["empty"] == 1
+    assert after["encoded"] - before["encoded"] == 1
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from twitter_interest.profiling import ProfilerBusyError, format_profile, load_profile, profiled, save_profile
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_busy_thread_shows_up_and_blocked_thread_is_idle():
+    blocked = threading.Event()
+    with profiled("busy", interval=0.002) as session:
+        waiter = threading.Thread(target=blocked.wait)
+        waiter.start()
+        worker = threading.Thread(target=spin, args=(0.3,))
+        worker.start()
+        worker.join()
+        blocked.set()
+        waiter.join()
+
+    sampling = session.report["sampling"]
+    functions = [function["function"] for function in sampling["top_functions"]]
+    assert any(function.startswith("spin (tests/test_profiling.py") for function in functions)
+    assert not any(function.startswith("wait (") for function in functions)
+    assert sampling["samples"] > 0
+    assert sampling["idle_samples"] > 0
+    assert "spin (tests/test_profiling.py" in session.profiler.folded()
+
+
+def test_allocations_during_the_block_are_reported():
+    with profiled("alloc", interval=0.01) as session:
+        kept = [bytes(1024) for _ in range(2000)]
+
+    memory = session.report["memory"]
+    assert memory["peak_bytes"] >= 2000 * 1024
+    assert any("test_profiling.py" in allocation["location"] for allocation in memory["top_allocations"])
+    assert len(kept) == 2000
+
+
+def test_one_profile_at_a_time():
+    with profiled("outer", interval=0.01):
+        with pytest.raises(ProfilerBusyError):
+            with profiled("inner", interval=0.01):
+                pass
+    # Released once the outer block exits
+    with profiled("again", interval=0.01) as session:
+        pass
+    assert session.report["label"] == "again"
+
+
+def test_save_and_load(tmp_path):
+    with profiled("GET /interests/alice", interval=0.01) as session:
+        spin(0.02)
+    session.report["stage_seconds"] = {"total": 0.02}
+
+    path = save_profile(session, str(tmp_path))
+
+    assert path == tmp_path / f"{session.id}.json"
+    assert (tmp_path / f"{session.id}.folded").exists()
+    assert load_profile(session.id, str(tmp_path)) == session.report
+    assert load_profile("missing", str(tmp_path)) is None
+    assert load_profile("../etc/passwd", str(tmp_path)) is None
+    assert format_profile(session.report).startswith(f"Profile {session.id}:")
+
+
+def test_cli_profile_surfaces_profiler_errors(monkeypatch, mocker, tmp_path):
+    from twitter_interest import cli
+    from twitter_interest.settings import Settings
+
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    run = mocker.patch.object(cli, "_run")
+
+    with profiled("outer", interval=0.01):
+        with pytest.raises(ProfilerBusyError):
+            cli._run_profiled("alice", Settings())
+
+    run.assert_not_called()
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,60 @@
+import pytest
+from twitter_interest.result_cache import ResultCache, result_cache_key
+from twitter_interest.settings import Settings
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    return Settings()
+
+def test_hit_after_put(settings):
+    cache = ResultCache(ttl_seconds=60)
+    key = result_cache_key("alice", settings)
+    assert cache.get(key) is None
+    entry = cache.put(key, ["python", "rust"], synced_at=100.0)
+
+    hit = cache.get(key)
+    assert hit is entry
+    assert hit.etag.startswith('W/"')
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+def test_entries_expire_after_ttl(settings, mocker):
+    clock = mocker.patch("twitter_interest.result_cache.time.time", return_value=1000.0)
+    cache = ResultCache(ttl_seconds=60)
+    key = result_cache_key("alice", settings)
+    cache.put(key, ["python"], synced_at=None)
+
+    clock.return_value = 1059.0
+    assert cache.get(key) is not None
+    clock.return_value = 1060.0
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+def test_key_covers_result_settings(settings):
+    base = result_cache_key("alice", settings)
+    assert result_cache_key("alice", settings.model_copy(update={"return_scores": True})) != base
+    assert result_cache_key("alice", settings.model_copy(update={"top_n_aggregator": 10})) != base
+    assert result_cache_key("alice", settings.model_copy(update={"categories": ["python"]})) != base
+    assert result_cache_key("alice", settings.model_copy(update={"model_name": "all-MiniLM-L6-v2"})) != base
+    assert result_cache_key("alice", settings.model_copy()) == base
+
+def test_invalidate_user_drops_all_variants(settings):
+    cache = ResultCache(ttl_seconds=60)
+    cache.put(result_cache_key("alice", settings), ["python"], None)
+    cache.put(result_cache_key("alice", settings.model_copy(update={"return_scores": True})), [("python", 1.0)], None)
+    cache.put(result_cache_key("bob", settings), ["rust"], None)
+
+    assert cache.invalidate_user("alice") == 2
+    assert cache.get(result_cache_key("alice", settings)) is None
+    assert cache.get(result_cache_key("bob", settings)) is not None
+
+def test_lru_bound(settings):
+    cache = ResultCache(ttl_seconds=60, max_entries=2)
+    for user in ("a", "b", "c"):
+        cache.put(result_cache_key(user, settings), [], None)
+    assert cache.get(result_cache_key("a", settings)) is None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,114 @@
+import threading
+
+import numpy as np
+import pytest
+from twitter_interest.scheduler import Histogram, MicroBatchScheduler
+from twitter_interest.settings import Settings
+
+
+class RecordingModel:
+    """Encodes each bio as [len(bio), 1] and records the bios it was given."""
+
+    max_seq_length = 128
+
+    def __init__(self, fail: bool = False):
+        self.calls: list[list[str]] = []
+        self.fail = fail
+
+    def tokenizer(self, texts, **kwargs):
+        return {"input_ids": [[0] * len(text) for text in texts]}
+
+    def encode(self, bios, **kwargs):
+        self.calls.append(list(bios))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return np.array([[len(bio), 1.0] for bio in bios], dtype=np.float32)
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    return Settings()
+
+
+def make_scheduler(settings, mocker, model, **overrides):
+    mocker.patch("twitter_interest.scheduler.get_model_registry").return_value.get_model.return_value = model
+    return MicroBatchScheduler(settings.model_copy(update=overrides), settings.model_name)
+
+
+def encode_concurrently(scheduler, requests):
+    results: dict[int, np.ndarray] = {}
+    barrier = threading.Barrier(len(requests))
+
+    def submit(i, bios):
+        barrier.wait()
+        results[i] = scheduler.encode(bios)
+
+    threads = [threading.Thread(target=submit, args=(i, bios)) for i, bios in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_requests_share_a_batch(settings, mocker):
+    model = RecordingModel()
+    scheduler = make_scheduler(settings, mocker, model, microbatch_max_wait_ms=200, microbatch_max_batch_size=100)
+    requests = [["a" * (i + 1)] * (i + 1) for i in range(5)]
+
+    results = encode_concurrently(scheduler, requests)
+
+    assert len(model.calls) < len(requests)
+    assert sum(len(call) for call in model.calls) == 15
+    for i, bios in enumerate(requests):
+        np.testing.assert_array_equal(results[i][:, 0], [len(bio) for bio in bios])
+    stats = scheduler.stats()
+    assert stats["requests"] == 5
+    assert stats["batches"] == len(model.calls)
+    assert stats["batch_size"]["sum"] == 15
+    assert stats["queue_depth"] == 0 and stats["queued_bios"] == 0
+
+
+def test_batches_respect_max_batch_size(settings, mocker):
+    model = RecordingModel()
+    scheduler = make_scheduler(settings, mocker, model, microbatch_max_wait_ms=200, microbatch_max_batch_size=4)
+
+    results = encode_concurrently(scheduler, [["x"] * 3, ["yy"] * 3, ["zzz"] * 3])
+
+    assert all(len(call) <= 4 for call in model.calls)
+    assert sorted(len(call) for call in model.calls) == [3, 3, 3]
+    assert sorted(int(rows[0, 0]) for rows in results.values()) == [1, 2, 3]
+
+
+def test_oversized_request_runs_alone_without_waiting(settings, mocker):
+    model = RecordingModel()
+    scheduler = make_scheduler(settings, mocker, model, microbatch_max_wait_ms=10_000, microbatch_max_batch_size=2)
+
+    rows = scheduler.encode(["a", "bb", "ccc"])
+
+    np.testing.assert_array_equal(rows[:, 0], [1, 2, 3])
+    assert model.calls == [["ccc", "bb", "a"]]
+
+
+def test_model_errors_reach_every_request_in_the_batch(settings, mocker):
+    model = RecordingModel(fail=True)
+    scheduler = make_scheduler(settings, mocker, model, microbatch_max_wait_ms=0)
+
+    with pytest.raises(RuntimeError, match="model crashed"):
+        scheduler.encode(["a"])
+    # The scheduler thread survives and keeps serving
+    model.fail = False
+    assert scheduler.encode(["bb"])[0, 0] == 2
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 4, 16))
+    for value in (1, 3, 4, 20):
+        histogram.observe(value)
+
+    stats = histogram.as_dict()
+    assert stats["buckets"] == {"1": 1, "4": 3, "16": 3, "+Inf": 4}
+    assert (stats["count"], stats["sum"], stats["max"]) == (4, 28, 20)
@@ -1,5 +1,15 @@
+import asyncio
+import time
+
+import numpy as np
 import pytest
-from twitter_interest.service import infer_interests, UserNotFoundError
+from twitter_interest.service import (
+    infer_interests, infer_interests_async, infer_interests_batch_async, ensure_synced, interest_config_hash,
+    StageTimings, UserNotFoundError,
+)
+from twitter_interest import metrics
+from twitter_interest.embedding_cache import bio_hash
+from twitter_interest.metrics import _InferenceMetrics
 
 @pytest.fixture
 def dummy_settings(monkeypatch):
@@ -9,6 +19,29 @@ def dummy_settings(monkeypatch):
     monkeypatch.setenv("INTEREST_MODEL_NAME", "all-MiniLM-L6-v2")
     return __import__('twitter_interest.settings').settings.Settings()
 
+CATEGORIES = ["python", "rust", "go", "solidity", "defi", "crypto", "ai", "cryptography", "privacy"]
+
+def index_rows(rows, width=2):
+    """Category index matrix, as returned by `extract_category_indices`, for lists of interests."""
+    return np.array([[CATEGORIES.index(c) for c in row] + [-1] * (width - len(row)) for row in rows], dtype=np.int64)
+
+def decode(indices):
+    return [[CATEGORIES[i] for i in row if i >= 0] for row in np.atleast_2d(indices).tolist()]
+
+def configure_extractor(mock_ext, settings, *pages):
+    mock_ext.return_value.categories = CATEGORIES
+    mock_ext.return_value.settings = settings
+    mock_ext.return_value.extract_category_indices.side_effect = [index_rows(page) for page in pages]
+    mock_ext.return_value.bios_encoded = sum(len(page) for page in pages)
+    return mock_ext.return_value
+
+def assert_aggregated(mock_agg, user_interests, followings_interests):
+    mock_agg.return_value.aggregate_indices.assert_called_once()
+    user_indices, followings_indices, categories = mock_agg.return_value.aggregate_indices.call_args.args
+    assert decode(user_indices) == [user_interests]
+    assert decode(followings_indices) == followings_interests
+    assert categories == CATEGORIES
+
 def test_infer_interests_success(mocker, dummy_settings):
     # Mock everything
     mock_api = mocker.patch("twitter_interest.service.APIClient")
@@ -21,25 +54,31 @@ def test_infer_interests_success(mocker, dummy_settings):
 
     # Configure Neo4j mock
     mock_neo_instance = mock_neo.return_value
-    mock_neo_instance.get_followings_with_bios.return_value = [
-        {"bio": "crypto and AI", "username": "user1"}, {"bio": "solidity and rust", "username": "user2"}
-    ]
-    mock_neo_instance.get_user_bio.return_value = "I love decentralized finance"
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = {
+        "bio": "I love decentralized finance",
+        "followings": [
+            {"bio": "crypto and AI", "username": "user1"}, {"bio": "solidity and rust", "username": "user2"}
+        ],
+    }
 
     # Configure extractor
-    mock_ext_instance = mock_ext.return_value
-    mock_ext_instance.extract_interest_from_bio.side_effect = [
+    mock_ext_instance = configure_extractor(mock_ext, dummy_settings, [
         ["defi", "crypto"],              # user bio
         ["crypto", "ai"],                # follower 1
         ["solidity", "rust"]             # follower 2
-    ]
+    ])
 
     # Configure aggregator
     mock_agg_instance = mock_agg.return_value
-    mock_agg_instance.aggregate.return_value = ["crypto", "defi", "ai"]
+    mock_agg_instance.aggregate_indices.return_value = ["crypto", "defi", "ai"]
 
     result = infer_interests("Alice", dummy_settings)
     assert result == ["crypto", "defi", "ai"]
+    mock_ext_instance.extract_category_indices.assert_called_once_with(
+        ["I love decentralized finance", "crypto and AI", "solidity and rust"]
+    )
+    assert_aggregated(mock_agg, ["defi", "crypto"], [["crypto", "ai"], ["solidity", "rust"]])
 
 def test_infer_interests_with_scores(mocker, dummy_settings):
     mocker.patch("twitter_interest.service.APIClient")
@@ -50,14 +89,16 @@ def test_infer_interests_with_scores(mocker, dummy_settings):
     dummy_settings.return_scores = True
 
     mock_neo_instance = mock_neo.return_value
-    mock_neo_instance.get_followings_with_bios.return_value = [{"bio": "rust", "username": "alice"}]
-    mock_neo_instance.get_user_bio.return_value = "smart contracts"
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = {
+        "bio": "smart contracts",
+        "followings": [{"bio": "rust", "username": "alice"}],
+    }
 
-    mock_ext_instance = mock_ext.return_value
-    mock_ext_instance.extract_interest_from_bio.side_effect = [["solidity"], ["rust"]]
+    mock_ext_instance = configure_extractor(mock_ext, dummy_settings, [["solidity"], ["rust"]])
 
     mock_agg_instance = mock_agg.return_value
-    mock_agg_instance.aggregate.return_value = [("solidity", 0.6), ("rust", 0.4)]
+    mock_agg_instance.aggregate_indices.return_value = [("solidity", 0.6), ("rust", 0.4)]
 
     result = infer_interests("Bob", dummy_settings)
 
@@ -72,14 +113,16 @@ def test_infer_interests_no_followings(mocker, dummy_settings):
     mock_agg = mocker.patch("twitter_interest.service.InterestAggregator")
 
     mock_neo_instance = mock_neo.return_value
-    mock_neo_instance.get_followings_with_bios.return_value = []
-    mock_neo_instance.get_user_bio.return_value = "cryptography and privacy"
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = {
+        "bio": "cryptography and privacy",
+        "followings": [],
+    }
 
-    mock_ext_instance = mock_ext.return_value
-    mock_ext_instance.extract_interest_from_bio.side_effect = [["cryptography", "privacy"]]
+    mock_ext_instance = configure_extractor(mock_ext, dummy_settings, [["cryptography", "privacy"]])
 
     mock_agg_instance = mock_agg.return_value
-    mock_agg_instance.aggregate.return_value = ["cryptography", "privacy"]
+    mock_agg_instance.aggregate_indices.return_value = ["cryptography", "privacy"]
 
     result = infer_interests("EmptyUser", dummy_settings)
 
@@ -93,14 +136,16 @@ def test_infer_interests_ignores_empty_follower_bios_and_uses_user_bio_only(mock
     mock_api = mocker.patch("twitter_interest.service.APIClient")
 
     mock_neo_instance = mock_neo.return_value
-    mock_neo_instance.get_followings_with_bios.return_value = [{"bio": "", "username": "user1"}]
-    mock_neo_instance.get_user_bio.return_value = "python developer"
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = {
+        "bio": "python developer",
+        "followings": [{"bio": "", "username": "user1"}],
+    }
 
-    mock_ext_instance = mock_ext.return_value
-    mock_ext_instance.extract_interest_from_bio.side_effect = [["python"], []]
+    mock_ext_instance = configure_extractor(mock_ext, dummy_settings, [["python"], []])
 
     mock_agg_instance = mock_agg.return_value
-    mock_agg_instance.aggregate.return_value = ["python"]
+    mock_agg_instance.aggregate_indices.return_value = ["python"]
 
     result = infer_interests("DevUser", dummy_settings)
 
@@ -113,13 +158,397 @@ def test_infer_interests_closes_neo4j_on_exception(mocker, dummy_settings):
     mock_neo = mocker.patch("twitter_interest.service.Neo4jClient")
     mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
     mock_neo_instance = mock_neo.return_value
-    mock_neo_instance.get_followings_with_bios.return_value = [{"bio": "", "username": "user1"}]
-    mock_neo_instance.get_user_bio.return_value = "python developer"
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = {
+        "bio": "python developer",
+        "followings": [{"bio": "", "username": "user1"}],
+    }
 
     mock_ext_instance = mock_ext.return_value
-    mock_ext_instance.extract_interest_from_bio.side_effect = RuntimeError("Extractor failed")
+    mock_ext_instance.extract_category_indices.side_effect = RuntimeError("Extractor failed")
 
     with pytest.raises(RuntimeError, match="Extractor failed"):
         infer_interests("DevUser", dummy_settings)
 
-    mock_neo_instance.close.assert_called_once()
\ No newline at end of file
+    mock_neo_instance.close.assert_called_once()
+
+def test_infer_interests_user_not_found(mocker, dummy_settings):
+    mocker.patch("twitter_interest.service.APIClient")
+    mock_neo = mocker.patch("twitter_interest.service.Neo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = None
+
+    with pytest.raises(UserNotFoundError):
+        infer_interests("Ghost", dummy_settings)
+
+    mock_ext.return_value.extract_category_indices.assert_not_called()
+    mock_neo_instance.close.assert_called_once()
+
+def test_infer_interests_streams_followings_in_pages(mocker, dummy_settings):
+    mocker.patch("twitter_interest.service.APIClient")
+    mock_neo = mocker.patch("twitter_interest.service.Neo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    mock_agg = mocker.patch("twitter_interest.service.InterestAggregator")
+
+    dummy_settings.followings_page_size = 2
+
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_user_with_followings.return_value = {
+        "bio": "python developer",
+        "followings": [{"bio": "rust", "username": "a"}, {"bio": "go", "username": "b"}],
+    }
+    mock_neo_instance.iter_followings_with_bios.return_value = iter([
+        [{"bio": "solidity", "username": "c"}],
+    ])
+
+    configure_extractor(
+        mock_ext, dummy_settings,
+        [["python"], ["rust"], ["go"]],  # user bio + first page
+        [["solidity"]],                  # second page
+    )
+    mock_agg.return_value.aggregate_indices.return_value = ["python"]
+
+    infer_interests("DevUser", dummy_settings)
+
+    mock_neo_instance.get_user_with_followings.assert_called_once_with("devuser", limit=2)
+    mock_neo_instance.iter_followings_with_bios.assert_called_once_with("devuser", 2, after="b")
+    assert_aggregated(mock_agg, ["python"], [["rust"], ["go"], ["solidity"]])
+
+def test_infer_interests_async(mocker, dummy_settings):
+    mock_api = mocker.patch("twitter_interest.service.AsyncAPIClient")
+    mock_neo = mocker.patch("twitter_interest.service.AsyncNeo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    mock_agg = mocker.patch("twitter_interest.service.InterestAggregator")
+
+    dummy_settings.followings_page_size = 1
+
+    async def second_page(user, page_size, after):
+        assert after == "a"
+        yield [{"bio": "solidity", "username": "b"}]
+
+    mock_api.return_value.sync_user_followings = mocker.AsyncMock(return_value={"status": "success"})
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at = mocker.AsyncMock(return_value=None)
+    mock_neo_instance.mark_synced = mocker.AsyncMock()
+    mock_neo_instance.get_user_with_followings = mocker.AsyncMock(return_value={
+        "bio": "python developer",
+        "followings": [{"bio": "rust", "username": "a"}],
+    })
+    mock_neo_instance.iter_followings_with_bios = second_page
+    mock_neo_instance.close = mocker.AsyncMock()
+
+    configure_extractor(mock_ext, dummy_settings, [["python"], ["rust"]], [["solidity"]])
+    mock_agg.return_value.aggregate_indices.return_value = ["python", "rust"]
+
+    result = asyncio.run(infer_interests_async("DevUser", dummy_settings))
+
+    assert result.interests == ["python", "rust"]
+    assert result.data_source == "fresh"
+    mock_neo_instance.mark_synced.assert_awaited_once()
+    mock_api.return_value.sync_user_followings.assert_awaited_once_with("devuser")
+    assert_aggregated(mock_agg, ["python"], [["rust"], ["solidity"]])
+    mock_neo_instance.close.assert_awaited_once()
+
+def test_infer_interests_async_times_stages(mocker, dummy_settings):
+    mocker.patch("twitter_interest.service.AsyncAPIClient").return_value.sync_user_followings = mocker.AsyncMock(
+        return_value={"status": "success"}
+    )
+    mock_neo = mocker.patch("twitter_interest.service.AsyncNeo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    mock_agg = mocker.patch("twitter_interest.service.InterestAggregator")
+    record = mocker.patch("twitter_interest.service.record_inference")
+
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at = mocker.AsyncMock(return_value=None)
+    mock_neo_instance.mark_synced = mocker.AsyncMock()
+    mock_neo_instance.get_user_with_followings = mocker.AsyncMock(return_value={
+        "bio": "python developer",
+        "followings": [{"bio": "rust", "username": "a"}, {"bio": "go", "username": "b"}],
+    })
+    mock_neo_instance.close = mocker.AsyncMock()
+    configure_extractor(mock_ext, dummy_settings, [["python"], ["rust"], ["go"]])
+    mock_agg.return_value.aggregate_indices.return_value = ["python"]
+
+    timings = StageTimings()
+    asyncio.run(infer_interests_async("DevUser", dummy_settings, timings=timings))
+
+    assert set(timings.seconds) == {"cache", "sync", "model", "fetch", "encode", "aggregate", "total"}
+    assert timings.seconds["total"] >= timings.seconds["encode"]
+    assert (timings.followings, timings.bios_encoded) == (2, 3)
+    record.assert_called_once_with(timings.seconds, 2, 3)
+    assert timings.server_timing().startswith("cache;dur=")
+
+def test_infer_interests_async_user_not_found(mocker, dummy_settings):
+    mock_api = mocker.patch("twitter_interest.service.AsyncAPIClient")
+    mock_neo = mocker.patch("twitter_interest.service.AsyncNeo4jClient")
+    mocker.patch("twitter_interest.service.InterestExtractor")
+
+    mock_api.return_value.sync_user_followings = mocker.AsyncMock(return_value={"status": "success"})
+    mock_neo.return_value.get_last_synced_at = mocker.AsyncMock(return_value=None)
+    mock_neo.return_value.mark_synced = mocker.AsyncMock()
+    mock_neo.return_value.get_user_with_followings = mocker.AsyncMock(return_value=None)
+    mock_neo.return_value.close = mocker.AsyncMock()
+
+    with pytest.raises(UserNotFoundError):
+        asyncio.run(infer_interests_async("Ghost", dummy_settings))
+    mock_neo.return_value.close.assert_awaited_once()
+
+def test_ensure_synced_skips_recent_sync(mocker, dummy_settings):
+    api = mocker.Mock()
+    neo4j = mocker.Mock()
+    neo4j.get_last_synced_at.return_value = time.time() - 10
+
+    status = ensure_synced(api, neo4j, "alice", dummy_settings)
+
+    assert status.data_source == "cached"
+    api.sync_user_followings.assert_not_called()
+
+def test_ensure_synced_resyncs_after_ttl(mocker, dummy_settings):
+    api = mocker.Mock()
+    api.sync_user_followings.return_value = {"status": "success"}
+    neo4j = mocker.Mock()
+    neo4j.get_last_synced_at.return_value = time.time() - dummy_settings.sync_ttl_seconds - 1
+
+    status = ensure_synced(api, neo4j, "alice", dummy_settings)
+
+    assert status.data_source == "fresh"
+    api.sync_user_followings.assert_called_once_with("alice")
+    neo4j.mark_synced.assert_called_once_with("alice", status.synced_at)
+
+def test_ensure_synced_force_sync(mocker, dummy_settings):
+    api = mocker.Mock()
+    neo4j = mocker.Mock()
+    neo4j.get_last_synced_at.return_value = time.time()
+
+    status = ensure_synced(api, neo4j, "alice", dummy_settings, force_sync=True)
+
+    assert status.data_source == "fresh"
+    api.sync_user_followings.assert_called_once_with("alice")
+
+def test_ensure_synced_failed_sync_not_recorded(mocker, dummy_settings):
+    api = mocker.Mock()
+    api.sync_user_followings.return_value = {"status": "error", "error": "rate limited"}
+    neo4j = mocker.Mock()
+    neo4j.get_last_synced_at.return_value = None
+
+    status = ensure_synced(api, neo4j, "alice", dummy_settings)
+
+    neo4j.mark_synced.assert_not_called()
+    assert status.data_source == "cached"
+    assert status.synced_at is None
+
+def test_failed_sync_reports_previous_sync(mocker, dummy_settings, sync_server):
+    from twitter_interest.api_client import APIClient, AsyncAPIClient, close_async_http_client
+    from twitter_interest.service import ensure_synced_async
+
+    dummy_settings.network_sync_url = sync_server.url
+    failure = (200, {"status": "error", "error": "rate limited"})
+    sync_server.queue("/api/sync", failure, failure)
+    last_synced_at = time.time() - dummy_settings.sync_ttl_seconds - 1
+    neo4j = mocker.Mock()
+    neo4j.get_last_synced_at.return_value = last_synced_at
+
+    status = ensure_synced(APIClient(dummy_settings), neo4j, "alice", dummy_settings)
+
+    assert (status.data_source, status.synced_at) == ("cached", last_synced_at)
+    neo4j.mark_synced.assert_not_called()
+
+    async def run():
+        neo4j = mocker.AsyncMock()
+        neo4j.get_last_synced_at.return_value = last_synced_at
+        try:
+            return await ensure_synced_async(AsyncAPIClient(dummy_settings), neo4j, "alice", dummy_settings)
+        finally:
+            await close_async_http_client()
+
+    status = asyncio.run(run())
+    assert (status.data_source, status.synced_at) == ("cached", last_synced_at)
+    assert sync_server.calls("/api/sync") == 2
+
+def test_ensure_synced_background_refresh(mocker, dummy_settings):
+    dummy_settings.sync_background_refresh = True
+    api = mocker.Mock()
+    neo4j = mocker.Mock()
+    last_synced_at = time.time() - dummy_settings.sync_ttl_seconds - 1
+    neo4j.get_last_synced_at.return_value = last_synced_at
+    thread = mocker.patch("twitter_interest.service.threading.Thread")
+
+    status = ensure_synced(api, neo4j, "bgsync_user", dummy_settings)
+
+    assert status.data_source == "cached"
+    assert status.refreshing
+    assert status.synced_at == last_synced_at
+    thread.return_value.start.assert_called_once()
+    api.sync_user_followings.assert_not_called()
+    # Run the re-sync the mocked thread would have started
+    thread.call_args.kwargs["target"](*thread.call_args.kwargs["args"])
+    api.sync_user_followings.assert_called_once_with("bgsync_user")
+
+def test_infer_interests_async_served_from_result_cache(mocker, dummy_settings):
+    mock_api = mocker.patch("twitter_interest.service.AsyncAPIClient")
+    mock_neo = mocker.patch("twitter_interest.service.AsyncNeo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    mock_agg = mocker.patch("twitter_interest.service.InterestAggregator")
+
+    mock_api.return_value.sync_user_followings = mocker.AsyncMock(return_value={"status": "success"})
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at = mocker.AsyncMock(return_value=None)
+    mock_neo_instance.mark_synced = mocker.AsyncMock()
+    mock_neo_instance.get_user_with_followings = mocker.AsyncMock(return_value={"bio": "python", "followings": []})
+    mock_neo_instance.close = mocker.AsyncMock()
+    configure_extractor(mock_ext, dummy_settings, [["python"]], [["python"]])
+    mock_agg.return_value.aggregate_indices.return_value = ["python"]
+
+    first = asyncio.run(infer_interests_async("DevUser", dummy_settings))
+    second = asyncio.run(infer_interests_async("DevUser", dummy_settings))
+    assert first.data_source == "fresh"
+    assert second.data_source == "cached"
+    assert second.interests == ["python"]
+    assert second.etag == first.etag
+    assert mock_agg.return_value.aggregate_indices.call_count == 1
+
+    # A forced re-sync invalidates the cached result and recomputes it
+    asyncio.run(infer_interests_async("DevUser", dummy_settings, force_sync=True))
+    assert mock_agg.return_value.aggregate_indices.call_count == 2
+    assert mock_api.return_value.sync_user_followings.await_count == 2
+
+def test_infer_interests_batch_async_dedupes_bios_and_reports_errors(mocker, dummy_settings):
+    mock_api = mocker.patch("twitter_interest.service.AsyncAPIClient")
+    mock_neo = mocker.patch("twitter_interest.service.AsyncNeo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+
+    profiles = {
+        "alice": {"bio": "python", "followings": [{"username": "x", "bio": "rust"}, {"username": "y", "bio": "go"}]},
+        "bob": {"bio": "rust", "followings": [{"username": "x", "bio": "rust"}, {"username": "z", "bio": "python"}]},
+    }
+    mock_api.return_value.sync_user_followings = mocker.AsyncMock(return_value={"status": "success"})
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at = mocker.AsyncMock(return_value=None)
+    mock_neo_instance.mark_synced = mocker.AsyncMock()
+    mock_neo_instance.get_user_with_followings = mocker.AsyncMock(side_effect=lambda user, limit: profiles.get(user))
+    mock_neo_instance.close = mocker.AsyncMock()
+
+    encoded = []
+    def extract(bios):
+        encoded.extend(bios)
+        return index_rows([[bio] for bio in bios])
+    mock_ext.return_value.categories = CATEGORIES
+    mock_ext.return_value.extract_category_indices.side_effect = extract
+
+    batch = asyncio.run(infer_interests_batch_async(["Bob", "ghost", "alice", "bob"], dummy_settings))
+
+    assert list(batch.results) == ["bob", "ghost", "alice"]
+    assert isinstance(batch.results["ghost"], UserNotFoundError)
+    assert batch.results["alice"].interests == ["rust", "go", "python"]
+    assert batch.results["bob"].interests[0] == "rust"
+    # Every distinct bio is encoded exactly once across the whole batch
+    assert sorted(encoded) == ["go", "python", "rust"]
+    assert (batch.followings_total, batch.unique_followings, batch.unique_bios) == (4, 3, 3)
+
+def test_infer_interests_batch_async_uses_stored_interests(mocker, dummy_settings, monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", _InferenceMetrics())
+    mock_api = mocker.patch("twitter_interest.service.AsyncAPIClient")
+    mock_neo = mocker.patch("twitter_interest.service.AsyncNeo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    dummy_settings.interest_store_enabled = True
+
+    counts = {
+        "alice": {"interests": ["python"], "followings_counts": [{"interest": "rust", "count": 2}], "followings_total": 2},
+        "bob": {"interests": ["go"], "followings_counts": [], "followings_total": 0},
+    }
+    mock_api.return_value.sync_user_followings = mocker.AsyncMock(return_value={"status": "success"})
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at = mocker.AsyncMock(return_value=None)
+    mock_neo_instance.mark_synced = mocker.AsyncMock()
+    mock_neo_instance.get_interest_state = mocker.AsyncMock(
+        side_effect=lambda user: stored_state(dummy_settings, user, checked_at=200.0, last_synced_at=100.0)
+    )
+    mock_neo_instance.get_stored_interest_counts = mocker.AsyncMock(side_effect=counts.get)
+    mock_neo_instance.close = mocker.AsyncMock()
+
+    batch = asyncio.run(infer_interests_batch_async(["alice", "bob"], dummy_settings))
+
+    assert batch.results["alice"].interests == ["rust", "python"]
+    assert batch.results["bob"].interests == ["go"]
+    assert batch.followings_total == 2
+    mock_neo_instance.get_user_with_followings.assert_not_called()
+    mock_ext.assert_not_called()
+    recorded = metrics.inference_metrics()
+    assert recorded["followings"]["count"] == 2
+    assert set(recorded["stage_seconds"]) == {"sync", "refresh", "fetch", "aggregate", "total"}
+
+def stored_state(settings, bio, checked_at=None, last_synced_at=100.0, **overrides):
+    state = {
+        "bio": bio,
+        "bio_hash": bio_hash(bio),
+        "model": settings.model_name,
+        "config": interest_config_hash(settings),
+        "last_synced_at": last_synced_at,
+        "checked_at": checked_at,
+    }
+    state.update(overrides)
+    return state
+
+def test_infer_interests_recomputes_only_stale_stored_interests(mocker, dummy_settings):
+    mocker.patch("twitter_interest.service.APIClient")
+    mock_neo = mocker.patch("twitter_interest.service.Neo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    dummy_settings.interest_store_enabled = True
+
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at.return_value = None
+    mock_neo_instance.get_interest_state.return_value = stored_state(dummy_settings, "python developer")
+    # Up-to-date followings are filtered out in Cypher
+    mock_neo_instance.iter_interest_candidates.return_value = iter([[
+        {"username": "b", **stored_state(dummy_settings, "go", bio_hash="old")},       # bio changed
+        {"username": "c", **stored_state(dummy_settings, "solidity", model="other")},  # model changed
+    ]])
+    mock_neo_instance.get_stored_interest_counts.return_value = {
+        "interests": ["python"],
+        "followings_counts": [{"interest": "rust", "count": 2}, {"interest": "go", "count": 1}],
+        "followings_total": 3,
+    }
+    mock_ext.return_value.categories = CATEGORIES
+    mock_ext.return_value.extract_category_scores.return_value = (
+        index_rows([["go"], ["solidity"]]), np.array([[0.8, 0.0], [0.9, 0.0]], dtype=np.float32)
+    )
+
+    result = infer_interests("DevUser", dummy_settings)
+
+    assert result == ["rust", "go", "python"]
+    mock_ext.return_value.extract_category_scores.assert_called_once_with(["go", "solidity"])
+    rows, model, config = mock_neo_instance.store_interests.call_args.args
+    assert [(r["username"], r["interests"]) for r in rows] == [("b", ["go"]), ("c", ["solidity"])]
+    assert rows[0]["scores"] == [pytest.approx(0.8)]
+    assert rows[0]["bio_hash"] == bio_hash("go")
+    assert rows[0]["bio"] == "go"
+    assert model == dummy_settings.model_name
+    mock_neo_instance.iter_interest_candidates.assert_called_once_with(
+        "devuser", dummy_settings.followings_page_size, dummy_settings.model_name, config
+    )
+    mock_neo_instance.mark_interests_checked.assert_called_once()
+    mock_ext.return_value.extract_category_indices.assert_not_called()
+
+def test_infer_interests_skips_refresh_when_checked_after_sync(mocker, dummy_settings):
+    mocker.patch("twitter_interest.service.APIClient")
+    mock_neo = mocker.patch("twitter_interest.service.Neo4jClient")
+    mock_ext = mocker.patch("twitter_interest.service.InterestExtractor")
+    dummy_settings.interest_store_enabled = True
+
+    mock_neo_instance = mock_neo.return_value
+    mock_neo_instance.get_last_synced_at.return_value = time.time()
+    mock_neo_instance.get_interest_state.return_value = stored_state(
+        dummy_settings, "python developer", checked_at=200.0, last_synced_at=100.0
+    )
+    mock_neo_instance.get_stored_interest_counts.return_value = {
+        "interests": ["python"], "followings_counts": [], "followings_total": 0,
+    }
+
+    assert infer_interests("DevUser", dummy_settings) == ["python"]
+    mock_neo_instance.iter_interest_candidates.assert_not_called()
+    mock_neo_instance.store_interests.assert_not_called()
+    mock_ext.assert_not_called()
@@ -0,0 +1,48 @@
+import pytest
+from twitter_interest import serving, taxonomy
+from twitter_interest.settings import Settings
+from twitter_interest.serving import configure_worker, preload_for_fork
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setattr(taxonomy, "_taxonomy", None)
+    return Settings()
+
+
+def test_preload_loads_model_and_categories_on_one_thread_then_freezes(settings, mocker):
+    registry = mocker.patch("twitter_interest.serving.get_model_registry").return_value
+    set_num_threads = mocker.patch("torch.set_num_threads")
+    freeze = mocker.patch("twitter_interest.serving.gc.freeze")
+
+    preload_for_fork(settings)
+
+    set_num_threads.assert_called_once_with(1)
+    registry.get_model.assert_called_once_with(settings.model_name)
+    registry.get_category_embeddings.assert_called_once_with(settings.model_name, settings.categories)
+    freeze.assert_called_once()
+
+
+def test_preload_uses_current_taxonomy(settings, mocker):
+    registry = mocker.patch("twitter_interest.serving.get_model_registry").return_value
+    mocker.patch("torch.set_num_threads")
+    mocker.patch("twitter_interest.serving.gc.freeze")
+    mocker.patch("twitter_interest.taxonomy.get_model_registry")
+    taxonomy.update_taxonomy(settings, ["Chess", "Jazz"], source="test")
+
+    preload_for_fork(settings)
+
+    registry.get_category_embeddings.assert_called_with(settings.model_name, ["Chess", "Jazz"])
+
+
+@pytest.mark.parametrize("cpus, workers, threads", [(8, 2, 4), (8, 3, 2), (2, 4, 1), (None, 2, 1)])
+def test_worker_threads_split_cores(mocker, cpus, workers, threads):
+    mocker.patch("twitter_interest.serving.os.cpu_count", return_value=cpus)
+    set_num_threads = mocker.patch("torch.set_num_threads")
+
+    configure_worker(workers)
+
+    set_num_threads.assert_called_once_with(threads)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from twitter_interest import taxonomy
+from twitter_interest.settings import Settings, read_categories_file
+from twitter_interest.taxonomy import CategoriesFileWatcher, get_taxonomy, update_taxonomy, with_current_taxonomy
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setattr(taxonomy, "_taxonomy", None)
+    return Settings(INTEREST_CATEGORIES=["python", "rust"])
+
+
+@pytest.fixture
+def registry(mocker):
+    registry = mocker.patch("twitter_interest.taxonomy.get_model_registry").return_value
+    registry.stats.return_value = {"models": ["other-model"]}
+    registry.get_category_embeddings.side_effect = lambda model, categories: np.zeros((len(categories), 2))
+    return registry
+
+
+def test_initial_taxonomy_comes_from_settings(settings):
+    assert get_taxonomy(settings).categories == ("python", "rust")
+    assert get_taxonomy(settings).source == "settings"
+
+
+def test_update_encodes_then_swaps(settings, registry):
+    in_flight = with_current_taxonomy(settings)
+
+    current, added, removed = update_taxonomy(settings, ["rust", " go ", "go", "solidity"], source="admin")
+
+    assert current.categories == ("rust", "go", "solidity")
+    assert (added, removed) == (["go", "solidity"], ["python"])
+    encoded_for = [call.args[0] for call in registry.get_category_embeddings.call_args_list]
+    assert encoded_for == [settings.model_name, "other-model"]
+    # Requests that started before the swap keep their own category list
+    assert in_flight.categories == ["python", "rust"]
+    assert with_current_taxonomy(settings).categories == ["rust", "go", "solidity"]
+
+
+def test_empty_update_is_rejected(settings, registry):
+    with pytest.raises(ValueError):
+        update_taxonomy(settings, [" ", ""], source="admin")
+    assert get_taxonomy(settings).categories == ("python", "rust")
+
+
+def test_categories_file_formats(tmp_path):
+    lines = tmp_path / "categories.txt"
+    lines.write_text("# tech\npython\n\nrust\npython\n", encoding="utf-8")
+    array = tmp_path / "categories.json"
+    array.write_text('["defi", "nft"]', encoding="utf-8")
+    assert read_categories_file(lines) == ["python", "rust"]
+    assert read_categories_file(array) == ["defi", "nft"]
+
+
+def test_watcher_reloads_changed_file_and_survives_bad_ones(settings, registry, tmp_path):
+    path = tmp_path / "categories.txt"
+    path.write_text("python\nrust\n", encoding="utf-8")
+    watcher = CategoriesFileWatcher(settings.model_copy(update={"categories_file": str(path)}))
+
+    path.write_text("python\nrust\nzk\n", encoding="utf-8")
+    watcher._mtime = None
+    watcher.check()
+    assert get_taxonomy(settings).categories == ("python", "rust", "zk")
+
+    path.write_text("# nothing here\n", encoding="utf-8")
+    watcher._mtime = None
+    watcher.check()
+    assert get_taxonomy(settings).categories == ("python", "rust", "zk")
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from twitter_interest import warmup
+from twitter_interest.settings import Settings
+from twitter_interest.warmup import WARMUP_STAGES, WarmupState, start_warmup, warm_up, warmup_state
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setenv("NEO4J_URI", "bolt://dummy")
+    monkeypatch.setenv("NEO4J_USERNAME", "user")
+    monkeypatch.setenv("NEO4J_PASSWORD", "pass")
+    monkeypatch.setattr(warmup, "_state", WarmupState())
+    return Settings()
+
+
+@pytest.fixture
+def registry(mocker):
+    registry = mocker.patch("twitter_interest.warmup.get_model_registry").return_value
+    mocker.patch("twitter_interest.warmup.encode_length_bucketed", return_value=np.zeros((1, 2)))
+    return registry
+
+
+def test_warm_up_loads_model_and_categories(settings, registry):
+    stage_seconds = warm_up(settings)
+
+    assert tuple(stage_seconds) == WARMUP_STAGES
+    registry.get_model.assert_called_once_with(settings.model_name)
+    registry.get_category_embeddings.assert_called_once_with(settings.model_name, settings.categories)
+
+
+def test_background_warmup_records_success(settings, registry):
+    start_warmup(settings).join(timeout=10)
+
+    state = warmup_state()
+    assert state.status == "done"
+    assert set(state.stage_seconds) == set(WARMUP_STAGES)
+
+
+def test_background_warmup_records_failure(settings, registry):
+    registry.get_model.side_effect = OSError("model not found")
+
+    start_warmup(settings).join(timeout=10)
+
+    state = warmup_state()
+    assert state.status == "failed"
+    assert "model not found" in state.error